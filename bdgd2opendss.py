@@ -1,5 +1,6 @@
 import bdgd2opendss as bdgd
 from bdgd2opendss import settings
+import argparse
 import pathlib
 import os
 import warnings
@@ -10,6 +11,11 @@ warnings.filterwarnings("ignore", category=FutureWarning)
 
 if __name__ == '__main__':
 
+    parser = argparse.ArgumentParser(description="Converte alimentadores da BDGD para o OpenDSS")
+    parser.add_argument("--profile", action="store_true",
+                        help="perfila a conversão de cada alimentador (.prof e resumo .txt na pasta do alimentador)")
+    args = parser.parse_args()
+
     script_path = os.path.dirname(os.path.abspath(__file__))
     bdgd_file_path = pathlib.Path(script_path, "bdgd2opendss", "sample", "raw", "aneel", "Creluz-D_598_2023-12-31_V11_20240715-1111.gdb")
     lst_feeders = ["1_3PAS_1"]
@@ -29,4 +35,4 @@ if __name__ == '__main__':
     # settings.intAdequarPotenciaCarga = True # - Adequa potência das cargas BT a carga do transformador conectado
     # settings.intUsaTrafoABNT = False # - Usa as perdas dos transformadores da ABNT 5440
     # settings.cbMeterComplete = False # - (True) Criar medidores de energia nos transformadores MTMT e barramento/ (False) Cria só no barramento
-    bdgd.run(bdgd_file_path=bdgd_file_path, all_feeders=False,lst_feeders=lst_feeders)
+    bdgd.run(bdgd_file_path=bdgd_file_path, all_feeders=False,lst_feeders=lst_feeders, profile=args.profile)
@@ -2,11 +2,23 @@
 import inspect
 import os.path
 import pathlib
-from typing import List, Union, Optional
+from dataclasses import dataclass, field
+from typing import Any, List, Union, Optional
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
 
 from bdgd2opendss.core.JsonData import JsonData
 from bdgd2opendss.model.Case import Case
 from bdgd2opendss.core.Settings import settings
+from bdgd2opendss.core import Utils
+from bdgd2opendss.core import Telemetry
+from bdgd2opendss.model.BusCoords import reset_bdgd_coords
+from bdgd2opendss.model.CurveEngine import reset_crvcrg_curves
+from bdgd2opendss.model.LoadEngine import reset_coefficient_tables
+from bdgd2opendss.model.Load import Load
 
 def get_caller_directory(caller_frame: inspect) -> pathlib.Path:
     """
@@ -27,6 +39,96 @@ def get_feeder_list(folder: str) -> List[str]:  # TODO is there a way to not loa
 
     return geodataframes["CTMT"]['gdf']['COD_ID'].tolist()
 
+_feeder_indexes = {} #índices espaciais dos alimentadores, por BDGD
+
+
+@dataclass
+class FeederIndex:
+    """
+    Spatial index of the feeders of a BDGD: one envelope per feeder (SSDMT extent) in an STRtree.
+
+    Attributes:
+        alimentadores (np.ndarray): CTMT of each envelope.
+        envelopes (np.ndarray): Bounding box of the SSDMT segments of each feeder.
+        segmentos (dict): CTMT -> SSDMT geometries of the feeder, for the exact test.
+        crs (Any): CRS of the SSDMT layer.
+    """
+    alimentadores: np.ndarray
+    envelopes: np.ndarray
+    segmentos: dict
+    crs: Any
+    arvore: shapely.STRtree = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.arvore = shapely.STRtree(self.envelopes)
+
+    def query(self, area) -> List[str]:
+        """Returns the feeders whose envelope intersects the area and that have an SSDMT segment crossing it."""
+        candidatos = np.sort(self.arvore.query(area, predicate='intersects'))
+        shapely.prepare(area)
+        return [ctmt for ctmt in self.alimentadores[candidatos] if shapely.intersects(area, self.segmentos[ctmt]).any()]
+
+
+def create_feeder_index(bdgd_file_path: Union[str, pathlib.Path]) -> FeederIndex:
+    """
+    Reads the SSDMT geometries (only CTMT and geometry) and builds the envelope of each feeder.
+
+    :param bdgd_file_path: Path of the BDGD (GDB/GPKG).
+    :return: The FeederIndex of the BDGD.
+    """
+    gdf = gpd.read_file(pathlib.Path(bdgd_file_path), layer='SSDMT', columns=['CTMT'], ignore_geometry=False,
+                        engine='pyogrio', use_arrow=True)
+    gdf = gdf[~gdf.geometry.is_empty & gdf.geometry.notna() & gdf['CTMT'].notna()]
+    geometrias = np.asarray(gdf.geometry.array, dtype=object)
+    limites = pd.DataFrame(shapely.bounds(geometrias), columns=['xmin', 'ymin', 'xmax', 'ymax'])
+    limites['CTMT'] = gdf['CTMT'].to_numpy()
+    extensao = limites.groupby('CTMT', sort=False).agg({'xmin': 'min', 'ymin': 'min', 'xmax': 'max', 'ymax': 'max'})
+    segmentos = {ctmt: geometrias[linhas] for ctmt, linhas in limites.groupby('CTMT', sort=False).indices.items()}
+    envelopes = shapely.box(*(extensao[coluna].to_numpy() for coluna in ['xmin', 'ymin', 'xmax', 'ymax']))
+    return FeederIndex(extensao.index.to_numpy(), envelopes, segmentos, gdf.crs)
+
+
+def get_feeders_in_area(bdgd_file_path: Union[str, pathlib.Path], area, area_crs: Optional[Any] = None) -> List[str]:
+    """
+    Returns the feeders (CTMT) whose SSDMT network crosses an area, e.g. the polygon of a municipality.
+
+    The spatial index of the BDGD is built on the first call and kept for the next ones.
+
+    :param bdgd_file_path: Path of the BDGD (GDB/GPKG).
+    :param area: shapely geometry, WKT string or GeoSeries/GeoDataFrame (its geometries are merged).
+    :param area_crs: CRS of the area (default: the CRS of the GeoSeries/GeoDataFrame or the CRS of the BDGD).
+    :return: The CTMT codes, in the BDGD order.
+    """
+    key = str(bdgd_file_path)
+    if key not in _feeder_indexes:
+        _feeder_indexes[key] = create_feeder_index(bdgd_file_path)
+    indice = _feeder_indexes[key]
+
+    if isinstance(area, (gpd.GeoSeries, gpd.GeoDataFrame)):
+        area_crs = area_crs or area.crs
+        area = area.unary_union
+    elif isinstance(area, str):
+        area = shapely.from_wkt(area)
+    if area_crs is not None and indice.crs is not None and not gpd.GeoSeries([area], crs=area_crs).crs.equals(indice.crs):
+        area = gpd.GeoSeries([area], crs=area_crs).to_crs(indice.crs).iloc[0]
+    return indice.query(area)
+
+
+def reset_caches():
+    """
+    Forgets the data kept between feeders: the coordinates of the BDGD, the spatial index of the feeders, the
+    CRVCRG curves and loadshape coefficients and the per-feeder load state (Load.reset_feeder_state).
+
+    Called at the end of run, so that a long-lived process does not keep every BDGD it converted nor reuse data of a
+    file that changed. Can also be called directly, e.g. after get_feeders_in_area.
+    """
+    _feeder_indexes.clear()
+    reset_bdgd_coords()
+    reset_crvcrg_curves()
+    reset_coefficient_tables()
+    Load.reset_feeder_state()
+
+
 def export_feeder_list(feeder_list, feeder):
 
     if not os.path.exists("dss_models_output"):
@@ -46,32 +148,63 @@ def export_feeder_list(feeder_list, feeder):
 def run(bdgd_file_path: Union[str, pathlib.Path],
         output_folder: Optional[Union[str, pathlib.Path]] = None,
         all_feeders: bool = True,
-        lst_feeders: Optional[List[str]] = None) :
-
-    #
-    if settings.TipoBDGD:
-        json_file_name = os.path.join(os.getcwd(), "bdgd2dss_private.json")
-    else:
-        json_file_name = os.path.join(os.getcwd(), "bdgd2dss.json")
-    json_obj = JsonData(json_file_name)
-    geodataframes = json_obj.create_geodataframes(bdgd_file_path)
-
-    # generates all feeders
-    if all_feeders:
-
-        for feeder in geodataframes["CTMT"]['gdf']['COD_ID'].tolist():
-
-            case = Case(json_obj.data, geodataframes, bdgd_file_path, feeder, output_folder)
-            case.PopulaCase()
-
-    else :
+        lst_feeders: Optional[List[str]] = None,
+        area: Optional[Any] = None,
+        area_crs: Optional[Any] = None,
+        profile: bool = False) :
+    """
+    Converts the feeders of a BDGD to OpenDSS.
 
-        for feeder in lst_feeders:
+    When an area is given (shapely geometry, WKT or GeoSeries/GeoDataFrame, in area_crs), only the feeders whose
+    SSDMT network crosses it are converted (get_feeders_in_area), instead of all_feeders/lst_feeders.
 
-            # verifies if the feeder exists
-            if feeder not in geodataframes["CTMT"]['gdf']['COD_ID'].tolist() :
-                print(f"\nFeeder: {feeder} not found in CTMT.")
-                continue
+    With profile=True, the conversion of each feeder is profiled (cProfile, or pyinstrument when installed) and the
+    .prof file and the hot-function summary are written in the feeder folder (Profiling.FeederProfiler).
 
-            case = Case(json_obj.data, geodataframes, bdgd_file_path, feeder, output_folder)
-            case.PopulaCase()
+    Returns:
+        None when the files are written in the folder tree (settings.outputSink="directory"), the files as
+        {"<feeder>/<file>": bytes} for outputSink="memory" or the paths of the archives for outputSink="zip"/"tar".
+    """
+    sink = Utils.set_output_sink() #destino dos arquivos de saída escolhido em settings.outputSink (reescreve a pasta Comum)
+    Telemetry.reset()
+
+    try:
+        #
+        if settings.TipoBDGD:
+            json_file_name = os.path.join(os.getcwd(), "bdgd2dss_private.json")
+        else:
+            json_file_name = os.path.join(os.getcwd(), "bdgd2dss.json")
+        json_obj = JsonData(json_file_name)
+        if area is not None:
+            lst_feeders = get_feeders_in_area(bdgd_file_path, area, area_crs)
+            all_feeders = False
+            Telemetry.message(f"Alimentadores na área: {', '.join(map(str, lst_feeders))}")
+        with Telemetry.stage("leitura da BDGD") as etapa: #JsonData guarda os tempos de leitura e conversão de cada tabela
+            geodataframes = json_obj.create_geodataframes(bdgd_file_path)
+            etapa["rows"] = sum(len(tabela['gdf']) for tabela in geodataframes.values())
+
+        # generates all feeders
+        if all_feeders:
+
+            for feeder in geodataframes["CTMT"]['gdf']['COD_ID'].tolist():
+
+                case = Case(json_obj.data, geodataframes, bdgd_file_path, feeder, output_folder, profile=profile)
+                case.PopulaCase()
+
+        else :
+
+            for feeder in lst_feeders:
+
+                # verifies if the feeder exists
+                if feeder not in geodataframes["CTMT"]['gdf']['COD_ID'].tolist() :
+                    Telemetry.message(f"\nFeeder: {feeder} not found in CTMT.", level="error")
+                    continue
+
+                case = Case(json_obj.data, geodataframes, bdgd_file_path, feeder, output_folder, profile=profile)
+                case.PopulaCase()
+
+        Telemetry.write_batch_metrics() #métricas das etapas de todos os alimentadores (settings.stageMetrics)
+    finally: #os dados guardados entre alimentadores valem só para esta execução
+        reset_caches()
+        Telemetry.close_log() #também quando um alimentador falha
+    return sink.result()
@@ -2,6 +2,8 @@ import json
 import time
 import geopandas as gpd
 
+from bdgd2opendss.core.Telemetry import message
+
 # import os
 # from typing import Optional
 
@@ -72,7 +74,7 @@ class JsonData:
                             float(value)
                     except ValueError:
                         list_error.append(index)
-                        print(f'Erro de preenchimento da BDGD localizado no elemento {name} de código {df.loc[index, "COD_ID"]} coluna {column}')     
+                        message(f'Erro de preenchimento da BDGD localizado no elemento {name} de código {df.loc[index, "COD_ID"]} coluna {column}', level="error")
     
     @staticmethod
     def convert_data_types(df, column_types, name): #TODO mostrar quais são os elementos com erro de preenchimento
@@ -104,7 +106,7 @@ class JsonData:
 
             for _ in range(runs):
                 start_time = time.time()
-                print(f'Creating geodataframe {table.name}')
+                message(f'Creating geodataframe {table.name}')
                 gdf_ = gpd.read_file(file_name, layer=table.name,
                                      columns=table.columns,ignore_geometry=table.ignore_geometry, 
                                      engine='pyogrio', use_arrow=True)  # ! ignore_geometry não funciona, pq este parâmetro espera um bool e está recebendo str
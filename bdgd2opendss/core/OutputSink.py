@@ -0,0 +1,205 @@
+# -*- encoding: utf-8 -*-
+"""
+Destinos (sinks) dos arquivos de saída.
+
+Todas as funções de escrita abrem os arquivos por meio do sink ativo (Utils.open_output_file), que decide onde
+o conteúdo vai parar:
+
+- directory: a árvore de pastas atual (<pasta de saída>/<alimentador>/<arquivo>);
+- memory: bytes em memória, devolvidos por run() (serviços e testes, sem tocar o disco);
+- zip/tar: um único arquivo compactado por alimentador (<pasta de saída>/<alimentador>.zip ou .tar.gz).
+
+Os arquivos são identificados por "<alimentador>/<arquivo>", de modo que extrair os arquivos compactados na
+pasta de saída reproduz a mesma árvore do modo directory (inclusive a pasta compartilhada Comum).
+"""
+import io
+import os
+import tarfile
+import time
+import zipfile
+from typing import Callable, Dict, List, Optional
+
+SINKS = ("directory", "memory", "zip", "tar")
+
+
+class _TextEntry(io.StringIO):
+    """Text file kept in memory and handed to the sink when closed."""
+
+    def __init__(self, store: Callable, key: str, append: bool):
+        super().__init__()
+        self._store = store
+        self._key = key
+        self._append = append
+
+    def close(self):
+        if not self.closed:
+            self._store(self._key, self.getvalue().encode("utf-8"), self._append)
+        super().close()
+
+
+class _BinaryEntry(io.BytesIO):
+    """Binary file kept in memory and handed to the sink when closed."""
+
+    def __init__(self, store: Callable, key: str, append: bool):
+        super().__init__()
+        self._store = store
+        self._key = key
+        self._append = append
+
+    def close(self):
+        if not self.closed:
+            self._store(self._key, self.getvalue(), self._append)
+        super().close()
+
+
+class OutputSink:
+    """Base class of the output destinations."""
+
+    kind = ""
+
+    def open(self, feeder: str, output_folder: Optional[str], file_name: str, mode: str = "w", newline: Optional[str] = None,
+             encoding: Optional[str] = None):
+        """
+        Opens an output file of a feeder.
+
+        Args:
+            feeder (str): Feeder code (name of the feeder folder).
+            output_folder (Optional[str]): Base output folder.
+            file_name (str): File name, relative to the feeder folder (may contain a subfolder, e.g. Loadshapes/x.sng).
+            mode (str): "w", "a", "wb" or "ab".
+            newline (Optional[str]): Newline translation of text files (as in open()).
+            encoding (Optional[str]): Encoding of text files in the folder tree (the other sinks always use UTF-8).
+
+        Returns:
+            A file object, written and closed by the caller.
+        """
+        raise NotImplementedError
+
+    def location(self, feeder: str, output_folder: Optional[str], file_name: str) -> str:
+        """Returns where a file is written (used in the messages)."""
+        return f"{feeder}/{file_name}"
+
+    def close_feeder(self):
+        """Called at the end of each feeder."""
+
+    def result(self):
+        """Returns what run() hands back to the caller (None for the directory tree)."""
+        return None
+
+
+class DirectorySink(OutputSink):
+    """Writes each file in the feeder folder, as the converter always did."""
+
+    kind = "directory"
+
+    def __init__(self, output_directory: Callable, buffering: int = -1):
+        """
+        Args:
+            output_directory (Callable): (feeder, output_folder) -> feeder folder, created if needed.
+            buffering (int): Buffer size of the files (as in open()).
+        """
+        self._output_directory = output_directory
+        self._buffering = buffering
+
+    def location(self, feeder, output_folder, file_name):
+        return os.path.join(self._output_directory(feeder, output_folder), file_name)
+
+    def open(self, feeder, output_folder, file_name, mode="w", newline=None, encoding=None):
+        path = self.location(feeder, output_folder, file_name)
+        if os.path.dirname(file_name):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if "b" in mode:
+            return open(path, mode, buffering=self._buffering)
+        return open(path, mode, buffering=self._buffering, newline=newline, encoding=encoding)
+
+
+class MemorySink(OutputSink):
+    """Keeps every file in memory as bytes, indexed by "<feeder>/<file>"."""
+
+    kind = "memory"
+
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+
+    def _store(self, key: str, data: bytes, append: bool):
+        if append and key in self.files:
+            data = self.files[key] + data
+        self.files[key] = data
+
+    def open(self, feeder, output_folder, file_name, mode="w", newline=None, encoding=None):
+        key = f"{feeder}/{file_name}"
+        entry = _BinaryEntry if "b" in mode else _TextEntry
+        return entry(self._store, key, "a" in mode)
+
+    def result(self) -> Dict[str, bytes]:
+        return dict(self.files)
+
+
+class ArchiveSink(MemorySink):
+    """
+    Writes one archive per feeder: the files are kept in memory while the feeder is converted and streamed into
+    <output folder>/<feeder>.zip (or .tar.gz) at the end of the feeder.
+    """
+
+    def __init__(self, kind: str = "zip"):
+        super().__init__()
+        self.kind = kind
+        self._folders: Dict[str, Optional[str]] = {}
+        self.archives: List[str] = []
+
+    def open(self, feeder, output_folder, file_name, mode="w", newline=None, encoding=None):
+        self._folders.setdefault(feeder, output_folder)
+        return super().open(feeder, output_folder, file_name, mode, newline, encoding)
+
+    def location(self, feeder, output_folder, file_name):
+        return f"{self.archive_path(feeder, output_folder)}:{feeder}/{file_name}"
+
+    def archive_path(self, feeder: str, output_folder: Optional[str]) -> str:
+        """Returns the archive of a feeder: <output folder>/<feeder>.zip or .tar.gz."""
+        base = output_folder if output_folder is not None else os.path.join(os.getcwd(), "dss_models_output")
+        return os.path.join(base, f"{feeder}.zip" if self.kind == "zip" else f"{feeder}.tar.gz")
+
+    def close_feeder(self):
+        """Writes the archive of each feeder with files in memory (the feeder and, once, the shared folder)."""
+        for feeder, output_folder in self._folders.items():
+            path = self.archive_path(feeder, output_folder)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            entries = [(key, data) for key, data in self.files.items() if key.startswith(f"{feeder}/")]
+            if self.kind == "zip":
+                with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                    for key, data in entries:
+                        archive.writestr(key, data)
+            else:
+                with tarfile.open(path, "w:gz") as archive:
+                    for key, data in entries:
+                        info = tarfile.TarInfo(key)
+                        info.size = len(data)
+                        info.mtime = int(time.time())
+                        archive.addfile(info, io.BytesIO(data))
+            self.archives.append(path)
+        self.files.clear()
+        self._folders.clear()
+
+    def result(self) -> List[str]:
+        return list(self.archives)
+
+
+def create_output_sink(kind: str, output_directory: Callable, buffering: int = -1) -> OutputSink:
+    """
+    Creates the sink selected in settings.outputSink.
+
+    Args:
+        kind (str): directory, memory, zip or tar.
+        output_directory (Callable): (feeder, output_folder) -> feeder folder, used by the directory sink.
+        buffering (int): Buffer size of the files of the directory sink.
+
+    Returns:
+        OutputSink: The output destination.
+    """
+    if kind == "directory":
+        return DirectorySink(output_directory, buffering)
+    if kind == "memory":
+        return MemorySink()
+    if kind in ("zip", "tar"):
+        return ArchiveSink(kind)
+    raise ValueError(f"outputSink inválido: {kind}. Opções: {', '.join(SINKS)}")
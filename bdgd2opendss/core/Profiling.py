@@ -0,0 +1,106 @@
+# -*- encoding: utf-8 -*-
+"""
+Modo de perfilamento (run(profile=True) ou bdgd2opendss.py --profile).
+
+A conversão de cada alimentador (Case.PopulaCase) é medida pelo cProfile, ou pelo pyinstrument (amostragem)
+quando ele está instalado. Os resultados são gravados na pasta do alimentador, pelo destino de saída ativo:
+
+- cProfile: Perfil_<...>.prof (formato do pstats, para snakeviz/pstats) e Perfil_<...>.txt com as TOP_FUNCOES
+  funções de maior tempo próprio e de maior tempo acumulado;
+- pyinstrument: Perfil_<...>.html (árvore de chamadas) e Perfil_<...>.txt com o resumo em texto.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+from typing import Optional
+
+from bdgd2opendss.core.Utils import open_output_file, output_file_location, output_file_name
+from bdgd2opendss.core.Telemetry import message
+
+TOP_FUNCOES = 30 #funções listadas no resumo em texto
+
+
+def sampling_profiler_available() -> bool:
+    """Returns True when the pyinstrument sampling profiler is installed."""
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class FeederProfiler:
+    """Profiles the conversion of a feeder with cProfile or, when installed, the pyinstrument sampling profiler."""
+
+    def __init__(self, feeder: str, output_folder: Optional[str] = None, top: int = TOP_FUNCOES):
+        """
+        Args:
+            feeder (str): Feeder code (the results are written in its folder).
+            output_folder (Optional[str]): Base output folder.
+            top (int): Number of functions in the text summary.
+        """
+        self.feeder = feeder
+        self.output_folder = output_folder
+        self.top = top
+        if sampling_profiler_available():
+            from pyinstrument import Profiler
+            self.kind = "pyinstrument"
+            self._profiler = Profiler()
+        else:
+            self.kind = "cProfile"
+            self._profiler = cProfile.Profile()
+        self.running = False
+
+    def start(self):
+        if self.kind == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+        self.running = True
+        return self
+
+    def stop(self):
+        """Stops the profiler (does nothing when it is not running)."""
+        if not self.running:
+            return
+        self.running = False
+        if self.kind == "pyinstrument":
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def summary(self) -> str:
+        """Returns the top-N hot functions (cProfile) or the call tree (pyinstrument) as text."""
+        cabecalho = f"Perfil da conversão do alimentador {self.feeder} ({self.kind})\n\n"
+        if self.kind == "pyinstrument":
+            return cabecalho + self._profiler.output_text(unicode=False, color=False)
+        texto = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=texto)
+        stats.strip_dirs()
+        texto.write("Funções com maior tempo próprio (tottime):\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top)
+        texto.write("Funções com maior tempo acumulado (cumtime):\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        return cabecalho + texto.getvalue()
+
+    def write(self) -> str:
+        """
+        Writes the results in the feeder folder.
+
+        Returns:
+            str: Location of the text summary.
+        """
+        base = output_file_name("Perfil", self.feeder)[:-4]
+        if self.kind == "pyinstrument":
+            with open_output_file(f"{base}.html", self.feeder, self.output_folder, encoding="utf-8") as file:
+                file.write(self._profiler.output_html())
+        else:
+            stats = pstats.Stats(self._profiler)
+            with open_output_file(f"{base}.prof", self.feeder, self.output_folder, "wb") as file:
+                file.write(marshal.dumps(stats.stats)) #mesmo conteúdo de pstats.Stats.dump_stats
+        with open_output_file(f"{base}.txt", self.feeder, self.output_folder, encoding="utf-8") as file:
+            file.write(self.summary())
+        local = output_file_location(f"{base}.txt", self.feeder, self.output_folder)
+        message(f"Perfil do alimentador {self.feeder} ({self.kind}) gravado em {local}")
+        return local
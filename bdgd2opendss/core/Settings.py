@@ -11,10 +11,24 @@ class Settings:
     limitRamal30m: bool = field(default=True, metadata={"description": "Limits ramal to 30m"})
     ger4fios: bool = field(default=True, metadata={"description": "Generates with Neutral"})
     gerCapacitors: bool = field(default=False, metadata={"description": "Generates capacitor banks"})
-    loadModel: str = field(default="ANEEL", metadata={"description": "Load model (ANEEL or model8)"})
+    loadModel: str = field(default="ANEEL", metadata={"description": "Load model: ANEEL (two half loads _M1/_M2) or model8 (one ZIPV load)"})
+    gerYearly: bool = field(default=False, metadata={"description": "Generates yearly loadshapes, loads and master (Set mode=yearly)"})
+    loadshapeFormat: str = field(default="text", metadata={"description": "Loadshape multipliers: text (mult list), sngfile (float32 binary) or dblfile (float64 binary)"})
+    sharedLibrary: bool = field(default=False, metadata={"description": "Writes linecodes, loadshapes and PV curves once per BDGD in a shared folder (Comum)"})
+    dedupMRTLinecodes: bool = field(default=False, metadata={"description": "Defines the MRT resistor linecodes once with the linecodes instead of once per MRT transformer"})
+    outputSink: str = field(default="directory", metadata={"description": "Output destination: directory (one file per element), memory (bytes returned by run) or zip/tar (one archive per feeder)"})
+    progressMode: str = field(default="bar", metadata={"description": "Progress output: bar (rate-limited progress bars and messages) or quiet (errors only, for batch jobs)"})
+    telemetryLog: str = field(default="", metadata={"description": "JSON-lines file that receives the per-stage counters (rows, elapsed, rows/s) and the messages"})
+    stageMetrics: str = field(default="", metadata={"description": "Folder that receives the wall/CPU time, peak traced memory and rows of each conversion stage: one JSON per feeder and etapas.csv for the run"})
+    loadFileMode: str = field(default="full", metadata={"description": "Load files: full (36 complete files) or compact (one definition file + kW edits per day type/month)"})
     genTypeMT: str = field(default="asBDGD", metadata={"description": "MT generator type: generator/PVSystem/asBDGD"})
     genTypeBT: str = field(default="generator", metadata={"description": "BT generator type: generator/PVSystem"})
     gerCoord: bool = field(default=True, metadata={"description": "Controls geographic generation"})
+    coordCRS: str = field(default="", metadata={"description": "CRS of buscoords.csv: empty (as in the BDGD), UTM (zone inferred from the data) or any pyproj CRS (e.g. EPSG:31983)"})
+    orphanCoords: str = field(default="", metadata={"description": "Coordinates of the PACs without segment: empty (none), point (point geometry of the element or of a connected PAC) or snap (points moved to the nearest segment)"})
+    dedupBuscoords: bool = field(default=False, metadata={"description": "Writes one row per PAC in buscoords.csv"})
+    gerTabelaPerdas: bool = field(default=False, metadata={"description": "Exports the load proportion table (PropEnerMens/fc) used in technical losses"})
+    formatoTabelaPerdas: str = field(default="csv", metadata={"description": "Format of the load proportion table: csv/parquet"})
 
     # TODO options in the ProgGeoPerdas
     intRealizaCnvrgcPNT: bool = field(default=False, metadata={"description": "Convergência de Perda Não Técnica"})
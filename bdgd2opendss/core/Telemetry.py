@@ -0,0 +1,237 @@
+# -*- encoding: utf-8 -*-
+"""
+Progresso e telemetria da conversão.
+
+As barras de progresso dos construtores de elementos e as mensagens do Case/Utils passam por este módulo:
+
+- progress(): barra do tqdm com atualização limitada (INTERVALO_PROGRESSO), sem reformatar a descrição a cada
+  linha; ao final de cada etapa registra um contador (linhas, tempo e linhas/s);
+- message(): mensagens de andamento, omitidas no terminal em settings.progressMode="quiet" (erros continuam
+  sendo exibidos).
+
+Com settings.telemetryLog preenchido, contadores e mensagens também são gravados nesse arquivo, um JSON por
+linha, para acompanhar execuções em lote sem depender da saída do terminal. O arquivo é aberto uma vez por execução
+(reset) e fechado ao final (close_log).
+
+Com settings.stageMetrics preenchido, cada etapa do Case.PopulaCase (stage()) registra tempo de parede, tempo de
+CPU, pico de memória rastreada (tracemalloc) e linhas processadas, gravados em um JSON por alimentador e em
+etapas.csv com todos os alimentadores da execução.
+"""
+import csv
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from tqdm import tqdm
+
+from bdgd2opendss.core.Settings import settings
+
+MODOS_PROGRESSO = ("bar", "quiet")
+INTERVALO_PROGRESSO = 0.5 #intervalo mínimo entre atualizações da barra (s)
+
+alimentador_atual = None #alimentador em conversão, incluído nos registros
+registros_etapas: List[Dict[str, Any]] = [] #contadores das etapas da execução atual
+etapa_atual = None #métricas da etapa instrumentada em andamento (stage)
+metricas_alimentador: List[Dict[str, Any]] = [] #métricas das etapas do alimentador em conversão
+metricas_lote: List[Dict[str, Any]] = [] #métricas de todas as etapas da execução (etapas.csv)
+rastreamento_iniciado = False #tracemalloc iniciado pela instrumentação (e não pelo usuário)
+arquivo_log = None #arquivo JSON-lines aberto (settings.telemetryLog)
+COLUNAS_METRICAS = ["feeder", "stage", "rows", "wall_time", "cpu_time", "peak_memory_mb"]
+
+
+def reset(feeder: Optional[str] = None):
+    """Clears the stage counters and opens the JSON-lines log at the start of a run (Core.run)."""
+    global alimentador_atual
+    alimentador_atual = feeder
+    registros_etapas.clear()
+    metricas_alimentador.clear()
+    metricas_lote.clear()
+    close_log()
+    open_log()
+
+
+def set_feeder(feeder: Optional[str]):
+    """Sets the feeder attached to the next counters and messages."""
+    global alimentador_atual
+    alimentador_atual = feeder
+
+
+def quiet() -> bool:
+    """Returns True when the progress bars and the informative messages are hidden (settings.progressMode)."""
+    if settings.progressMode not in MODOS_PROGRESSO:
+        raise ValueError(f"progressMode inválido: {settings.progressMode}. Opções: {', '.join(MODOS_PROGRESSO)}")
+    return settings.progressMode == "quiet"
+
+
+def open_log():
+    """Returns the JSON-lines log of settings.telemetryLog, opening it only once (None when no log is set)."""
+    global arquivo_log
+    if not settings.telemetryLog:
+        return None
+    if arquivo_log is None or arquivo_log.name != settings.telemetryLog:
+        close_log()
+        arquivo_log = open(settings.telemetryLog, "a", encoding="utf-8", buffering=1) #por linha: o log acompanha a execução
+    return arquivo_log
+
+
+def close_log():
+    """Closes the JSON-lines log at the end of a run (write_batch_metrics and Core.run)."""
+    global arquivo_log
+    if arquivo_log is not None:
+        arquivo_log.close()
+        arquivo_log = None
+
+
+def write_event(event: Dict[str, Any]):
+    """Appends an event to the JSON-lines log (settings.telemetryLog), when one is set."""
+    log = open_log()
+    if log is None:
+        return
+    event = {"time": round(time.time(), 3), "feeder": alimentador_atual, **event}
+    log.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+
+
+def message(text: str, level: str = "info"):
+    """
+    Shows a progress message (replaces print in Case/Utils).
+
+    Args:
+        text (str): Message.
+        level (str): "info" (hidden in quiet mode) or "error" (always shown).
+    """
+    if level == "error" or not quiet():
+        print(text)
+    write_event({"event": "message", "level": level, "text": text.strip()})
+
+
+def record_stage(stage: str, rows: int, elapsed: float) -> Dict[str, Any]:
+    """
+    Records the counter of a stage: rows processed, elapsed time and throughput.
+
+    Args:
+        stage (str): Stage name (e.g. "Line SSDMT").
+        rows (int): Rows processed.
+        elapsed (float): Wall time of the stage (s).
+
+    Returns:
+        Dict[str, Any]: The counter, also kept in registros_etapas and written to the JSON-lines log.
+    """
+    registro = {"stage": stage, "rows": rows, "elapsed": round(elapsed, 6),
+                "rows_per_s": round(rows / elapsed, 1) if elapsed > 0 else None}
+    registros_etapas.append({"feeder": alimentador_atual, **registro})
+    if etapa_atual is not None:
+        etapa_atual["rows"] += rows
+    write_event({"event": "stage", **registro})
+    return registro
+
+
+def progress(iterable: Iterable, total: Optional[int] = None, desc: str = "", unit: str = " it"):
+    """
+    Iterates over the rows of a stage showing a rate-limited progress bar and records the stage counter at the end.
+
+    Args:
+        iterable (Iterable): Rows of the stage (e.g. dataframe.iterrows()).
+        total (Optional[int]): Number of rows.
+        desc (str): Stage name, shown in the bar and used in the counter.
+        unit (str): Unit shown in the bar.
+
+    Yields:
+        The items of the iterable.
+    """
+    inicio = time.perf_counter()
+    linhas = 0
+    barra = tqdm(iterable, total=total, desc=desc, unit=unit, ncols=100, mininterval=INTERVALO_PROGRESSO,
+                 disable=quiet())
+    try:
+        for item in barra:
+            linhas += 1
+            yield item
+    finally:
+        barra.close()
+        record_stage(desc, linhas, time.perf_counter() - inicio)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Measures a stage of the conversion when settings.stageMetrics is set: wall time, CPU time, peak traced memory
+    and rows processed (the rows of the progress() loops run inside the stage, unless the caller sets them).
+
+    Args:
+        name (str): Stage name (e.g. "UCBT").
+
+    Yields:
+        Dict[str, Any]: The metrics of the stage, filled when the stage ends.
+    """
+    global etapa_atual, rastreamento_iniciado
+    if not settings.stageMetrics:
+        yield {}
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        rastreamento_iniciado = True
+    tracemalloc.reset_peak()
+    metricas = {"feeder": alimentador_atual, "stage": name, "rows": 0}
+    etapa_anterior, etapa_atual = etapa_atual, metricas
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield metricas
+    finally:
+        metricas["wall_time"] = round(time.perf_counter() - inicio, 6)
+        metricas["cpu_time"] = round(time.process_time() - inicio_cpu, 6)
+        metricas["peak_memory_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 3)
+        etapa_atual = etapa_anterior
+        (metricas_alimentador if alimentador_atual is not None else metricas_lote).append(metricas)
+
+
+def write_feeder_metrics(feeder: str, bdgd: Optional[str] = None) -> Optional[str]:
+    """
+    Writes the metrics of the stages of a feeder to <settings.stageMetrics>/<feeder>.json.
+
+    Args:
+        feeder (str): Feeder code.
+        bdgd (Optional[str]): BDGD code and year (Utils.get_cod_year_bdgd).
+
+    Returns:
+        Optional[str]: The path of the JSON file, or None when the instrumentation is off.
+    """
+    if not settings.stageMetrics:
+        return None
+    os.makedirs(settings.stageMetrics, exist_ok=True)
+    path = os.path.join(settings.stageMetrics, f"{feeder}.json")
+    total = {coluna: round(sum(etapa[coluna] for etapa in metricas_alimentador), 6)
+             for coluna in ("rows", "wall_time", "cpu_time")}
+    total["peak_memory_mb"] = max((etapa["peak_memory_mb"] for etapa in metricas_alimentador), default=0.0)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"feeder": feeder, "bdgd": bdgd, "stages": metricas_alimentador, "total": total}, file,
+                  ensure_ascii=False, indent=2, default=str)
+    metricas_lote.extend(metricas_alimentador)
+    metricas_alimentador.clear()
+    return path
+
+
+def write_batch_metrics() -> Optional[str]:
+    """
+    Writes the metrics of every stage of the run (all feeders) to <settings.stageMetrics>/etapas.csv and closes
+    the JSON-lines log.
+
+    Returns:
+        Optional[str]: The path of the CSV file, or None when the instrumentation is off.
+    """
+    global rastreamento_iniciado
+    close_log()
+    if not settings.stageMetrics:
+        return None
+    os.makedirs(settings.stageMetrics, exist_ok=True)
+    path = os.path.join(settings.stageMetrics, "etapas.csv")
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=COLUNAS_METRICAS)
+        writer.writeheader()
+        writer.writerows(metricas_lote)
+    if rastreamento_iniciado:
+        tracemalloc.stop()
+        rastreamento_iniciado = False
+    return path
@@ -10,6 +10,8 @@ import networkx as nx
 import geopandas as gpd
 import pandas as pd
 from bdgd2opendss.core.Settings import settings
+from bdgd2opendss.core.OutputSink import OutputSink, create_output_sink
+from bdgd2opendss.core.Telemetry import message
 import logging
 
 cod_year_bdgd = None
@@ -17,12 +19,22 @@ tr_vazios = []
 sufixo_config = ""
 lista_isolados = []
 tensao_dict = {}
+biblioteca = {}
+pastas_saida = {} #pastas de saída já criadas, por (alimentador, pasta de saída, diretório atual)
+BUFFER_SAIDA = 1 << 20 #buffer dos arquivos de saída (bytes)
+BLOCO_SAIDA = 4096 #elementos convertidos em texto e escritos de uma só vez
+PASTA_BIBLIOTECA = "Comum" #pasta dos arquivos compartilhados por todos os alimentadores (settings.sharedLibrary)
+sink_saida = None #destino dos arquivos de saída (settings.outputSink)
 
 
 def log_erros(df_isolados:Optional[pd.DataFrame],feeder:Optional[str],output_directory: Optional[str] = None):
     logger = logging.getLogger(f'elementos_isolados_{get_cod_year_bdgd()[6:]}')
     if not logger.hasHandlers():
-        path = os.path.dirname(create_output_folder(feeder=feeder,output_folder=output_directory))
+        if get_output_sink().kind == "directory":
+            path = os.path.dirname(create_output_folder(feeder=feeder,output_folder=output_directory))
+        else: #o log fica na pasta de saída, ao lado dos arquivos compactados (não cria a pasta do alimentador)
+            path = output_directory if output_directory is not None else os.path.join(os.getcwd(), "dss_models_output")
+            os.makedirs(path, exist_ok=True)
         file_path = os.path.join(path, f'elementos_isolados_{get_cod_year_bdgd()[6:]}.log')
         logging.basicConfig(
             level=logging.INFO,  # Configura o nível mínimo de log (neste caso, INFO)
@@ -39,18 +51,19 @@ def load_json(json_file: str = "bdgd2dss.json"):
     :param json_file: O nome do arquivo JSON (padrão: "bdgd2dss.json").
     :return: Um objeto Python contendo os dados do arquivo JSON.
     """
-    print(f"Carregando o arquivo JSON: {json_file}")
+    message(f"Carregando o arquivo JSON: {json_file}")
     json_path = pathlib.Path(json_file)
 
     try:
         with json_path.open() as jf:
             data = json.load(jf)
     except FileNotFoundError:
-        print(
-            f"Arquivo {json_file} não encontrado. O arquivo deve estar no mesmo diretório do arquivo .py do seu projeto.")
+        message(
+            f"Arquivo {json_file} não encontrado. O arquivo deve estar no mesmo diretório do arquivo .py do seu projeto.",
+            level="error")
         return None
     except json.JSONDecodeError as e:
-        print(f"Erro ao decodificar o arquivo JSON: {e}")
+        message(f"Erro ao decodificar o arquivo JSON: {e}", level="error")
         return None
 
     return data
@@ -138,7 +151,7 @@ def inner_entities_tables(entity1_df, enetity2_df, left_column: str = "", right_
     return merged_dfs
 
 
-def create_output_file(object_list=[], file_name="", object_lists="", file_names="", output_folder="", feeder=""):
+def create_output_file(object_list=[], file_name="", output_folder="", feeder=""):
     """Create an dss_models_output file and write data from a list of objects.
 
     Parameters:
@@ -147,50 +160,89 @@ def create_output_file(object_list=[], file_name="", object_lists="", file_names
 
     Creates an dss_models_output file in the 'dss_models_output' directory and writes OpenDSS commands from the list,
     separated by newline characters. If any error occurs, it will be displayed.
+    The load files (CargasBT/CargasMT) are written by Load.write_output_load_files.
 
     """
-    output_directory = create_output_folder(feeder=feeder,output_folder=output_folder)
+    try:
+        with open_output_file(output_file_name(file_name, feeder), feeder, output_folder) as file:
+            if "GD_" in file_name: #cria curvas padrões do EPRI nos PVsystems
+                if settings.sharedLibrary:
+                    curvas_pv = shared_library_file("CurvasPV", lambda pasta: create_pv_curves_file(pasta, output_folder), output_folder)
+                    file.write(f'Redirect "{curvas_pv}"\n')
+                else:
+                    file.write(standard_curves_pv() + "\n")
+            else:
+                ...
+            write_elements(file, object_list)
 
-    if object_lists != "":
-        if file_name == 'CargasBT_IP':
-            k = 'a' #anexação de arquivo
-            file_name = ""
-        else:
-            k = 'w' #sobre-escrevendo o arquivo
-            file_name = ""
-        for object_list, file_name in zip(object_lists, file_names):
-            path = os.path.join(output_directory, f'{file_name}_{get_cod_year_bdgd()}_{feeder}_{get_configuration()}.dss')
+        message(f'O arquivo {output_file_name(file_name, feeder)[:-4]} foi gerado\n')
+    except Exception as e:
+        message(f"An error occurred: {str(e)}", level="error")
 
-            try:
-                with open(path, k) as file:
-                    for string in object_list:
-                        file.write(string.full_string() + "\n")
+    return output_file_name(file_name, feeder)
 
-                    # print(f'O arquivo {file_name}_{feeder} foi gerado\n')
-            except Exception as e:
-                print(f"An error occurred: {str(e)}")
-        return f'{file_names[0]}_{get_cod_year_bdgd()}_{feeder}_{get_configuration()}.dss'
 
-    else:
-        path = os.path.join(output_directory, f'{file_name}_{get_cod_year_bdgd()}_{feeder}_{get_configuration()}.dss')
+def output_file_name(file_name, feeder):
+    """Returns the name of an output file: <file_name>_<BDGD code and year>_<feeder>_<configuration>.dss"""
+    return f'{file_name}_{get_cod_year_bdgd()}_{feeder}_{get_configuration()}.dss'
 
-        try:
-            with open(path, "w") as file:
-                if "GD_" in file_name: #cria curvas padrões do EPRI nos PVsystems
-                    file.write(standard_curves_pv() + "\n")
-                else:
-                    ...
-                for string in object_list:
-                    if type(string) == str:
-                        file.write(string + "\n")
-                    else:
-                        file.write(string.full_string() + "\n")
 
-            print(f'O arquivo {file_name}_{get_cod_year_bdgd()}_{feeder}_{get_configuration()} foi gerado\n')
-        except Exception as e:
-            print(f"An error occurred: {str(e)}")
+def get_output_sink() -> OutputSink:
+    """Returns the active output sink, creating the one selected in settings.outputSink on the first call."""
+    global sink_saida
+    if sink_saida is None:
+        sink_saida = create_output_sink(settings.outputSink, create_output_folder, BUFFER_SAIDA)
+    return sink_saida
 
-        return f'{file_name}_{get_cod_year_bdgd()}_{feeder}_{get_configuration()}.dss'
+
+def set_output_sink(sink: Optional[OutputSink] = None) -> OutputSink:
+    """
+    Replaces the output sink (e.g. at the start of run). Without arguments, creates the one selected in settings.outputSink.
+
+    The shared files already written belong to the previous sink, so they are forgotten (reset_shared_library).
+
+    Returns:
+        OutputSink: The new active sink.
+    """
+    global sink_saida
+    sink_saida = sink
+    reset_shared_library()
+    return get_output_sink()
+
+
+def open_output_file(file_name, feeder, output_folder=None, mode="w", newline=None, encoding=None):
+    """
+    Opens an output file of the feeder in the active sink (folder tree, memory or archive).
+
+    Parameters:
+    - file_name (str): Name of the file, relative to the feeder folder.
+    - feeder (str): Feeder code.
+    - output_folder (str): Base output folder.
+    - mode (str): "w", "a", "wb" or "ab".
+    - newline (str): Newline translation of text files (use "" for csv written by pandas).
+    - encoding (str): Encoding of text files.
+    """
+    return get_output_sink().open(feeder, output_folder, file_name, mode, newline, encoding)
+
+
+def output_file_location(file_name, feeder, output_folder=None):
+    """Returns where an output file is written in the active sink (used in the messages)."""
+    return get_output_sink().location(feeder, output_folder, file_name)
+
+
+def write_elements(file, object_list):
+    """
+    Writes one line per element (string or object with full_string) in blocks of BLOCO_SAIDA elements,
+    joining each block into a single write.
+    """
+    bloco = []
+    for string in object_list:
+        bloco.append(string if type(string) == str else string.full_string())
+        if len(bloco) == BLOCO_SAIDA:
+            file.write("\n".join(bloco) + "\n")
+            bloco.clear()
+    if bloco:
+        file.write("\n".join(bloco) + "\n")
 
 
 def create_master_file(file_name="", feeder="", master_content="", output_folder=""):
@@ -202,16 +254,14 @@ def create_master_file(file_name="", feeder="", master_content="", output_folder
     separated by newline characters. If any error occurs, it will be displayed.
 
     """
-    output_directory = create_output_folder(feeder=feeder,output_folder=output_folder)
-
-    path = os.path.join(output_directory, f'{file_name}_{get_cod_year_bdgd()}_{feeder}_{get_configuration()}.dss')
+    path = output_file_location(output_file_name(file_name, feeder), feeder, output_folder)
 
     try:
-        with open(path, "w") as file:
+        with open_output_file(output_file_name(file_name, feeder), feeder, output_folder) as file:
             file.write(master_content + "\n")
-        print(f'O arquivo {file_name}_{get_cod_year_bdgd()}_{feeder}_{get_configuration()} foi gerado em ({path})\n')
+        message(f'O arquivo {output_file_name(file_name, feeder)[:-4]} foi gerado em ({path})\n')
     except Exception as e:
-        print(f"An error occurred: {str(e)}")
+        message(f"An error occurred: {str(e)}", level="error")
 
 
 def create_output_feeder_coords(df: pd.DataFrame, feeder="", filename="buscoords", output_folder=""):
@@ -224,16 +274,15 @@ def create_output_feeder_coords(df: pd.DataFrame, feeder="", filename="buscoords
         separado por caracteres newline. Se ocorrer algum erro, ele será exibido.
 
     """
-    output_directory = create_output_folder(feeder=feeder,output_folder=output_folder)
-    dir_path = os.path.join(output_directory, f'{filename}.csv')
     # dir_path = os.path.join(output_directory, f'{filename}_{feeder}.csv')
 
     try:
-        df.to_csv(dir_path, index=False)
-        print(f"Arquivo {filename}.csv criado")
+        with open_output_file(f'{filename}.csv', feeder, output_folder, newline="", encoding="utf-8") as file:
+            df.to_csv(file, index=False)
+        message(f"Arquivo {filename}.csv criado")
         # print(f'O arquivo {file_name}_{feeder} foi gerado\n')
     except Exception as e:
-        print(f"Erro ao criar .csv da df de coordenadas: {str(e)}")
+        message(f"Erro ao criar .csv da df de coordenadas: {str(e)}", level="error")
 
 
 def create_output_all_coords(object_list=[], file_name="", object_lists="", file_names="", feeder=""):
@@ -266,7 +315,7 @@ def create_output_all_coords(object_list=[], file_name="", object_lists="", file
                         file.write(string.full_string() + "\n")
                 # print(f'O arquivo {file_name}_{feeder} foi gerado\n')
             except Exception as e:
-                print(f"An error occurred: {str(e)}")
+                message(f"An error occurred: {str(e)}", level="error")
 
         return f'{file_names[0]}_{feeder}.dss'
 
@@ -281,9 +330,9 @@ def create_output_all_coords(object_list=[], file_name="", object_lists="", file
                     else:
                         file.write(string.full_string() + "\n")
 
-            print(f'O arquivo {file_name}_{feeder} foi gerado\n')
+            message(f'O arquivo {file_name}_{feeder} foi gerado\n')
         except Exception as e:
-            print(f"An error occurred: {str(e)}")
+            message(f"An error occurred: {str(e)}", level="error")
 
         return f'{file_name}_{feeder}.dss'
 
@@ -291,7 +340,7 @@ def create_output_all_coords(object_list=[], file_name="", object_lists="", file
 def create_dfs_coords(filename="", feeder=""):
     """Purpose: filename
     """
-    print("criando coordenadas...")
+    message("criando coordenadas...")
 
     cols = [
         "COD_ID",
@@ -343,6 +392,40 @@ def standard_curves_pv():
                f'~ temp=[25, 25, 25, 25, 25, 25, 25, 25, 35, 40, 45, 50, 60, 60, 55, 40, 35, 30, 25, 25, 25, 25, 25, 25] \n'
                )
 
+def create_pv_curves_file(feeder="", output_folder=""): #escreve as curvas padrões dos PVsystems em um arquivo próprio
+    file_name = output_file_name('CurvasPV', feeder)
+    with open_output_file(file_name, feeder, output_folder) as file:
+        file.write(standard_curves_pv())
+    return file_name
+
+def shared_library_file(name, create, output_folder=""):
+    """
+    Returns the path, relative to the feeder folders, of a file shared by all the feeders of the BDGD.
+
+    The file is created only on the first call for the BDGD and configuration (see reset_shared_library): `create`
+    receives the name of the shared folder (used as the feeder of the output functions) and returns the name of the
+    file written, or the (objects, file name) pair of the create_*_from_json functions.
+
+    Parameters:
+    - name (str): Key of the shared file (ex: CodCondutor, CurvaCarga).
+    - create (callable): Function that writes the file in the shared folder.
+    - output_folder (str): Base output folder.
+
+    Returns:
+    - str: Path of the file, or (objects, path) when `create` returns a pair.
+    """
+    key = (get_cod_year_bdgd(), get_configuration(), settings.loadshapeFormat, settings.dedupMRTLinecodes,
+           str(output_folder), name)
+    if key not in biblioteca:
+        biblioteca[key] = create(PASTA_BIBLIOTECA)
+    if isinstance(biblioteca[key], tuple):
+        objetos, file_name = biblioteca[key]
+        return objetos, f'../{PASTA_BIBLIOTECA}/{file_name}'
+    return f'../{PASTA_BIBLIOTECA}/{biblioteca[key]}'
+
+def reset_shared_library(): #esquece os arquivos compartilhados já escritos (início de cada run)
+    biblioteca.clear()
+
 def check_duplicate_loads_names(df_load, consumer_type: str = ""):
     if consumer_type == 'BT':
         column = 'RAMAL'
@@ -403,6 +486,14 @@ def adequar_modelo_carga(int_model):#settings (Adequar modelo de carga)
     else:
         return(3,3)
 
+def zipv_modelo_carga(models): #coeficientes ZIPV (model=8) equivalentes às duas metades _M1/_M2 da carga
+    # modelos do OpenDSS: 1 - potência constante, 2 - impedância constante, 3 - P constante e Q quadrático
+    zip_p = {1: (0, 0, 1), 2: (1, 0, 0), 3: (0, 0, 1)}
+    zip_q = {1: (0, 0, 1), 2: (1, 0, 0), 3: (1, 0, 0)}
+    coeficientes = [sum(zip_p[model][k] for model in models) / len(models) for k in range(3)] + \
+                   [sum(zip_q[model][k] for model in models) / len(models) for k in range(3)] + [0]
+    return "[" + " ".join(f'{c:g}' for c in coeficientes) + "]"
+
 def create_df_trafos_vazios(df_ucbt: Optional[pd.DataFrame] = None,df_ip: Optional[pd.DataFrame] = None,df_tr: Optional[pd.DataFrame] = None):
     global tr_vazios
     if df_ucbt is not None or df_ip is not None:
@@ -502,96 +593,105 @@ def perdas_trafos_abnt(fases,kv,pot,perda):
 
 def get_configuration(feeder:Optional[str]=None,output_folder:Optional[str]=None):
     global sufixo_config
-    df_config = pd.DataFrame(columns=["Configuração", "Descrição"])
+    linhas_config = []
     count = 0
     if settings.intRealizaCnvrgcPNT:
         sufixo_config = "N"
-        df_config.loc[count] = ['intRealizaCnvrgcPNT','Convergência de Perda Não Técnica']
+        linhas_config.append(['intRealizaCnvrgcPNT','Convergência de Perda Não Técnica'])
         count += 1
     else:
         sufixo_config = "-"
     if settings.intUsaTrafoABNT:
         sufixo_config = sufixo_config + "T"
-        df_config.loc[count] = ['intUsaTrafoABNT','Perdas nos Transformadores de acordo ABNT']
+        linhas_config.append(['intUsaTrafoABNT','Perdas nos Transformadores de acordo ABNT'])
         count += 1
     else:
         sufixo_config = sufixo_config + "-"
     if settings.intAdequarTensaoCargasMT:
         sufixo_config = sufixo_config + "M"
         settings.intAdequarModeloCarga
-        df_config.loc[count] = ['intAdequarTensaoCargasMT','Adequação de Tensão Mínima das Cargas MT (0.93 pu)']
+        linhas_config.append(['intAdequarTensaoCargasMT','Adequação de Tensão Mínima das Cargas MT (0.93 pu)'])
         count += 1
     else:
         sufixo_config = sufixo_config + "-"
     if settings.intAdequarTensaoCargasBT:
         sufixo_config = sufixo_config + "B"
-        df_config.loc[count] = ['intAdequarTensaoCargasBT','Adequação de Tensão Mínima das Cargas BT (0.92 pu)']
+        linhas_config.append(['intAdequarTensaoCargasBT','Adequação de Tensão Mínima das Cargas BT (0.92 pu)'])
         count += 1
     else:
         sufixo_config = sufixo_config + "-"
     if settings.intAdequarTensaoSuperior:
         sufixo_config = sufixo_config + "S"
-        df_config.loc[count] = ['intAdequarTensaoSuperior','Limitar Máxima Tensão de Barras e Reguladores (1.05 pu)']
+        linhas_config.append(['intAdequarTensaoSuperior','Limitar Máxima Tensão de Barras e Reguladores (1.05 pu)'])
         count += 1
     else:
         sufixo_config = sufixo_config + "-"
     if settings.intAdequarRamal:
         sufixo_config = sufixo_config + "R"
-        df_config.loc[count] = ['intAdequarRamal','Limitar o Ramal (30m)']
+        linhas_config.append(['intAdequarRamal','Limitar o Ramal (30m)'])
         count += 1
     else:
         sufixo_config = sufixo_config + "-"
     if settings.intAdequarModeloCarga == 1:
         sufixo_config = sufixo_config + "1"
-        df_config.loc[count] = ['intAdequarModeloCarga = 1','Adequa modelo das cargas(model=2/model=3)']
+        linhas_config.append(['intAdequarModeloCarga = 1','Adequa modelo das cargas(model=2/model=3)'])
         count += 1
     elif settings.intAdequarModeloCarga == 2:
         sufixo_config = sufixo_config + "2"
-        df_config.loc[count] = ['intAdequarModeloCarga = 2','Adequa modelo das cargas(model=1/model=1)']
+        linhas_config.append(['intAdequarModeloCarga = 2','Adequa modelo das cargas(model=1/model=1)'])
         count += 1
     else:
         sufixo_config = sufixo_config + "3"
-        df_config.loc[count] = ['intAdequarModeloCarga = 3','Adequa modelo das cargas(model=3/model=3)']
+        linhas_config.append(['intAdequarModeloCarga = 3','Adequa modelo das cargas(model=3/model=3)'])
         count += 1
     if settings.intAdequarPotenciaCarga:
         sufixo_config = sufixo_config + "P"
-        df_config.loc[count] = ['intAdequarPotenciaCarga', "Limitar Cargas BT (Potência ativa do transformador)"]
+        linhas_config.append(['intAdequarPotenciaCarga', "Limitar Cargas BT (Potência ativa do transformador)"])
         count += 1
     else:
         sufixo_config = sufixo_config + "-"
     if settings.intAdequarTrafoVazio:
         sufixo_config = sufixo_config + "V"
-        df_config.loc[count] = ['intAdequarTrafoVazio', "Eliminar Transformadores Vazios"]
+        linhas_config.append(['intAdequarTrafoVazio', "Eliminar Transformadores Vazios"])
         count += 1
     else:
         sufixo_config = sufixo_config + "-"
     if settings.intAdequarTapTrafo:
         sufixo_config = sufixo_config + "T"
-        df_config.loc[count] = ['intAdequarTapTrafo', "Utilizar Tap nos Transformadores"]
+        linhas_config.append(['intAdequarTapTrafo', "Utilizar Tap nos Transformadores"])
         count += 1
     else:
         sufixo_config = sufixo_config + "-"
     if settings.intNeutralizarTrafoTerceiros:
         sufixo_config = sufixo_config + "T"
-        df_config.loc[count] = ['intNeutralizarTrafoTerceiros', "Neutralizar Transformadores de Terceiros"]
+        linhas_config.append(['intNeutralizarTrafoTerceiros', "Neutralizar Transformadores de Terceiros"])
         count += 1
     else:
         sufixo_config = sufixo_config + "-"
     if settings.intNeutralizarRedeTerceiros:
         sufixo_config = sufixo_config + "R"
-        df_config.loc[count] = ['intNeutralizarRedeTerceiros', "Neutralizar Redes de Terceiros (MT/BT)"]
+        linhas_config.append(['intNeutralizarRedeTerceiros', "Neutralizar Redes de Terceiros (MT/BT)"])
         count += 1
     else:
         sufixo_config = sufixo_config + "-"
-    df_config.loc[count] = ['dblVPUMin', f"Tensão mínima(pu)={settings.dblVPUMin}"]
+    linhas_config.append(['dblVPUMin', f"Tensão mínima(pu)={settings.dblVPUMin}"])
     if feeder is not None:
-        output_directory = create_output_folder(feeder,output_folder)
-        dir_path = os.path.join(output_directory, r'configurações.csv')
-        df_config.to_csv(dir_path,index=False)
+        with open_output_file('configurações.csv', feeder, output_folder, newline="", encoding="utf-8") as file:
+            pd.DataFrame(linhas_config, columns=["Configuração", "Descrição"]).to_csv(file,index=False)
     else:
         return(sufixo_config)
 
 def create_output_folder(feeder, output_folder:Optional[str] = None):
+    """Returns the output folder of the feeder, creating it only on the first call (see reset_output_folders)."""
+    key = (feeder, output_folder, os.getcwd())
+    if key not in pastas_saida:
+        pastas_saida[key] = _create_output_folder(feeder, output_folder)
+    return pastas_saida[key]
+
+def reset_output_folders(): #esquece as pastas de saída já criadas (início de cada alimentador)
+    pastas_saida.clear()
+
+def _create_output_folder(feeder, output_folder:Optional[str] = None):
     if sys.platform == 'linux': #caso o usuário esteja usando por meio do sistema operacional Linux
         if output_folder is not None:
             try:
@@ -606,7 +706,7 @@ def create_output_folder(feeder, output_folder:Optional[str] = None):
 
                 if not os.path.exists(f'dss_models_output/{feeder}'):
                     os.mkdir(f'dss_models_output/{feeder}')
-                    print(f'Caminho para criação de pasta inválido. O arquivo DSS será criado em: dss_models_output/{feeder}')
+                    message(f'Caminho para criação de pasta inválido. O arquivo DSS será criado em: dss_models_output/{feeder}', level="error")
                 output_directory = os.path.join(os.getcwd(), f'dss_models_output/{feeder}')
         else:
             if not os.path.exists("dss_models_output"):
@@ -630,7 +730,7 @@ def create_output_folder(feeder, output_folder:Optional[str] = None):
 
                 if not os.path.exists(f'dss_models_output/{feeder}'):
                     os.mkdir(f'dss_models_output/{feeder}')
-                    print(f'Caminho para criação de pasta inválido. O arquivo DSS será criado em: dss_models_output/{feeder}')
+                    message(f'Caminho para criação de pasta inválido. O arquivo DSS será criado em: dss_models_output/{feeder}', level="error")
                 output_directory = os.path.join(os.getcwd(), f'dss_models_output\{feeder}')
         else:
             if not os.path.exists("dss_models_output"):
@@ -685,7 +785,7 @@ def ordem_pacs(df_aux_tramo:Optional[pd.DataFrame] = None, pac_ctmt: Optional[st
             seq = 'Direta'
         else:
             seq = 'Invertida'
-            return(print('PACs invertidos!!'))
+            return(message('PACs invertidos!!'))
     else:
         return(seq)
 
@@ -747,7 +847,7 @@ def elem_isolados(dataframe: Optional[gpd.geodataframe.GeoDataFrame] = None, fee
             else:
                 continue
         if df_not_connected.empty:
-            return(print('Não existem elementos isolados!'))
+            return(message('Não existem elementos isolados!'))
         else:
             log_erros(df_not_connected,alimentador,output_folder)
             lista_isolados = []
@@ -773,7 +873,7 @@ def elem_isolados(dataframe: Optional[gpd.geodataframe.GeoDataFrame] = None, fee
                     lista_isolados.append(f'REG_{cod_id}')
                 else:
                     lista_isolados.append(cod_id)
-        return(print('Lista de elementos isolados criados!'))
+        return(message('Lista de elementos isolados criados!'))
     else:
         return(lista_isolados)
 
@@ -841,7 +941,10 @@ def seq_eletrica(dataframe: Optional[gpd.geodataframe.GeoDataFrame] = None, feed
                     tensao_dict[seq[1]] = kv
                 else:
                     tensao_dict[seq[1]] = kv
-        return(print('Sequência elétrica na média tensão realizada!'))
+        return(message('Sequência elétrica na média tensão realizada!'))
+
+def dict_tensoes(): #retorna as tensões de primário dos nós de MT definidas em seq_eletrica
+    return(tensao_dict)
 
 # def pvsystem_stats(dfs,output_folder):
 #     colunas = ['CTMT','POT_PV_TOTAL_INSTALADA','POT_OUTRAS_TOTAL_INSTALADA']
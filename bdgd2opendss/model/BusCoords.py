@@ -1,39 +1,356 @@
 # -*- encoding: utf-8 -*-
 
+import pathlib
+from dataclasses import dataclass
+
+import geopandas as gpd
 import numpy as np
 import pandas as pd
-import shapely.geometry
+import pyogrio
+import pyproj
+import shapely
+from pyproj.aoi import AreaOfInterest
+from pyproj.database import query_utm_crs_info
+
+from bdgd2opendss.core.Settings import settings
+from bdgd2opendss.core.Telemetry import message
+
+COLUNAS_COORDS = ["COD_ID", "PAC_1", "PAC_2", "CTMT"]
+_coords_bdgd = {} #camadas de coordenadas já lidas, por BDGD
+
+#camadas cujos elementos têm PAC fora dos segmentos, em ordem de prioridade da localização
+CAMADAS_PAC = {"UNTRMT": ["PAC_1", "PAC_2", "PAC_3"], "UNREMT": ["PAC_1", "PAC_2"], "UNSEMT": ["PAC_1", "PAC_2"],
+               "UNSEBT": ["PAC_1", "PAC_2"], "RAMLIG": ["PAC_1", "PAC_2"], "UCMT_tab": ["PAC"], "UCMT": ["PAC"],
+               "UCBT_tab": ["PAC"], "UCBT": ["PAC"], "PIP": ["PAC"], "UGMT_tab": ["PAC"], "UGMT": ["PAC"],
+               "UGBT_tab": ["PAC"], "UGBT": ["PAC"]}
+
+LINHAS = [shapely.GeometryType.LINESTRING, shapely.GeometryType.LINEARRING, shapely.GeometryType.MULTILINESTRING]
+
+
+def _vertices(geo_df):
+    """Returns the geo_df row and the (x, y) of every vertex of its LineString/MultiLineString geometries, in order."""
+    geometrias = np.asarray(geo_df.geometry.array, dtype=object)
+    linhas = np.flatnonzero(np.isin(shapely.get_type_id(geometrias), LINHAS)) #LineString, LinearRing e MultiLineString
+    partes, indice_linha = shapely.get_parts(geometrias[linhas], return_index=True)
+    coords, indice_parte = shapely.get_coordinates(partes, return_index=True)
+    return linhas[indice_linha[indice_parte]], coords
 
 
 def extract_shx(geo_df):
-    lats = []
-    lons = []
-    names = []
-    pac1 = []
-    pac2 = []
-
-    for feature, COD_ID, PAC_1, PAC_2 in zip(geo_df.geometry, geo_df.COD_ID, geo_df.PAC_1, geo_df.PAC_2):
-        if isinstance(feature, shapely.geometry.linestring.LineString):
-            linestrings = [feature]
-        elif isinstance(feature, shapely.geometry.multilinestring.MultiLineString):
-            linestrings = feature.geoms
-        else:
+    """
+    Extracts the vertices of the LineString/MultiLineString segments, in order, with the COD_ID, PAC_1 and PAC_2 of
+    each segment.
+
+    The vertices are read in bulk with shapely (get_parts/get_coordinates), so the cost is linear in the number of
+    vertices. Other geometry types are skipped and rows with missing values are dropped.
+
+    Args:
+        geo_df (gpd.GeoDataFrame): SSDMT or SSDBT segments with the columns COD_ID, PAC_1 and PAC_2.
+
+    Returns:
+        pd.DataFrame: One row per vertex with the columns COD_ID, pac1, pac2, lat and long.
+    """
+    origem, coords = _vertices(geo_df)
+    df = pd.DataFrame({'COD_ID': geo_df.COD_ID.to_numpy()[origem],
+                       'pac1': geo_df.PAC_1.to_numpy()[origem],
+                       'pac2': geo_df.PAC_2.to_numpy()[origem],
+                       'lat': coords[:, 1],
+                       'long': coords[:, 0]})
+    return df.dropna().reset_index(drop=True)
+
+
+@dataclass
+class CoordLayer:
+    """
+    Segments and vertices of a whole SSDMT/SSDBT layer, split by feeder (CTMT).
+
+    Attributes:
+        segmentos (dict): CTMT -> segments of the feeder (COD_ID, PAC_1, PAC_2), in the BDGD order.
+        vertices (dict): CTMT -> vertices of the feeder, as returned by extract_shx for its segments.
+    """
+    segmentos: dict
+    vertices: dict
+
+    def feeder(self, feeder):
+        """Returns the segments and the vertices of a feeder (empty DataFrames when it has none)."""
+        segmentos = self.segmentos.get(feeder, pd.DataFrame(columns=['COD_ID', 'PAC_1', 'PAC_2']))
+        vertices = self.vertices.get(feeder, pd.DataFrame(columns=['COD_ID', 'pac1', 'pac2', 'lat', 'long']))
+        return segmentos, vertices
+
+
+def create_coord_layer(geo_df, origem=None, coords=None):
+    """
+    Splits the segments and the vertices of a whole layer by CTMT.
+
+    Args:
+        geo_df (gpd.GeoDataFrame): Whole SSDMT or SSDBT layer with the columns COD_ID, PAC_1, PAC_2 and CTMT.
+        origem (np.ndarray): Row of each vertex (_vertices), extracted here when not given.
+        coords (np.ndarray): (vertices x 2) coordinates, already reprojected or not.
+
+    Returns:
+        CoordLayer: The segments and vertices of each feeder.
+    """
+    if origem is None:
+        origem, coords = _vertices(geo_df)
+    vertices = pd.DataFrame({'COD_ID': geo_df.COD_ID.to_numpy()[origem],
+                             'pac1': geo_df.PAC_1.to_numpy()[origem],
+                             'pac2': geo_df.PAC_2.to_numpy()[origem],
+                             'lat': coords[:, 1],
+                             'long': coords[:, 0],
+                             'CTMT': geo_df.CTMT.to_numpy()[origem]})
+    vertices = vertices.dropna(subset=['COD_ID', 'pac1', 'pac2', 'lat', 'long'])
+    segmentos = pd.DataFrame(geo_df[['COD_ID', 'PAC_1', 'PAC_2', 'CTMT']])
+
+    return CoordLayer(
+        {ctmt: df.drop(columns='CTMT').reset_index(drop=True) for ctmt, df in segmentos.groupby('CTMT', sort=False)},
+        {ctmt: df.drop(columns='CTMT').reset_index(drop=True) for ctmt, df in vertices.groupby('CTMT', sort=False)})
+
+
+def target_crs(crs, origem, coords):
+    """
+    Returns the CRS of buscoords.csv chosen in settings.coordCRS.
+
+    Args:
+        crs (str): "UTM" or any CRS accepted by pyproj (e.g. EPSG:31983).
+        origem (pyproj.CRS): CRS of the BDGD layers.
+        coords (np.ndarray): (vertices x 2) coordinates of the BDGD, used to infer the UTM zone.
+
+    Returns:
+        pyproj.CRS: The UTM zone of the median point of the data (same geodetic CRS as the BDGD, when available) or the given CRS.
+    """
+    if crs.upper() != "UTM":
+        return pyproj.CRS.from_user_input(crs)
+    x, y = np.nanmedian(coords[:, 0]), np.nanmedian(coords[:, 1])
+    if not origem.is_geographic:
+        x, y = pyproj.Transformer.from_crs(origem, origem.geodetic_crs, always_xy=True).transform(x, y)
+    area = AreaOfInterest(west_lon_degree=x, south_lat_degree=y, east_lon_degree=x, north_lat_degree=y)
+    zonas = query_utm_crs_info(datum_name=origem.geodetic_crs.name, area_of_interest=area) or \
+        query_utm_crs_info(datum_name="WGS 84", area_of_interest=area)
+    return pyproj.CRS.from_epsg(zonas[0].code)
+
+
+def reproject_coords(coords, origem, crs):
+    """
+    Reprojects all the coordinates of the BDGD in a single call (rounded to millimeters in projected CRSs).
+
+    Args:
+        coords (np.ndarray): (vertices x 2) x/y coordinates.
+        origem (pyproj.CRS): CRS of the BDGD layers.
+        crs (str): settings.coordCRS.
+
+    Returns:
+        np.ndarray: (vertices x 2) coordinates in the target CRS.
+    """
+    destino = target_crs(crs, origem, coords)
+    message(f"Reprojetando coordenadas para {destino.name}")
+    x, y = pyproj.Transformer.from_crs(origem, destino, always_xy=True).transform(coords[:, 0], coords[:, 1])
+    reprojetadas = np.column_stack([x, y])
+    return reprojetadas.round(3) if destino.is_projected else reprojetadas
+
+
+def read_point_sources(filename, segmentos):
+    """
+    Reads the location of the PACs of the elements that are not segments (transformers, switches, regulators,
+    consumers, generators and service drops), from the layers of the BDGD that have geometry.
+
+    Points are assigned to all the PACs of their element; with settings.orphanCoords="snap" they are moved to the
+    nearest point of the nearest segment of the same feeder (STRtree, in bulk). Service drops (RAMLIG) with geometry
+    give their first vertex to PAC_1 and their last vertex to PAC_2.
+
+    Args:
+        filename (str): Path of the BDGD (GDB/GPKG).
+        segmentos (gpd.GeoDataFrame): SSDMT and SSDBT segments (CTMT and geometry) of the whole BDGD.
+
+    Returns:
+        pd.DataFrame: PAC, x, y and CTMT of every PAC found, in the priority order of CAMADAS_PAC.
+    """
+    tipos = {nome: tipo for nome, tipo in pyogrio.list_layers(filename)}
+    partes = []
+    for layer, colunas in CAMADAS_PAC.items():
+        if tipos.get(layer) is None:
+            continue
+        campos = set(pyogrio.read_info(filename, layer=layer)['fields'])
+        colunas = [coluna for coluna in colunas if coluna in campos]
+        if not colunas or 'CTMT' not in campos:
+            continue
+        gdf = gpd.read_file(pathlib.Path(filename), layer=layer, columns=colunas + ['CTMT'], ignore_geometry=False,
+                            engine='pyogrio', use_arrow=True)
+        geometrias = np.asarray(gdf.geometry.array, dtype=object)
+        if 'LineString' in tipos[layer]: #ramais de ligação: primeiro e último vértices
+            origem, coords = _vertices(gdf)
+            _, primeiro = np.unique(origem, return_index=True)
+            _, ultimo = np.unique(origem[::-1], return_index=True)
+            extremos = {'PAC_1': primeiro, 'PAC_2': len(origem) - 1 - ultimo}
+            for coluna in colunas:
+                if coluna in extremos:
+                    linhas = origem[extremos[coluna]]
+                    partes.append(pd.DataFrame({'PAC': gdf[coluna].to_numpy()[linhas], 'x': coords[extremos[coluna], 0],
+                                                'y': coords[extremos[coluna], 1], 'CTMT': gdf.CTMT.to_numpy()[linhas],
+                                                'ponto': False}))
             continue
-        for linestring in linestrings:
-            x, y = linestring.xy
-            lats = np.append(lats, y)
-            lons = np.append(lons, x)
-            names = np.append(names, [COD_ID] * len(y))
-            pac1 = np.append(pac1, [PAC_1] * len(y))
-            pac2 = np.append(pac2, [PAC_2] * len(y))
-            lats = np.append(lats, None)
-            lons = np.append(lons, None)
-            names = np.append(names, None)
-            pac1 = np.append(pac1, None)
-            pac2 = np.append(pac2, None)
-        df = pd.DataFrame(list(zip(names, pac1, pac2, lats, lons))).rename(
-            columns={0: 'COD_ID', 1: 'pac1', 2: 'pac2', 3: 'lat', 4: 'long'}).dropna().reset_index(drop=True)
-    return df
+        pontos = shapely.centroid(geometrias)
+        for coluna in colunas:
+            partes.append(pd.DataFrame({'PAC': gdf[coluna].to_numpy(), 'x': shapely.get_x(pontos), 'y': shapely.get_y(pontos),
+                                        'CTMT': gdf.CTMT.to_numpy(), 'ponto': True}))
+    if not partes:
+        return pd.DataFrame(columns=['PAC', 'x', 'y', 'CTMT'])
+    fontes = pd.concat(partes, ignore_index=True).dropna(subset=['PAC', 'x', 'y'])
+
+    linhas = np.asarray(segmentos.geometry.array, dtype=object)
+    validas = ~shapely.is_missing(linhas) & ~shapely.is_empty(linhas)
+    if settings.orphanCoords == "snap" and validas.any():
+        linhas, ctmt_linhas = linhas[validas], segmentos.CTMT.to_numpy()[validas]
+        mover = fontes['ponto'].to_numpy()
+        pontos = shapely.points(fontes['x'].to_numpy()[mover], fontes['y'].to_numpy()[mover])
+        proxima = shapely.STRtree(linhas).nearest(pontos)
+        projetados = shapely.get_point(shapely.shortest_line(linhas[proxima], pontos), 0)
+        mesmo_ctmt = ctmt_linhas[proxima] == fontes['CTMT'].to_numpy()[mover] #não move para a rede de outro alimentador
+        indices = np.flatnonzero(mover)[mesmo_ctmt]
+        fontes.iloc[indices, fontes.columns.get_loc('x')] = shapely.get_x(projetados[mesmo_ctmt])
+        fontes.iloc[indices, fontes.columns.get_loc('y')] = shapely.get_y(projetados[mesmo_ctmt])
+    return fontes[['PAC', 'x', 'y', 'CTMT']].reset_index(drop=True)
+
+
+def get_bdgd_coords(filename):
+    """
+    Returns the SSDMT and SSDBT coordinate layers of the BDGD, reading their geometries only on the first call.
+
+    When settings.orphanCoords is set, the located PACs of the other elements (read_point_sources) are kept in
+    "PONTOS", by CTMT. When settings.coordCRS is set, all the coordinates are reprojected together (reproject_coords).
+
+    Args:
+        filename (str): Path of the BDGD (GDB/GPKG).
+
+    Returns:
+        dict: {"SSDMT": CoordLayer, "SSDBT": CoordLayer, "PONTOS": {CTMT: pd.DataFrame (PAC, long, lat)}}.
+    """
+    key = (str(filename), settings.coordCRS, settings.orphanCoords)
+    if key not in _coords_bdgd:
+        message("criando coordenadas...")
+        camadas = {layer: gpd.read_file(pathlib.Path(filename), layer=layer, columns=COLUNAS_COORDS,
+                                        ignore_geometry=False, engine='pyogrio', use_arrow=True)
+                   for layer in ('SSDMT', 'SSDBT')}
+        vertices = {layer: _vertices(gdf) for layer, gdf in camadas.items()}
+        fontes = pd.DataFrame(columns=['PAC', 'x', 'y', 'CTMT'])
+        if settings.orphanCoords:
+            fontes = read_point_sources(filename, pd.concat([gdf[['CTMT', 'geometry']] for gdf in camadas.values()]))
+        pontos = fontes[['x', 'y']].to_numpy(dtype=float).reshape(-1, 2)
+
+        origem = camadas['SSDMT'].crs or camadas['SSDBT'].crs
+        if settings.coordCRS and origem is None:
+            message("A BDGD não informa o sistema de coordenadas (CRS). As coordenadas não serão reprojetadas.")
+        elif settings.coordCRS:
+            todas = reproject_coords(np.concatenate([coords for _, coords in vertices.values()] + [pontos]), origem, settings.coordCRS)
+            inicio = 0
+            for layer, (linhas, coords) in vertices.items():
+                vertices[layer] = (linhas, todas[inicio:inicio + len(coords)])
+                inicio += len(coords)
+            pontos = todas[inicio:]
+
+        _coords_bdgd[key] = {layer: create_coord_layer(gdf, *vertices[layer]) for layer, gdf in camadas.items()}
+        pontos = pd.DataFrame({'PAC': fontes['PAC'].to_numpy(), 'long': pontos[:, 0], 'lat': pontos[:, 1], 'CTMT': fontes['CTMT'].to_numpy()})
+        _coords_bdgd[key]['PONTOS'] = {ctmt: df.drop(columns='CTMT').reset_index(drop=True)
+                                       for ctmt, df in pontos.groupby('CTMT', sort=False)}
+    return _coords_bdgd[key]
+
+
+def reset_bdgd_coords(): #esquece as coordenadas já lidas (fim de cada run, ver Core.reset_caches)
+    _coords_bdgd.clear()
+
+
+def orphan_coords(buscoords, pontos, tabelas):
+    """
+    Finds coordinates for the PACs of the feeder elements that are not segment ends.
+
+    A PAC takes, in this order, its own location (pontos) or the coordinates of a PAC connected to it by an element
+    (service drop, switch, regulator or transformer), propagated until no other PAC can be located.
+
+    Args:
+        buscoords (pd.DataFrame): Bus coordinates (PAC, long, lat) of the segments.
+        pontos (pd.DataFrame): PAC, long and lat of the points of the feeder (read_point_sources), by priority.
+        tabelas (list): DataFrames with the PAC columns of each element table of the feeder (CAMADAS_PAC).
+
+    Returns:
+        pd.DataFrame: PAC, long and lat of the PACs located, in the order they appear in the tables.
+    """
+    nos = []
+    arestas = []
+    for df in tabelas:
+        colunas = [df[coluna].astype(object).to_numpy() for coluna in df.columns]
+        nos.extend(colunas)
+        for i, a in enumerate(colunas): #elementos com mais de um PAC ligam os seus PACs entre si
+            for b in colunas[:i] + colunas[i + 1:]:
+                arestas.append(pd.DataFrame({'a': a, 'b': b}))
+    if not nos:
+        return pd.DataFrame(columns=['PAC', 'long', 'lat'])
+    nos = pd.Series(np.concatenate(nos)).dropna().drop_duplicates()
+
+    conhecidas = buscoords.dropna(subset=['PAC', 'long', 'lat']).drop_duplicates('PAC', keep='last').set_index('PAC')[['long', 'lat']]
+    orfaos = nos[~nos.isin(conhecidas.index)]
+    proprias = pontos.drop_duplicates('PAC').set_index('PAC')[['long', 'lat']]
+    encontradas = proprias.loc[orfaos[orfaos.isin(proprias.index)]]
+
+    arestas = pd.concat(arestas, ignore_index=True).dropna() if arestas else pd.DataFrame(columns=['a', 'b'])
+    localizadas = pd.concat([conhecidas, encontradas])
+    while True: #propaga as coordenadas pelos elementos até não localizar mais nenhum PAC
+        candidatas = arestas[~arestas['a'].isin(localizadas.index) & arestas['b'].isin(localizadas.index)]
+        if candidatas.empty:
+            break
+        vizinhas = candidatas.drop_duplicates('a')
+        novas = localizadas.loc[vizinhas['b']].set_axis(pd.Index(vizinhas['a'], name='PAC'))
+        encontradas = pd.concat([encontradas, novas])
+        localizadas = pd.concat([localizadas, novas])
+
+    orfaos = orfaos[orfaos.isin(encontradas.index)]
+    return encontradas.loc[orfaos].rename_axis('PAC').reset_index()[['PAC', 'long', 'lat']]
+
+
+def dedup_buscoords(buscoords):
+    """
+    Keeps one row per PAC in the bus coordinates: the last one with coordinates, which is the one OpenDSS would keep.
+
+    Args:
+        buscoords (pd.DataFrame): Bus coordinates (PAC, long, lat), one row per segment end.
+
+    Returns:
+        pd.DataFrame: One row per PAC, in the order of the first appearance of each PAC.
+    """
+    validas = buscoords.dropna(subset=['PAC', 'long', 'lat'])
+    ultimas = validas.drop_duplicates('PAC', keep='last').set_index('PAC')
+    ordem = validas['PAC'].drop_duplicates(keep='first')
+    return ultimas.loc[ordem].reset_index()[['PAC', 'long', 'lat']]
+
+
+def get_feeder_buscoords(filename, feeder, dfs=None):
+    """
+    Returns the bus coordinates (PAC, long, lat) of a feeder from the coordinates of the whole BDGD (get_bdgd_coords).
+
+    Args:
+        filename (str): Path of the BDGD (GDB/GPKG).
+        feeder (str): Feeder code (CTMT).
+        dfs (dict): Tables of the BDGD (Case.dfs), used by settings.orphanCoords to find the PACs without coordinates.
+
+    Returns:
+        pd.DataFrame: The same table as get_buscoords for the feeder segments, followed by the PACs located by
+            orphan_coords (settings.orphanCoords), with one row per PAC when settings.dedupBuscoords is set.
+    """
+    camadas = get_bdgd_coords(filename)
+    ssdmt, coords_ssdmt = camadas['SSDMT'].feeder(feeder)
+    ssdbt, coords_ssdbt = camadas['SSDBT'].feeder(feeder)
+    buscoords = get_buscoords(ssdmt, ssdbt, coords_ssdmt, coords_ssdbt)
+    if settings.orphanCoords and dfs is not None:
+        tabelas = []
+        for layer, colunas in CAMADAS_PAC.items():
+            if layer in dfs and 'CTMT' in dfs[layer]['gdf'].columns:
+                df = dfs[layer]['gdf']
+                tabelas.append(df.loc[df['CTMT'] == feeder, [coluna for coluna in colunas if coluna in df.columns]])
+        pontos = camadas['PONTOS'].get(feeder, pd.DataFrame(columns=['PAC', 'long', 'lat']))
+        orfaos = orphan_coords(buscoords, pontos, tabelas)
+        message(f"Coordenadas atribuídas a {len(orfaos)} barras sem segmento")
+        buscoords = pd.concat([buscoords, orfaos], ignore_index=True)
+    if settings.dedupBuscoords:
+        buscoords = dedup_buscoords(buscoords)
+    return buscoords
 
 
 def buses_coords(coords_shx, df_ssd):
@@ -47,30 +364,28 @@ def buses_coords(coords_shx, df_ssd):
                             df2[['COD_ID', 'PAC_2', 'lat', 'long']].rename(columns={'PAC_2': 'PAC'})],
                            axis=0).reset_index(drop=True)
 
-    # # Transformação para UTM, identificar zona
-    # myProj = Proj('+proj=utm +zone=22 +south +ellps=WGS84 +datum=WGS84 +units=m +towgs84=-67.35,3.88,-38.22')
-    # coords_shx['UTMx'], coords_shx['UTMy'] = myProj(coords_shx['long'],coords_shx['lat'])
-    # # long, lat = myProj(UTMx, UTMy, inverse=True) # Para voltar para latlong
-    # coords_shx['UTMx'] = round(coords_shx['UTMx'],3)
-    # coords_shx['UTMy'] = round(coords_shx['UTMy'],3)
+    # a transformação para UTM (ou outro CRS) é feita de uma só vez para toda a BDGD: ver reproject_coords
 
     return coords_shx
 
 
-def get_buscoords(ssdmt, ssdbt):
+def get_buscoords(ssdmt, ssdbt, coords_ssdmt_bdgd=None, coords_ssdbt_bdgd=None):
     if not ssdmt.empty:
-        coords_ssdmt_bdgd = extract_shx(ssdmt)
+        if coords_ssdmt_bdgd is None:
+            coords_ssdmt_bdgd = extract_shx(ssdmt)
         buscoords_mt = buses_coords(coords_ssdmt_bdgd, ssdmt)
     else: #caso não exista sistema de média tensão, retorna apenas o sistema de baixa tensão.
-        coords_ssdbt_bdgd = extract_shx(ssdbt)
+        if coords_ssdbt_bdgd is None:
+            coords_ssdbt_bdgd = extract_shx(ssdbt)
         buscoords_bt = buses_coords(coords_ssdbt_bdgd, ssdbt)        
-        print("There's no SSDMT in this feeder.")
+        message("There's no SSDMT in this feeder.")
         return(buscoords_bt[['PAC', 'long', 'lat']])
     if not ssdbt.empty:
-        coords_ssdbt_bdgd = extract_shx(ssdbt)
+        if coords_ssdbt_bdgd is None:
+            coords_ssdbt_bdgd = extract_shx(ssdbt)
         buscoords_bt = buses_coords(coords_ssdbt_bdgd, ssdbt)
     else: #caso não exista o sistema de baixa tensão, retorna apenas o sistema de média tensão.
-        print("There's no SSDBT in this feeder.")        
+        message("There's no SSDBT in this feeder.")        
         return(buscoords_mt[['PAC', 'long', 'lat']])
     buscoords = pd.concat([buscoords_mt[['PAC', 'long', 'lat']], buscoords_bt[['PAC', 'long', 'lat']]], axis=0).reset_index(drop=True)
     # return buscoords[['PAC', 'long', 'lat']].to_csv(path, index=False, header=False)
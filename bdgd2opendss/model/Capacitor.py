@@ -14,7 +14,7 @@ import copy
 import re
 from typing import Any
 import geopandas as gpd
-from tqdm import tqdm
+from bdgd2opendss.core.Telemetry import progress
 
 from bdgd2opendss.model.Converter import convert_tpotrtv, convert_tfascon_phases, convert_tfascon_conn, convert_tfascon_bus #, convert_tgruten
 # fazer função convert_tgruten
@@ -127,11 +127,9 @@ class Capacitor:
         capacitors = []
         capacitor_config = json_data['elements']['Capacitor']['UNCRMT']
 
-        progress_bar = tqdm(dataframe.iterrows(), total=len(dataframe), desc="capacitor", unit=" capacitors", ncols=100)
-        for _, row in progress_bar:
+        for _, row in progress(dataframe.iterrows(), total=len(dataframe), desc="capacitor", unit=" capacitors"):
             capacitor_ = capacitor._create_capacitor_from_row(capacitor_config, row)
 
             capacitors.append(capacitor_)
-            progress_bar.set_description(f"Processing Capacitor {_ + 1}")
 
         return capacitors
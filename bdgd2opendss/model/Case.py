@@ -1,6 +1,7 @@
 # -*- encoding: utf-8 -*-
 
 from dataclasses import dataclass, field
+import calendar
 import pandas as pd
 
 from bdgd2opendss import Circuit, LineCode, Line, LoadShape, Transformer, RegControl, Load, PVsystem
@@ -9,6 +10,8 @@ from bdgd2opendss.model.Count_days import count_day_type
 from bdgd2opendss.model import BusCoords
 from bdgd2opendss.core.Settings import settings
 from bdgd2opendss.core import Utils
+from bdgd2opendss.core import Telemetry
+from bdgd2opendss.core.Profiling import FeederProfiler
 from bdgd2opendss.model.EnergyMeters import create_energymeters
 #from bdgd2opendss.model.KVBase import KVBase
 
@@ -27,12 +30,13 @@ class Case:
     _PVsystems: list[PVsystem] = field(init=False)
     _dfs: dict = field(init=False)
     
-    def __init__(self, jsonData, geodataframes, folder_bdgd, feeder, output_folder):
+    def __init__(self, jsonData, geodataframes, folder_bdgd, feeder, output_folder, profile=False):
         self._jsonData = jsonData
         self._dfs = geodataframes
         self.folder_bdgd = folder_bdgd
         self.feeder = feeder
         self.output_folder = output_folder
+        self.profile = profile #perfila a conversão do alimentador (Profiling.FeederProfiler)
 
         if settings.TipoBDGD: #BDGD privada
             self.ucbt = "UCBT"
@@ -45,7 +49,8 @@ class Case:
             self.ugbt = "UGBT_tab"
             self.ugmt = "UGMT_tab"
         
-        print(f"\nFeeder: {feeder}")
+        Telemetry.set_feeder(feeder)
+        Telemetry.message(f"\nFeeder: {feeder}")
 
         # init list
         self.list_files_name = []
@@ -172,9 +177,13 @@ class Case:
 
         setattr(linecode_, f"_linecode_{i}", re.sub(pattern, repl, input_str))
 
-    def output_master(self, file_names, tip_dia="", mes=""):
+    def master_voltagebases(self):
+        """
+        Returns the voltage bases of the masters: the LV bases of the transformers plus the circuit kV base.
 
-        master = "clear\n"
+        Returns:
+        - str: Voltage bases separated by spaces (Set Voltagebases = [...]).
+        """
         y = create_voltage_bases(Transformer.dict_kv()) #cria lista de tensões de base na baixa tensão
         y.sort()
         #  TODO do jeito que esta, a variavel kv (declarada na classe circuit) entra neste metodo como 1 variavel global
@@ -182,13 +191,19 @@ class Case:
         #   que esta classe ja possui as variaveis _circuitos e _transformers (idealmente os metodos podem chegar o preecnhimento da variavel e
         #   qualquer dependencia (temporal) de se executar o circuit e transformer antes). Eg _circuitos.GetKv()
         y.append(Circuit.kvbase())
-        voltagebases = " ".join(str(z) for z in set(y))
-        for i in file_names:
-            if i[:2] == "GD":
-                master = master + f'!Redirect "{i}"\n'
-            else:
-                master = master + f'Redirect "{i}"\n'
-        master = master + f'''Set mode = daily
+        return " ".join(str(z) for z in set(y))
+
+    @staticmethod
+    def master_redirect(file_name):
+        """Returns the Redirect line of a file in the master (the GD files are commented out)."""
+        if file_name[:2] == "GD":
+            return f'!Redirect "{file_name}"\n'
+        return f'Redirect "{file_name}"\n'
+
+    @staticmethod
+    def master_footer(voltagebases):
+        """Returns the commands written after the Redirect lines of the daily masters."""
+        return f'''Set mode = daily
 Set Voltagebases = [{voltagebases}]
 Calc Voltagebases
 Set tolerance = 0.0001
@@ -198,27 +213,63 @@ Set maxcontroliter = 10
 Solve
 buscoords buscoords.csv'''
 
+    def output_master(self, file_names, tip_dia="", mes="", voltagebases=None):
+
+        if voltagebases is None:
+            voltagebases = self.master_voltagebases()
+        master = "clear\n" + "".join(self.master_redirect(i) for i in file_names) + self.master_footer(voltagebases)
+
         create_master_file(file_name=f'Master_{tip_dia}{mes}', feeder=self.feeder, master_content=master, output_folder=self.output_folder)
 
-    def create_outputs_masters(self, file_names):
+    def output_master_yearly(self, file_names, yearly_files, voltagebases=None):
         """
-        Creates dss_models_output masters based on file names.
+        Creates the yearly master: the daily loadshapes and load files are replaced by the yearly ones.
+
+        Args:
+        - file_names (list): List of file names of the feeder.
+        - yearly_files (list): Yearly loadshape file followed by the yearly load files (Load.create_yearly_files).
+        - voltagebases (str): Voltage bases already computed by master_voltagebases (optional).
+        """
+        if voltagebases is None:
+            voltagebases = self.master_voltagebases()
+        npts = 24 * (366 if calendar.isleap(int(get_cod_year_bdgd()[0:4])) else 365)
+
+        master = "clear\n"
+        master = master + "".join(self.master_redirect(i) for i in file_names
+                                  if not ("CurvaCarga" in i or "CargasBT" in i or "CargasMT" in i))
+        master = master + "".join(f'Redirect "{i}"\n' for i in yearly_files)
+        master = master + f'''Set Voltagebases = [{voltagebases}]
+Calc Voltagebases
+Set tolerance = 0.0001
+Set maxcontroliter = 10
+Set mode = yearly
+Set stepsize = 1h
+Set number = {npts}
+Solve
+buscoords buscoords.csv'''
+
+        create_master_file(file_name='Master_Anual', feeder=self.feeder, master_content=master, output_folder=self.output_folder)
+
+    def create_outputs_masters(self, file_names, voltagebases=None):
+        """
+        Creates the 36 daily masters (DU/SA/DO x 12 months) of the feeder.
 
         Args:
         - file_names (list): List of file names.
+        - voltagebases (str): Voltage bases already computed by master_voltagebases (optional).
 
         Logic:
-        - Generates a list of two-digit month numbers from 01 to 12.
-        - Loops through each element in file_names.
-        - Finds the index of the element containing "Cargas".
-        - Uses the previous and current elements as base strings for modification.
-        - Iterates through 'DU', 'SA', 'DO' and months to create modified file names.
-        - Calls the 'output_master' method for each combination of tip_dia and month.
+        - The Redirect lines and the final commands are rendered once (template).
+        - Only the CargasBT/CargasMT lines are replaced in each tip_dia/month variant,
+          by changing '_DU' to the day type and the first '01_' to the month.
 
         Returns: None
         """
         meses = [f"{mes:02d}" for mes in range(1, 13)]
 
+        if voltagebases is None:
+            voltagebases = self.master_voltagebases()
+
         indicebt = 0
         indicemt = 0
 
@@ -231,69 +282,114 @@ buscoords buscoords.csv'''
         base_string_BT = file_names[indicebt]
         base_string_MT = file_names[indicemt]
 
+        redirects = [self.master_redirect(i) for i in file_names]
+        footer = self.master_footer(voltagebases)
+
         for tip_dia in ['DU', 'SA', 'DO']:
 
             aux_BT = base_string_BT.replace('_DU', f'_{tip_dia}')
             aux_MT = base_string_MT.replace('_DU', f'_{tip_dia}')
 
-
             for mes in meses:
-                file_names[indicebt] = aux_BT.replace('01_', f'{mes}_',1)
-                file_names[indicemt] = aux_MT.replace('01_', f'{mes}_',1)
+                linhas = redirects.copy()
+                linhas[indicebt] = self.master_redirect(aux_BT.replace('01_', f'{mes}_',1))
+                linhas[indicemt] = self.master_redirect(aux_MT.replace('01_', f'{mes}_',1))
 
-                self.output_master(tip_dia=tip_dia, mes=mes, file_names=file_names)
+                create_master_file(file_name=f'Master_{tip_dia}{mes}', feeder=self.feeder,
+                                   master_content="clear\n" + "".join(linhas) + footer, output_folder=self.output_folder)
 
     # this method populates Case object with data from BDGD
     def PopulaCase(self):
-        get_cod_year_bdgd(self.folder_bdgd) #Extrai o código e o ano da BDGD para nomear os arquivos dss
-        count_day_type(int(get_cod_year_bdgd()[0:4]))#calcula du,sa, do/feriados a partir do ano da BDGD
-        get_configuration(feeder=self.feeder,output_folder=self.output_folder) #Identifica as configurações escolhidas pelo usuário e transforma em uma string
+        profiler = FeederProfiler(self.feeder, self.output_folder).start() if self.profile else None
+        try:
+            get_cod_year_bdgd(self.folder_bdgd) #Extrai o código e o ano da BDGD para nomear os arquivos dss
+            Utils.reset_output_folders()
+            count_day_type(int(get_cod_year_bdgd()[0:4]))#calcula du,sa, do/feriados a partir do ano da BDGD
+            get_configuration(feeder=self.feeder,output_folder=self.output_folder) #Identifica as configurações escolhidas pelo usuário e transforma em uma string
 
-        self.GenGeographicCoord()
+            with Telemetry.stage("coordenadas") as etapa: #métricas de cada etapa (settings.stageMetrics)
+                df_coords = self.GenGeographicCoord()
+                etapa["rows"] = 0 if df_coords is None else len(df_coords)
 
-        self.Populates_CTMT()
+            with Telemetry.stage("CTMT"):
+                self.Populates_CTMT()
 
-        df_tramo, df_aux_trafo = Utils.create_aux_tramo(self.dfs,self.feeder)
-        Utils.ordem_pacs(df_aux_tramo=df_tramo,pac_ctmt=Circuit.pac_ctmt()) #Define a ordem dos buses de acordo com o que a distribuidora usa
-        Utils.elem_isolados(self.dfs,self.feeder,pac_ctmt=Circuit.pac_ctmt(),output_folder=self.output_folder) #Define quais são os elementos isolados e cria um log de elementos isolados
-        Utils.seq_eletrica(self.dfs,self.feeder,pac=Circuit.pac_ctmt(),kvbase=Circuit.kvbase()) #Define as tensões no circuito com base nos transformadores
-        
-        self.Populates_SEGCON()
+            with Telemetry.stage("topologia") as etapa:
+                df_tramo, df_aux_trafo = Utils.create_aux_tramo(self.dfs,self.feeder)
+                Utils.ordem_pacs(df_aux_tramo=df_tramo,pac_ctmt=Circuit.pac_ctmt()) #Define a ordem dos buses de acordo com o que a distribuidora usa
+                Utils.elem_isolados(self.dfs,self.feeder,pac_ctmt=Circuit.pac_ctmt(),output_folder=self.output_folder) #Define quais são os elementos isolados e cria um log de elementos isolados
+                Utils.seq_eletrica(self.dfs,self.feeder,pac=Circuit.pac_ctmt(),kvbase=Circuit.kvbase()) #Define as tensões no circuito com base nos transformadores
+                etapa["rows"] = len(df_tramo)
 
-        self.Populates_UNTRMT()
+            with Telemetry.stage("SEGCON"):
+                self.Populates_SEGCON()
 
-        self.Populates_Entity()
+            with Telemetry.stage("UNTRMT"):
+                self.Populates_UNTRMT()
 
-        self.Populates_UNREMT()
-        
-        self.Populates_energymeters(df_tramo,df_aux_trafo)
+            with Telemetry.stage("Entity"):
+                self.Populates_Entity()
+
+            with Telemetry.stage("UNREMT"):
+                self.Populates_UNREMT()
 
-        self.Popula_CRVCRG()
+            with Telemetry.stage("energymeters"):
+                self.Populates_energymeters(df_tramo,df_aux_trafo)
 
-        self.Populates_UCBT()
+            with Telemetry.stage("CRVCRG"):
+                self.Popula_CRVCRG()
 
-        self.Populates_PIP()
+            with Telemetry.stage("UCBT"):
+                self.Populates_UCBT()
 
-        self.Populates_UCMT()
-        #Load.export_df_loads()#exporta tabela de perdas técnicas para cargas
-        self.Populates_UGBT()
+            with Telemetry.stage("PIP"):
+                self.Populates_PIP()
 
-        self.Populates_UGMT()
+            with Telemetry.stage("UCMT"):
+                self.Populates_UCMT()
 
-        # creates dss files
-        self.output_master(self.list_files_name)
-        self.create_outputs_masters(self.list_files_name)
+            with Telemetry.stage("arquivos de cargas"):
+                Load.write_output_load_files() #escreve de uma vez os arquivos de cargas BT (UCBT + PIP) e MT
+                if settings.gerTabelaPerdas: #exporta tabela de perdas técnicas para cargas
+                    Load.export_df_loads(self.feeder, self.output_folder, settings.formatoTabelaPerdas)
+
+            with Telemetry.stage("UGBT"):
+                self.Populates_UGBT()
+
+            with Telemetry.stage("UGMT"):
+                self.Populates_UGMT()
+
+            with Telemetry.stage("masters"):
+                yearly_files = []
+                if settings.gerYearly:
+                    yearly_files = Load.create_yearly_files(self.dfs['CRVCRG']['gdf'], self.feeder, pastadesaida=self.output_folder)
+
+                # creates dss files
+                voltagebases = self.master_voltagebases()
+                self.output_master(self.list_files_name, voltagebases=voltagebases)
+                if settings.gerYearly:
+                    self.output_master_yearly(self.list_files_name, yearly_files, voltagebases=voltagebases)
+                self.create_outputs_masters(self.list_files_name, voltagebases=voltagebases)
+
+            if profiler is not None: #grava o perfil antes de fechar o alimentador no destino de saída
+                profiler.stop()
+                profiler.write()
+        finally: #mesmo quando uma etapa falha: desliga o perfilador, descarta as cargas pendentes e fecha o alimentador no destino de saída
+            if profiler is not None:
+                profiler.stop()
+            Load.reset_feeder_state() #cargas, cargas anuais e tabela de perdas de um alimentador interrompido
+            Utils.get_output_sink().close_feeder() #fecha o alimentador no destino de saída (ex: grava o .zip do alimentador)
+            Telemetry.write_feeder_metrics(self.feeder, get_cod_year_bdgd())
 
     # generates the geographic coordinates
     def GenGeographicCoord(self):
 
         if settings.gerCoord:
             #
-            gdf_SSDMT, gdf_SSDBT = Utils.create_dfs_coords(self.folder_bdgd, self.feeder)
-            #
-            df_coords = BusCoords.get_buscoords(gdf_SSDMT, gdf_SSDBT)
+            df_coords = BusCoords.get_feeder_buscoords(self.folder_bdgd, self.feeder, self.dfs) #coordenadas de toda a BDGD lidas uma única vez
             #
             Utils.create_output_feeder_coords(df_coords, feeder=self.feeder, output_folder=self.output_folder)
+            return df_coords
 
     # CTMT
     def Populates_CTMT(self):#TODO colocar o local e a pasta criada no create from json
@@ -306,18 +402,22 @@ buscoords buscoords.csv'''
             self.list_files_name.append(fileName)
 
         except UnboundLocalError:
-            print("Error in CTMT.\n")
+            Telemetry.message("Error in CTMT.\n", level="error")
 
     # SEGCON
     def Populates_SEGCON(self):
 
         try:
-            self.line_codes, fileName = LineCode.create_linecode_from_json(self._jsonData, self.dfs['SEGCON']['gdf'],
-                                                                           self.feeder, pastadesaida=self.output_folder)
+            if settings.sharedLibrary: #linecodes escritos uma vez por BDGD na pasta compartilhada
+                self.line_codes, fileName = Utils.shared_library_file("CodCondutor", lambda pasta: LineCode.create_linecode_from_json(
+                    self._jsonData, self.dfs['SEGCON']['gdf'], pasta, pastadesaida=self.output_folder), self.output_folder)
+            else:
+                self.line_codes, fileName = LineCode.create_linecode_from_json(self._jsonData, self.dfs['SEGCON']['gdf'],
+                                                                               self.feeder, pastadesaida=self.output_folder)
             self.list_files_name.append(fileName)
 
         except UnboundLocalError:
-            print("Error in SEGCON.\n")
+            Telemetry.message("Error in SEGCON.\n", level="error")
 
     # UCBT
     def Popula_UCBT(self):
@@ -331,10 +431,10 @@ buscoords buscoords.csv'''
                 self.list_files_name.append(fileName)
 
             except UnboundLocalError:
-                print("Error in UCBT\n")
+                Telemetry.message("Error in UCBT\n", level="error")
 
         else:
-            print(f'No UCBT found for this feeder.\n')
+            Telemetry.message(f'No UCBT found for this feeder.\n')
 
     # SSDMT
     def Populates_Entity(self):
@@ -353,7 +453,7 @@ buscoords buscoords.csv'''
                     self.list_files_name.append(fileName)
 
                 except UnboundLocalError:
-                    print(f"Error in {entity}.\n")
+                    Telemetry.message(f"Error in {entity}.\n", level="error")
 
     # UNREMT
     def Populates_UNREMT(self):
@@ -372,13 +472,13 @@ buscoords buscoords.csv'''
                 self.list_files_name.append(fileName)
 
             except UnboundLocalError:
-                print("Error in UNREMT.\n")
+                Telemetry.message("Error in UNREMT.\n", level="error")
 
         else:
             if self.dfs['UNREMT']['gdf'].query("CTMT == @alimentador").empty:
-                print("No RegControls found for this feeder.\n")
+                Telemetry.message("No RegControls found for this feeder.\n")
             else:
-                print("Error. Please, check the association EQRE/UNREMT for this feeder.\n")
+                Telemetry.message("Error. Please, check the association EQRE/UNREMT for this feeder.\n", level="error")
 
     # EQTRMT
     def Populates_UNTRMT(self):
@@ -400,22 +500,26 @@ buscoords buscoords.csv'''
                 self.list_files_name.append(fileName)
 
             except UnboundLocalError:
-                print("Error in UNTRMT.\n")
+                Telemetry.message("Error in UNTRMT.\n", level="error")
 
         else:
             if self.dfs['EQTRMT']['gdf'].query("CTMT == @alimentador").empty:
-                print('No Transformers found for this feeder. \n')
+                Telemetry.message('No Transformers found for this feeder. \n')
             else:
-                print("Error. Please, check the association EQTRMT/UNTRMT for this feeder.\n")
+                Telemetry.message("Error. Please, check the association EQTRMT/UNTRMT for this feeder.\n", level="error")
 
     # CRVCRG
     def Popula_CRVCRG(self):
 
         try:
-            _load_shapes, fileName = LoadShape.create_loadshape_from_json(self._jsonData, self._dfs['CRVCRG']['gdf'], self.feeder, pastadesaida=self.output_folder)
+            if settings.sharedLibrary: #curvas de carga escritas uma vez por BDGD na pasta compartilhada
+                fileName = Utils.shared_library_file("CurvaCarga", lambda pasta: LoadShape.create_loadshape_from_json(
+                    self._jsonData, self._dfs['CRVCRG']['gdf'], pasta, pastadesaida=self.output_folder)[1], self.output_folder)
+            else:
+                _load_shapes, fileName = LoadShape.create_loadshape_from_json(self._jsonData, self._dfs['CRVCRG']['gdf'], self.feeder, pastadesaida=self.output_folder)
             self.list_files_name.append(fileName)
         except UnboundLocalError:
-            print("Error in CRVCRG\n")
+            Telemetry.message("Error in CRVCRG\n", level="error")
 
     # UCBT
     def Populates_UCBT(self):
@@ -436,10 +540,10 @@ buscoords buscoords.csv'''
                 self.list_files_name.append(fileName)
 
             except UnboundLocalError:
-                print("Error in UCBT\n")
+                Telemetry.message("Error in UCBT\n", level="error")
 
         else:
-            print(f'No UCBT found for this feeder.\n')
+            Telemetry.message(f'No UCBT found for this feeder.\n')
 
     # PIP
     def Populates_PIP(self):
@@ -455,10 +559,10 @@ buscoords buscoords.csv'''
                 #self.list_files_name.append(fileName) #já está sendo criado dentro do arquivo cargasBT 
 
             except UnboundLocalError:
-                print("Error in PIP\n")
+                Telemetry.message("Error in PIP\n", level="error")
 
         else:
-            print(f'No PIP found for this feeder.\n')
+            Telemetry.message(f'No PIP found for this feeder.\n')
 
     # UCMT
     def Populates_UCMT(self):
@@ -478,9 +582,9 @@ buscoords buscoords.csv'''
                 self.list_files_name.append(fileName)
 
             except UnboundLocalError:
-                print("Error in UCMT\n")
+                Telemetry.message("Error in UCMT\n", level="error")
         else:
-            print(f'No UCMT found for this feeder.\n')
+            Telemetry.message(f'No UCMT found for this feeder.\n')
 
     # UGBT
     def Populates_UGBT(self):
@@ -496,10 +600,10 @@ buscoords buscoords.csv'''
                 self.list_files_name.append(fileName)
                 
             except UnboundLocalError:
-                print("Error in UGBT\n")
+                Telemetry.message("Error in UGBT\n", level="error")
 
         else:
-            print("No UGBT found for this feeder. \n")
+            Telemetry.message("No UGBT found for this feeder. \n")
 
     # UGMT
     def Populates_UGMT(self):
@@ -515,9 +619,9 @@ buscoords buscoords.csv'''
                 self.list_files_name.append(fileName)
 
             except UnboundLocalError:
-                print("Error in UGBT\n")
+                Telemetry.message("Error in UGBT\n", level="error")
         else:
-            print("No UGMT found for this feeder. \n")
+            Telemetry.message("No UGMT found for this feeder. \n")
 
     def Populates_energymeters(self,df_aux_tramo,df_aux_trafo):
         alimentador = self.feeder
@@ -3,7 +3,7 @@
 # Não remover a linha de importação abaixo
 from typing import Any, List
 import geopandas as gpd
-from tqdm import tqdm
+from bdgd2opendss.core.Telemetry import progress
 from bdgd2opendss.core.Settings import settings
 
 from bdgd2opendss.model.Converter import convert_tten
@@ -200,8 +200,7 @@ class Circuit:
         circuits = []
         circuit_config = json_data['elements']['Circuit']['CTMT']
 
-        progress_bar = tqdm(dataframe.iterrows(), total=len(dataframe), desc="Circuit", unit=" circuits", ncols=100)
-        for _, row in progress_bar:
+        for _, row in progress(dataframe.iterrows(), total=len(dataframe), desc="Circuit", unit=" circuits"):
             circuit_ = cls()
 
             for key, value in circuit_config.items():
@@ -212,7 +211,6 @@ class Circuit:
                 elif key == "static":
                     cls._process_static(circuit_, value)
             circuits.append(circuit_)
-            progress_bar.set_description(f"Processing Circuit {_+1}")
 
 
         file_name = create_output_file(circuits, circuit_config["arquivo"], output_folder=pastadesaida, feeder=circuit_.circuit)
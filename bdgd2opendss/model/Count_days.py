@@ -7,9 +7,13 @@ from datetime import date
 import holidays
 import calendar
 from bdgd2opendss.core.Utils import get_cod_year_bdgd
+from bdgd2opendss.core import Telemetry
 du = {}
 sa = {}
 do = {}
+TIPOS_DIA = ("DU", "SA", "DO")
+_contagens = {} #contagem de dias (3 x 12) por ano
+_calendarios = {} #tipo de dia e mês de cada dia, por ano
     
 def calcula_carnaval(ano):
     """Calcula a data da Páscoa (domingo) para um determinado ano."""
@@ -74,53 +78,69 @@ def count_busday(start, end):
     res = np.busday_count(start, end)
     return res
 
+def holiday_dates(ano):
+    """
+    Returns the holidays of the year (national holidays, Carnaval and Corpus Christi) as a sorted datetime64[D] array.
+
+    Args:
+        ano (int): Year.
+
+    Returns:
+        np.ndarray: Dates of the holidays, without repetitions.
+    """
+    carnaval, corpus_christi = calcula_carnaval(ano)
+    datas = list(holidays.Brazil(years=ano).keys()) + [carnaval[0], corpus_christi[0]]
+    return np.unique(np.array(datas, dtype='datetime64[D]'))
+
+
+def day_type_counts(ano):
+    """
+    Returns the number of DU, SA and DO days of each month of the year, computed once per year.
+
+    Holidays on weekdays count as DO and Saturdays are always SA. The counts come from a single np.busday_count
+    call over the 12 months with the holiday array.
+
+    Args:
+        ano (int): Year.
+
+    Returns:
+        np.ndarray: Read-only (3 x 12) array in the order DU, SA, DO (TIPOS_DIA) and January to December.
+    """
+    if ano not in _contagens:
+        inicios = np.arange(f'{ano}-01', f'{ano + 1}-02', dtype='datetime64[M]').astype('datetime64[D]')
+        dias_uteis = np.busday_count(inicios[:-1], inicios[1:], holidays=holiday_dates(ano))
+        sabados = np.busday_count(inicios[:-1], inicios[1:], weekmask='0000010')
+        domingos_feriados = np.diff(inicios).astype(int) - dias_uteis - sabados
+        contagem = np.array([dias_uteis, sabados, domingos_feriados], dtype=float)
+        contagem.setflags(write=False)
+        _contagens[ano] = contagem
+    return _contagens[ano]
+
+
 def count_day_type(ano):
     global du
     global sa
     global do
-    holidays_df = get_holidays_br(ano)
-    df_days = holidays_df[['is_busday','mes']].groupby('mes').sum().reset_index().rename(columns={'is_busday':'holiday_busday_count'})
-
-    df_aux = pd.DataFrame()
-
-    for i in range(0,12):
-        if i < 9:
-            df_aux.loc[i,'mes_ano']=str(ano)+'-'+'0'+str(i+1)
-            df_aux.loc[i,'mes'] = i+1
-            df_aux.loc[i,'sab'] = count_days('sab',i+1, ano)
-            df_aux.loc[i,'dom_i'] = count_days('dom',i+1, ano)
-        else:
-            df_aux.loc[i,'mes_ano']=str(ano)+'-'+str(i+1)
-            df_aux.loc[i,'mes'] = i+1
-            df_aux.loc[i,'sab'] = count_days('sab',i+1, ano)
-            df_aux.loc[i,'dom_i'] = count_days('dom',i+1, ano)
-
-    df_days = pd.merge(df_aux, df_days, on='mes', how='left')
-    df_days['holiday_busday_count'].fillna(0, inplace=True )
-
-    df_days['next_month'] = df_days['mes_ano'].shift(-1)
-    df_days.iloc[-1,-1] = str(ano+1)+'-01'
-
-    df_days['du_i'] = df_days.apply(lambda x: count_busday(x['mes_ano'], x['next_month']), axis=1)
-    df_days['du'] = df_days['du_i']-df_days['holiday_busday_count']
-
-    df_days['dom'] = df_days['dom_i']+df_days['holiday_busday_count']
-    df_mes_str = df_days['mes'].apply(lambda x:f"{int(x):02d}")
-    du = pd.Series(df_days['du'].values, index=df_mes_str).to_dict()
-    sa = pd.Series(df_days['sab'].values, index=df_mes_str).to_dict()
-    do = pd.Series(df_days['dom'].values, index=df_mes_str).to_dict()
-    #return df_days[['mes_ano', 'mes','holiday_busday_count', 'sab', 'dom', 'du']]
-    #return(du,sa,do)
-    return(print(f'Contagem de dias para o ano de {ano} realizada'))
-
-
-def return_day_type(tip_dia,mes):
-    global du
-    global sa
-    global do
-    if tip_dia == 'DU':
-        return(du[mes])
-    if tip_dia == 'SA':
-        return(sa[mes])
-    else:
-        return(do[mes])
+    contagem = day_type_counts(ano)
+    meses = [f"{mes:02d}" for mes in range(1, 13)]
+    du = dict(zip(meses, contagem[0]))
+    sa = dict(zip(meses, contagem[1]))
+    do = dict(zip(meses, contagem[2]))
+    return(Telemetry.message(f'Contagem de dias para o ano de {ano} realizada'))
+
+def day_type_calendar(ano):
+    """
+    Returns the day type (DU/SA/DO) and the month of every day of the year, computed once per year.
+
+    Uses the same rules as day_type_counts: holidays on weekdays count as DO and Saturdays are always SA.
+    """
+    if ano not in _calendarios:
+        dias = np.arange(f'{ano}-01-01', f'{ano + 1}-01-01', dtype='datetime64[D]')
+        dia_semana = (dias.astype('int64') + 3) % 7 #segunda-feira = 0 (01/01/1970 foi uma quinta-feira)
+        tipos = np.where(dia_semana == 5, 'SA', np.where(dia_semana == 6, 'DO', 'DU'))
+        tipos[np.isin(dias, holiday_dates(ano)) & (tipos == 'DU')] = 'DO'
+        meses = dias.astype('datetime64[M]').astype(int) % 12 + 1
+        tipos.setflags(write=False)
+        meses.setflags(write=False)
+        _calendarios[ano] = (tipos, meses)
+    return _calendarios[ano]
@@ -0,0 +1,88 @@
+# -*- encoding: utf-8 -*-
+"""
+Motor vetorizado das curvas de carga típicas (CRVCRG).
+
+A CRVCRG traz 96 pontos (POT_01..POT_96, de 15 em 15 minutos) por classe e tipo de dia.
+Tanto os Loadshapes do OpenDSS quanto o cálculo do kW das cargas usam a curva reduzida
+a 24 pontos (média de cada hora), normalizada pelo máximo ou pelo intervalo min-max.
+As três curvas são calculadas de uma só vez, como arrays (n x 24), e guardadas por BDGD.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from bdgd2opendss.core.Utils import get_cod_year_bdgd
+
+_curves = {} #(BDGD, id da CRVCRG) -> (CRVCRG, curvas); a CRVCRG fica referenciada para que o id não seja reutilizado
+
+
+@dataclass
+class CrvcrgCurves:
+    """
+    Hourly curves of every CRVCRG row.
+
+    Attributes:
+        cod_ids (np.ndarray): (n,) loadshape class of each row (COD_ID).
+        tip_dias (np.ndarray): (n,) day type of each row (TIP_DIA).
+        medias (np.ndarray): (n x 24) hourly means of the 96 quarter-hour points.
+        max_normalized (np.ndarray): (n x 24) hourly means divided by their maximum (OpenDSS Loadshape mult).
+        minmax_normalized (np.ndarray): (n x 24) hourly means normalized between 0 and 1 (1 for flat curves).
+    """
+    cod_ids: np.ndarray
+    tip_dias: np.ndarray
+    medias: np.ndarray
+    max_normalized: np.ndarray
+    minmax_normalized: np.ndarray
+    _loadshape_strings: Optional[List[str]] = field(default=None, repr=False)
+
+    def loadshape_strings(self) -> List[str]:
+        """Returns the `mult` list of every row formatted as in the Loadshape files (rounded to 9 decimals)."""
+        if self._loadshape_strings is None:
+            self._loadshape_strings = [', '.join(map(str, row)) for row in np.round(self.max_normalized, 9)]
+        return self._loadshape_strings
+
+
+def create_crvcrg_curves(dataframe: pd.DataFrame) -> CrvcrgCurves:
+    """
+    Reduces the 96 quarter-hour points of every CRVCRG row to 24 hourly points.
+
+    Args:
+        dataframe (pd.DataFrame): CRVCRG with the columns COD_ID, TIP_DIA and POT_01..POT_96.
+
+    Returns:
+        CrvcrgCurves: The hourly means and their normalized versions.
+    """
+    pot = dataframe.filter(regex='^POT').to_numpy(dtype=float).reshape(len(dataframe), 24, 4)
+    # soma na mesma ordem de Converter.process_loadshape, para manter os mesmos valores bit a bit
+    medias = (((pot[:, :, 0] + pot[:, :, 1]) + pot[:, :, 2]) + pot[:, :, 3]) / 4
+
+    max_value = medias.max(axis=1, keepdims=True)
+    min_value = medias.min(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        max_normalized = medias / max_value
+        minmax_normalized = np.where(max_value - min_value == 0, 1.0, (medias - min_value) / (max_value - min_value))
+
+    return CrvcrgCurves(dataframe['COD_ID'].to_numpy(), dataframe['TIP_DIA'].to_numpy(),
+                        medias, max_normalized, minmax_normalized)
+
+
+def get_crvcrg_curves(dataframe: pd.DataFrame) -> CrvcrgCurves:
+    """
+    Returns the hourly curves of the CRVCRG, computing them only on the first call of each BDGD.
+
+    Args:
+        dataframe (pd.DataFrame): CRVCRG with the columns COD_ID, TIP_DIA and POT_01..POT_96.
+
+    Returns:
+        CrvcrgCurves: The curves shared by LoadShape and by the load kW engine.
+    """
+    key = (get_cod_year_bdgd(), id(dataframe))
+    if key not in _curves or _curves[key][0] is not dataframe:
+        _curves[key] = (dataframe, create_crvcrg_curves(dataframe))
+    return _curves[key][1]
+
+
+def reset_crvcrg_curves(): #esquece as curvas já calculadas (fim de cada run, ver Core.reset_caches)
+    _curves.clear()
@@ -15,7 +15,7 @@ import re
 from typing import Any
 
 import geopandas as gpd
-from tqdm import tqdm
+from bdgd2opendss.core.Telemetry import progress
 
 from bdgd2opendss.model.Converter import convert_tfascon_phases, convert_tfascon_bus, convert_tfascon_quant_fios
 from bdgd2opendss.core.Utils import create_output_file, ordem_pacs, elem_isolados
@@ -420,12 +420,10 @@ class Line:
 
         lines = []
         line_config = json_data['elements']['Line'][entity]
-        progress_bar = tqdm(dataframe.iterrows(), total=len(dataframe), desc="Line", unit=" lines", ncols=100)
-        for _, row in progress_bar:
+        for _, row in progress(dataframe.iterrows(), total=len(dataframe), desc=f"Line {entity}", unit=" lines"):
             line_ = Line._create_line_from_row(line_config, row)
 
             lines.append(line_)
-            progress_bar.set_description(f"Processing Line {entity} {_ + 1}")
 
         file_name = create_output_file(lines, line_config["arquivo"], feeder=line_.feeder, output_folder=pastadesaida)
 
@@ -14,13 +14,16 @@ import copy
 import re
 from typing import Any
 import geopandas as gpd
-from tqdm import tqdm
+from bdgd2opendss.core.Telemetry import progress
 
 from bdgd2opendss.model.Converter import convert_tten
 from bdgd2opendss.core.Utils import create_output_file
+from bdgd2opendss.core.Settings import settings
 
 from dataclasses import dataclass
 
+MRT_LINECODE = "LC_MRT" #prefixo dos linecodes compartilhados dos resistores MRT
+
 
 @dataclass
 class LineCode:
@@ -194,8 +197,7 @@ class LineCode:
         linecode_config = json_data['elements']['Linecode']['SEGCON']
         interactive = linecode_config.get('interactive')
 
-        progress_bar = tqdm(dataframe.iterrows(), total=len(dataframe), desc="Linecode", unit=" linecodes", ncols=100)
-        for _, row in progress_bar:
+        for _, row in progress(dataframe.iterrows(), total=len(dataframe), desc="Linecode", unit=" linecodes"):
             linecode_ = LineCode._create_linecode_from_row(linecode_config, row)
 
             if interactive is not None: #parametro_iteravel, objeto
@@ -204,8 +206,18 @@ class LineCode:
                     LineCode.rename_linecode_string(linecode_, i, linecode_.pattern_string())
             linecodes.append(linecode_)
 
-            progress_bar.set_description(f"Processing Linecode {_ + 1}")
-
-        file_name = create_output_file(linecodes, linecode_config["arquivo"], feeder=feeder, output_folder=pastadesaida)
+        output = linecodes
+        if settings.dedupMRTLinecodes: #linecodes dos resistores MRT definidos uma única vez
+            output = linecodes + [LineCode.mrt_linecodes()]
+        file_name = create_output_file(output, linecode_config["arquivo"], feeder=feeder, output_folder=pastadesaida)
 
         return linecodes, file_name
+
+    @staticmethod
+    def mrt_linecodes() -> str:
+        """
+        Returns the linecodes of the MRT (single-wire earth return) resistors, shared by every MRT transformer
+        when settings.dedupMRTLinecodes is set (see Transformer.pattern_MRT).
+        """
+        return "\n".join(f'New "Linecode.{MRT_LINECODE}_{i}" nphases={i} basefreq=60 r1=15000 x1=0 units=km normamps=0'
+                         for i in range(1, 5))
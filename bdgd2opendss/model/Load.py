@@ -9,28 +9,36 @@
  * Date:
  * Time:
 """
-# Não remover a linha de importação abaixo
-import copy
 import re
-from typing import Any
+from typing import Any, Optional
 # from numba import jit
 import pandas as pd
 import geopandas as gpd
-from tqdm import tqdm
+from bdgd2opendss.core.Telemetry import message, progress
 from bdgd2opendss.core.Settings import settings
 
 
-from bdgd2opendss.model.Converter import convert_tten, convert_tfascon_bus, convert_tfascon_bus_prim, convert_tfascon_quant_fios, process_loadshape, process_loadshape2, convert_tfascon_conn_load, convert_tfascon_phases_load
-from bdgd2opendss.core.Utils import create_output_file,adequar_modelo_carga, get_cod_year_bdgd, elem_isolados, seq_eletrica
+from bdgd2opendss.model.Converter import convert_tten, convert_tfascon_bus, convert_tfascon_bus_prim, convert_tfascon_quant_fios, convert_tfascon_conn_load, convert_tfascon_phases_load
+from bdgd2opendss.core.Utils import create_output_file, open_output_file, output_file_location, output_file_name, write_elements, BLOCO_SAIDA,adequar_modelo_carga, zipv_modelo_carga, get_cod_year_bdgd, elem_isolados, seq_eletrica, dict_tensoes
 from bdgd2opendss.model.Transformer import Transformer #modificação 08/08
 from bdgd2opendss.model.Circuit import Circuit
-from bdgd2opendss.model.Count_days import return_day_type
+from bdgd2opendss.model.CurveEngine import get_crvcrg_curves
+from bdgd2opendss.model.LoadEngine import MESES, TIP_DIAS_PERDAS, CoefficientTable, create_coefficient_table, get_coefficient_table, store_coefficient_table, compute_kw, proportion_arrays, daily_multipliers, create_yearly_shapes
+from bdgd2opendss.model.Count_days import day_type_calendar
+from bdgd2opendss.model.LoadShape import LoadShape, binary_loadshapes
 import math
+from contextlib import ExitStack
 
 import numpy as np
 
 from dataclasses import dataclass
 df_energ_load = pd.DataFrame()
+_df_energ_load_parts = []
+_yearly_loads = []
+_pending_load_files = {} #(prefixo do arquivo, alimentador, pasta) -> cargas a escrever (UCBT e PIP juntos em CargasBT)
+
+COLUNAS_TABELA_PERDAS = ['CodDist', 'CodConsBT', 'TipCrvaCarga', 'CodAlim', 'CodTrafo', 'fcDU', 'fcSA', 'fcDO'] + \
+    [f'PropEnerMens{tip_dia}{mes}' for tip_dia in TIP_DIAS_PERDAS for mes in MESES]
 
 @dataclass
 class Load:
@@ -51,6 +59,8 @@ class Load:
     _kw: str = ""
     _transformer: str = ""
     _flag_limitcarga: str = "" #settings - Flag Limitar potência de cargas BT(potência ativa do transformador)
+    _models: tuple = None #modelos das cargas _M1/_M2, calculados uma vez por carga em prepare_loads
+    _isolado: bool = None
 
     _tip_dia: str = ""
     _load_DO: str = ""
@@ -322,6 +332,9 @@ class Load:
         self._transformer = value
     
     def adapting_string_variables_load(self): #TODO implementar as tensões de 254
+        if self._models is not None: #já calculado em prepare_loads
+            return(self.kv,self._models)
+
         models = adequar_modelo_carga(settings.intAdequarModeloCarga)#settings adequar modelo de carga
 
         if "MT" not in self.entity:
@@ -344,7 +357,51 @@ class Load:
                 self.vminpu = settings.dblVPUMin 
 
             return(kv,models)
-    
+
+    @staticmethod
+    def prepare_loads(loads: list):
+        """
+        Computes once per load the values shared by its 36 variants: kV, load models, vminpu and isolation.
+
+        The kV of BT loads comes from the secondary voltages of their transformers (phase or line voltage,
+        as in Transformer.sec_phase_kv/sec_line_kv) and the kV of MT loads from the voltage of their bus
+        (Utils.seq_eletrica). Loads whose transformer or bus has no voltage are reported together and skipped.
+
+        Args:
+            loads (list): Load objects of one entity (UCBT, PIP or UCMT).
+        """
+        if len(loads) == 0:
+            return
+        df = pd.DataFrame({'entity': [load.entity for load in loads],
+                           'transformer': [load.transformer for load in loads],
+                           'bus1': [load.bus1 for load in loads],
+                           'fase': [load.phases == '1' and load.conn == 'Wye' for load in loads]})
+        mt = df['entity'].str.contains('MT').to_numpy()
+        fase = df['fase'].to_numpy()
+
+        kv = pd.Series(np.nan, index=df.index, dtype=float)
+        kv[~mt & fase] = df.loc[~mt & fase, 'transformer'].map(Transformer.dict_phase_kv())
+        kv[~mt & ~fase] = df.loc[~mt & ~fase, 'transformer'].map(Transformer.dict_kv())
+        kv[mt] = df.loc[mt, 'bus1'].map(dict_tensoes())
+
+        vminpu_bt = 0.92 if settings.intAdequarTensaoCargasBT else settings.dblVPUMin #settings adequar tensão mínima das cargas BT
+        vminpu_mt = 0.93 if settings.intAdequarTensaoCargasMT else settings.dblVPUMin #settings adequar tensão mínima das cargas MT
+        vminpu = np.where(mt, vminpu_mt, vminpu_bt)
+        models = adequar_modelo_carga(settings.intAdequarModeloCarga)#settings adequar modelo de carga
+        isolados = set(elem_isolados())
+
+        for n, load in enumerate(loads):
+            load.kv = float(kv.iat[n])
+            load.vminpu = float(vminpu[n])
+            load._models = models
+            load._isolado = f'{load.entity}{load.load}' in isolados
+
+        missing = kv.isna() & (np.array([load._energia_total for load in loads]) != 0)
+        if missing.any():
+            chaves = df.loc[missing & ~mt, 'transformer'].unique().tolist() + df.loc[missing & mt, 'bus1'].unique().tolist()
+            message(f'{int(missing.sum())} cargas {loads[0].entity.strip("_")} sem tensão definida (transformador/barra não encontrado) '
+                  f'e não foram criadas: {", ".join(map(str, chaves))}')
+
     def limitar_potencia_cargasBT(self): #settings - Limitar potência de cargas BT(potência ativa do transformador)
         loadbtkw = Transformer.dict_pot_tr(trload=self.transformer)
         if float(self.kw) > loadbtkw*0.92:
@@ -354,74 +411,97 @@ class Load:
             return(self.kw)
 
     def full_string(self) -> str: 
-        if self._energia_total == 0 or f'{self.entity}{self.load}' in elem_isolados():
+        if self._energia_total == 0:
             return("")
-            
-        if "MT" not in self.entity:
-            # if self.transformer in Transformer.list_dsativ() or self.transformer not in Transformer.dict_kv().keys(): #remove as cargas desativadas
-            #     return("")
-            if settings.intAdequarPotenciaCarga: #settings adequar potência das cargas BT(limitar a potência ativa do Transformador BT)
-                self.kw = Load.limitar_potencia_cargasBT(self)
-            
-        kw = math.trunc(float(self.kw) * 10**6)/ 10**6 #truncando de acordo com o geoperdas
-        kv,models = Load.adapting_string_variables_load(self)
-        return f'New \"Load.{self.entity}{self.load}_M1" bus1="{self.bus1}.{self.bus_nodes}" ' \
-                f'phases={self.phases} conn={self.conn} model={models[0]} kv={kv:.9f} kw = {kw/2} '\
-                f'pf={self.pf} status=variable vmaxpu={self.vmaxpu} vminpu={self.vminpu} ' \
-                f'daily="{self.daily}_{self.tip_dia}" {self._flag_limitcarga} \n'\
-                f'New \"Load.{self.entity}{self.load}_M2" bus1="{self.bus1}.{self.bus_nodes}" ' \
-                f'phases={self.phases} conn={self.conn} model={models[1]} kv={kv:.9f} kw = {kw/2} '\
-                f'pf={self.pf} status=variable vmaxpu={self.vmaxpu} vminpu={self.vminpu} ' \
-                f'daily="{self.daily}_{self.tip_dia}" {self._flag_limitcarga}'
-                
-            
-    def __repr__(self):
-        if self._energia_total == 0 or f'{self.entity}{self.load}' in elem_isolados():
-            return("")
-            
-        if "MT" not in self.entity:
-            # if self.transformer in Transformer.list_dsativ() or self.transformer not in Transformer.dict_kv().keys(): #remove as cargas desativadas
-            #     return("")
-            if settings.intAdequarPotenciaCarga: #settings adequar potência das cargas BT(limitar a potência ativa do Transformador BT)
-                self.kw = Load.limitar_potencia_cargasBT(self)
-            
-        kw = math.trunc(float(self.kw) * 10**6)/ 10**6 #truncando de acordo com o geoperdas
-        kv,models = Load.adapting_string_variables_load(self)
-        return f'New \"Load.{self.entity}{self.load}_M1" bus1="{self.bus1}.{self.bus_nodes}" ' \
-                f'phases={self.phases} conn={self.conn} model={models[0]} kv={kv:.9f} kw = {kw/2} '\
-                f'pf={self.pf} status=variable vmaxpu={self.vmaxpu} vminpu={self.vminpu} ' \
-                f'daily="{self.daily}_{self.tip_dia}" {self._flag_limitcarga} \n'\
-                f'New \"Load.{self.entity}{self.load}_M2" bus1="{self.bus1}.{self.bus_nodes}" ' \
-                f'phases={self.phases} conn={self.conn} model={models[1]} kv={kv:.9f} kw = {kw/2} '\
-                f'pf={self.pf} status=variable vmaxpu={self.vmaxpu} vminpu={self.vminpu} ' \
-                f'daily="{self.daily}_{self.tip_dia}" {self._flag_limitcarga}'
-
-    # @jit(nopython=True)
-    def calculate_kw(self, df, tip_dia="", mes="01"):
-        global df_energ_load
-        df = df.copy()
-        df["prop_pot_tipdia_mes"] = None 
-        #print('aqui')
+        return self.render_variant(self.string_template(), float(self.kw), self.tip_dia)
 
-        try:
-            for index, row in df.iterrows():
-                df.loc[index, "prop_pot_tipdia_mes"] = row["prop"]*return_day_type(index,mes) 
-                
-
-            prop_pot_mens_mes = df["prop_pot_tipdia_mes"][tip_dia]/(df["prop_pot_tipdia_mes"].sum()) #Tirar aqui o propenermensal(TIPDIA)(MES) para cada carga
+    def string_template(self):
+        """
+        Builds the parts of the load lines that are the same in every day type/month variant of the load.
 
-            pot_atv_media = df["soma_pot"][tip_dia]/24
-            pot_atv_max = max(df["pot_atv"][tip_dia])
-            fc = pot_atv_media/pot_atv_max #tirar aqui o fcDU/fcDO/fcSA para cada carga
-            if self._energia_total != 0: #não cria df de cargas com energia zerada
-                Load.create_df_loads(self,tip_dia,mes,df['COD_ID'][tip_dia],prop_pot_mens_mes,fc) #cria o dataframe para usar no cálculo das perdas técnicas
+        Returns:
+            tuple: (_M1 prefix up to "kw = ", _M2 prefix up to "kw = ", suffix after the kW up to vminpu),
+                or None when the load is not written (zero energy, isolated element or without kV).
+                With settings.loadModel "model8" the first prefix is the single ZIPV load and the second is None.
+        """
+        if self._isolado is None:
+            self._isolado = f'{self.entity}{self.load}' in elem_isolados()
+        if self._energia_total == 0 or self._isolado:
+            return None
+        kv,models = Load.adapting_string_variables_load(self)
+        if kv is None or np.isnan(kv): #sem tensão definida (ver prepare_loads)
+            return None
+        bus = f'bus1="{self.bus1}.{self.bus_nodes}" phases={self.phases} conn={self.conn}'
+        suffix = f' pf={self.pf} status=variable vmaxpu={self.vmaxpu} vminpu={self.vminpu}'
+        if settings.loadModel == "model8": #uma única carga com os coeficientes ZIPV equivalentes a _M1 + _M2
+            return (f'New \"Load.{self.entity}{self.load}" {bus} model=8 ZIPV={zipv_modelo_carga(models)} kv={kv:.9f} kw = ', None, suffix)
+        return (f'New \"Load.{self.entity}{self.load}_M1" {bus} model={models[0]} kv={kv:.9f} kw = ',
+                f'New \"Load.{self.entity}{self.load}_M2" {bus} model={models[1]} kv={kv:.9f} kw = ',
+                suffix)
+
+    def render_variant(self, template, kw, tip_dia) -> str:
+        """
+        Fills the load template with the kW of one day type/month variant (same text as full_string).
 
-            return (getattr(self, f'energia_{mes}')*(prop_pot_mens_mes)/(return_day_type(tip_dia, mes)*24*fc))#kw tipo dia (DU/SA/DO)
+        Args:
+            template (tuple): Parts returned by string_template.
+            kw (float): kW of the load in this day type/month (NaN when there is no loadshape).
+            tip_dia (str): Day type (DU/SA/DO).
+        """
+        if template is None or np.isnan(kw):
+            return ""
+        kw = self._variant_kw(kw)
+        m1, m2, suffix = template
+        daily = f'daily="{self.daily}_{tip_dia}" {self._flag_limitcarga}'
+        if m2 is None: #model8
+            return f'{m1}{kw}{suffix} {daily}'
+        return f'{m1}{kw/2}{suffix} {daily} \n{m2}{kw/2}{suffix} {daily}'
+
+    def yearly_string(self, template, kw) -> str:
+        """
+        Renders the load with its yearly loadshape (used when settings.gerYearly is set).
 
-        except KeyError: #TODO implementar uma curva default quando não houver loadshape na BDGD 
+        Args:
+            template (tuple): Parts returned by string_template.
+            kw (float): Peak kW of the load in the year (NaN when there is no yearly loadshape).
+        """
+        if template is None or np.isnan(kw):
+            return ""
+        kw = self._variant_kw(kw)
+        m1, m2, suffix = template
+        yearly = f'yearly="{self.daily}_ANUAL" {self._flag_limitcarga}'
+        if m2 is None: #model8
+            return f'{m1}{kw}{suffix} {yearly}'
+        return f'{m1}{kw/2}{suffix} {yearly} \n{m2}{kw/2}{suffix} {yearly}'
+
+    def edit_variant(self, template, kw, tip_dia) -> str:
+        """
+        Returns the OpenDSS edits that turn the load of the definition file into one day type/month variant
+        (used when settings.loadFileMode is "compact").
 
-            print("There's no corresponding loadshape for this load")
+        Args:
+            template (tuple): Parts returned by string_template.
+            kw (float): kW of the load in this day type/month (NaN when there is no loadshape).
+            tip_dia (str): Day type (DU/SA/DO).
+        """
+        if template is None:
+            return ""
+        names = [f'{self.entity}{self.load}'] if template[1] is None else [f'{self.entity}{self.load}_M1', f'{self.entity}{self.load}_M2']
+        if np.isnan(kw): #a carga não existe nesta variante
+            return "\n".join(f'Edit "Load.{name}" enabled=no' for name in names)
+        kw = self._variant_kw(kw) / len(names)
+        return "\n".join(f'Edit "Load.{name}" kw={kw} daily="{self.daily}_{tip_dia}" {self._flag_limitcarga}' for name in names)
+
+    def _variant_kw(self, kw) -> float:
+        """Applies the BT power limit (settings) and the GeoPerdas truncation to the kW of one variant."""
+        self._flag_limitcarga = ""
+        if "MT" not in self.entity and settings.intAdequarPotenciaCarga: #settings adequar potência das cargas BT(limitar a potência ativa do Transformador BT)
+            self.kw = kw
+            kw = Load.limitar_potencia_cargasBT(self)
+        return math.trunc(float(kw) * 10**6)/ 10**6 #truncando de acordo com o geoperdas
 
+    def __repr__(self):
+        return self.full_string()
 
     @staticmethod
     def _process_static(load_, value):
@@ -523,40 +603,188 @@ class Load:
 
 
     @staticmethod
-    def _create_output_load_files(dict_loads_tip_day: dict, tip_day: str, feeder: str, name: str, pastadesaida: str = ""):
+    def _register_output_load_files(loads: list, kw: Optional[np.ndarray], tip_dias: list, feeder: str, name: str, pastadesaida: str = ""):
+        """
+        Queues the loads of one entity to be written by write_output_load_files.
 
-        load_file_names = []
-        load_lists= []
+        UCBT and PIP share the CargasBT files, so their loads are kept until both are known and then written
+        together in a single pass.
 
-        for key, value in dict_loads_tip_day.items():
-            load_file_names.append(f'{name[:8]}_{tip_day}{key}')
-            load_lists.append(value)
+        Args:
+            loads (list): Load objects of the entity.
+            kw (Optional[np.ndarray]): (loads x tip_dias x 12) kW array, None when the entity has no variants.
+            tip_dias (list): Day types of the kW array.
+            feeder (str): Feeder code.
+            name (str): Name of the entity output file (e.g. CargasBT).
+            pastadesaida (str): Output folder.
+
+        Returns:
+            str: Name of the first file (DU, month 01), referenced by the master.
+        """
+        _pending_load_files.setdefault((name[:8], feeder, pastadesaida), []).append((name, loads, kw, tip_dias))
+        return output_file_name(f'{name[:8]}_DU01', feeder)
 
-        return create_output_file(object_lists=load_lists,file_name=name, file_names= load_file_names, feeder=feeder, output_folder=pastadesaida)
+    @staticmethod
+    def write_output_load_files():
+        """Writes the 36 files (DU/SA/DO x 12 months) of every load group queued by create_load_from_json."""
+        for (prefixo, feeder, pastadesaida), grupos in _pending_load_files.items():
+            if settings.loadFileMode == "compact":
+                Load._create_compact_load_files(grupos, prefixo, feeder, pastadesaida)
+            else:
+                Load._create_output_load_files(grupos, prefixo, feeder, pastadesaida)
+        _pending_load_files.clear()
 
     @staticmethod
-    def compute_pre_kw(dataframe: gpd.geodataframe.GeoDataFrame):
-        dataframe['loadshape'] = None
-        dataframe['pot_atv'] = None
-        
-        for i in range(0,len(dataframe)):
-            # pot_atv_normal, pot_atv = process_loadshape(dataframe.filter(regex='^POT').loc[i,:].to_list())        # manda uma lista com os 96 valores de uma carga apenas
-            pot_atv_normal, pot_atv = process_loadshape(dataframe.filter(regex='^POT').loc[i,:].to_list())        # manda uma lista com os 96 valores de uma carga apenas
+    def reset_feeder_state():
+        """
+        Discards the per-feeder load state that was not written: the loads queued for the 36 load files, the loads of
+        the yearly files and the rows of the technical-loss table (e.g. when a stage of the feeder failed).
+        """
+        _pending_load_files.clear()
+        _yearly_loads.clear()
+        _df_energ_load_parts.clear()
+
+    @staticmethod
+    def _variant_positions(kw: Optional[np.ndarray], tip_dias: list) -> dict:
+        """Position (tip_dia, mes) of each variant file in the kW array (the last repeated day type prevails)."""
+        if kw is None:
+            return {}
+        return {(tip_dia, mes): (t, m) for t, tip_dia in enumerate(tip_dias) for m, mes in enumerate(MESES)}
+
+    @staticmethod
+    def _create_output_load_files(grupos: list, prefixo: str, feeder: str, pastadesaida: str = ""):
+        """
+        Writes the 36 load files (DU/SA/DO x 12 months) in a single pass over the loads of every group.
+
+        The invariant part of each load is formatted once (string_template) and only the kW is
+        filled in for each variant. The lines are joined in blocks before being written.
+
+        Args:
+            grupos (list): (name, loads, kw, tip_dias) of each entity written in these files (e.g. UCBT and PIP).
+            prefixo (str): Prefix of the file names (CargasBT or CargasMT).
+            feeder (str): Feeder code.
+            pastadesaida (str): Output folder.
+        """
+        variants = [(tip_dia, mes) for tip_dia in TIP_DIAS_PERDAS for mes in MESES]
 
+        try:
+            with ExitStack() as stack:
+                files = {variant: stack.enter_context(open_output_file(output_file_name(f'{prefixo}_{variant[0]}{variant[1]}', feeder), feeder, pastadesaida))
+                         for variant in variants}
+                for _, loads, kw, tip_dias in grupos:
+                    positions = Load._variant_positions(kw, tip_dias)
+                    written = [variant for variant in variants if variant in positions]
+                    buffers = {variant: [] for variant in written}
+                    for n, load in enumerate(loads):
+                        template = load.string_template()
+                        for variant in written:
+                            t, m = positions[variant]
+                            buffers[variant].append(load.render_variant(template, kw[n, t, m], variant[0]))
+                        if (n + 1) % BLOCO_SAIDA == 0 or n == len(loads) - 1:
+                            for variant, lines in buffers.items():
+                                files[variant].write("\n".join(lines) + "\n")
+                                lines.clear()
+        except Exception as e:
+            message(f"An error occurred: {str(e)}", level="error")
+
+    @staticmethod
+    def _create_compact_load_files(grupos: list, prefixo: str, feeder: str, pastadesaida: str = ""):
+        """
+        Writes the loads once in a definition file per entity and, for each of the 36 variants (DU/SA/DO x 12 months),
+        a short file that redirects the definitions and edits only the kW and the daily loadshape of each load.
+
+        The variant files keep the names of the full mode (e.g. CargasBT_DU01_...), so the masters are the same.
+
+        Args:
+            grupos (list): (name, loads, kw, tip_dias) of each entity written in these files (e.g. UCBT and PIP).
+            prefixo (str): Prefix of the file names (CargasBT or CargasMT).
+            feeder (str): Feeder code.
+            pastadesaida (str): Output folder.
+        """
+        variants = [(tip_dia, mes) for tip_dia in TIP_DIAS_PERDAS for mes in MESES]
 
-            dataframe.at[i,'loadshape'] = pot_atv_normal
-            dataframe.at[i,'pot_atv'] = pot_atv
+        try:
+            with ExitStack() as stack:
+                files = {variant: stack.enter_context(open_output_file(output_file_name(f'{prefixo}_{variant[0]}{variant[1]}', feeder), feeder, pastadesaida))
+                         for variant in variants}
+                for name, loads, kw, tip_dias in grupos:
+                    definition_name = output_file_name(name, feeder)
+                    positions = Load._variant_positions(kw, tip_dias)
+                    written = [variant for variant in variants if variant in positions]
+                    definitions = []
+                    edits = {variant: [f'Redirect "{definition_name}"'] for variant in variants}
+
+                    for n, load in enumerate(loads):
+                        template = load.string_template()
+                        if template is None or not written:
+                            continue
+                        variant_kw = [kw[(n,) + positions[variant]] for variant in written]
+                        first = next((i for i, value in enumerate(variant_kw) if not np.isnan(value)), None)
+                        if first is None: #sem curva de carga em nenhuma variante
+                            continue
+                        definitions.append(load.render_variant(template, variant_kw[first], written[first][0]))
+                        for variant, value in zip(written, variant_kw):
+                            edits[variant].append(load.edit_variant(template, value, variant[0]))
+
+                    with open_output_file(definition_name, feeder, pastadesaida) as definition:
+                        write_elements(definition, definitions)
+                    for variant, lines in edits.items():
+                        write_elements(files[variant], lines)
+        except Exception as e:
+            message(f"An error occurred: {str(e)}", level="error")
 
-        dataframe = dataframe.loc[:, ['COD_ID', 'TIP_DIA', 'loadshape', 'pot_atv']]
+    @staticmethod
+    def compute_pre_kw(dataframe: gpd.geodataframe.GeoDataFrame):
+        curves = get_crvcrg_curves(dataframe)
+        dataframe = pd.DataFrame({'COD_ID': curves.cod_ids, 'TIP_DIA': curves.tip_dias,
+                                  'loadshape': list(curves.minmax_normalized), 'pot_atv': list(curves.medias)})
         dataframe.set_index('TIP_DIA', inplace=True)
-        #print('aqui')
-        # dataframe['soma_pot'] = np.sum(np.array(dataframe['pot_atv'].tolist()), axis=1)
-        dataframe['soma_pot'] = dataframe['pot_atv'].apply(np.sum)
+        dataframe['soma_pot'] = curves.medias.sum(axis=1)
         pot_classe = dataframe['soma_pot'].sum()
         dataframe['prop'] = dataframe['soma_pot'] / pot_classe
         return dataframe
 
 
+    @staticmethod
+    def coefficient_table(crv_dataframe: gpd.geodataframe.GeoDataFrame, tip_dias: list) -> CoefficientTable:
+        """
+        Returns the loadshape coefficient table (TIP_CC x day type x month) of the BDGD.
+
+        The table only depends on CRVCRG and on the BDGD year, so it is computed on the first
+        call and reused by every entity (UCBT, PIP, UCMT) and every feeder.
+        """
+        table = get_coefficient_table(crv_dataframe, tip_dias)
+        if table is None:
+            table = store_coefficient_table(crv_dataframe, create_coefficient_table(Load.compute_pre_kw(crv_dataframe), tip_dias))
+        return table
+
+    @staticmethod
+    def compute_kw_loads(loads: list, coeficientes: CoefficientTable) -> np.ndarray:
+        """
+        Computes the kW of every load for every day type and month in a single vectorized step.
+
+        Args:
+            loads (list): Load objects created from the BDGD rows.
+            coeficientes (CoefficientTable): Coefficients of the BDGD loadshapes.
+
+        Returns:
+            np.ndarray: (loads x tip_dias x 12) kW array.
+        """
+        energia = np.array([[getattr(load, f'energia_{mes}') for mes in MESES] for load in loads], dtype=float).reshape(len(loads), len(MESES))
+        class_index = coeficientes.index(load.daily for load in loads)
+        kw = compute_kw(energia, class_index, coeficientes)
+
+        missing = np.isnan(kw).any(axis=(1, 2))
+        if missing.any(): #TODO implementar uma curva default quando não houver loadshape na BDGD
+            tip_ccs = sorted({f'{loads[n].daily}' for n in np.flatnonzero(missing)})
+            message(f"There's no corresponding loadshape for {int(missing.sum())} loads (TIP_CC: {', '.join(tip_ccs)})")
+
+        if settings.gerTabelaPerdas:
+            energia_total = np.array([load._energia_total for load in loads], dtype=float)
+            selected = np.flatnonzero(~missing & (energia_total != 0)) #não cria df de cargas com energia zerada
+            Load.create_df_loads([loads[n] for n in selected], class_index[selected], coeficientes) #tabela usada no cálculo das perdas técnicas
+        return kw
+
     @staticmethod
     def _create_load_from_row(load_config, row, entity, id):
 
@@ -588,73 +816,159 @@ class Load:
         # global _kVbase_GLOBAL #TODO Verificar com o Ezequiel
         # _kVbase_GLOBAL = kVbaseObj.MV_kVbase
 
-        DU_meses = {"01": [],"02": [],"03": [],"04": [],"05": [],"06": [],"07": [],"08": [],"09": [],"10": [],"11": [],"12": []}
-        DO_meses = {"01": [],"02": [],"03": [],"04": [],"05": [],"06": [],"07": [],"08": [],"09": [],"10": [],"11": [],"12": []}
-        SA_meses = {"01": [],"02": [],"03": [],"04": [],"05": [],"06": [],"07": [],"08": [],"09": [],"10": [],"11": [],"12": []}
-
-        meses = [f"{mes:02d}" for mes in range(1, 13)]
-
         load_config = json_data['elements']['Load'][entity] 
         interactive = load_config.get('interactive')
-        crv_dataframe = Load.compute_pre_kw(crv_dataframe)
         # dataframe = dataframe.head(200)
 
-        progress_bar = tqdm(dataframe.iterrows(), total=len(dataframe), desc="Load", unit=" loads", ncols=100)
-        for _, row in progress_bar:
+        loads = []
+        for _, row in progress(dataframe.iterrows(), total=len(dataframe), desc=f"Load {entity}", unit=" loads"):
             load_ = Load._create_load_from_row(load_config, row, entity, _)
-            crv_dataframe_aux = crv_dataframe[crv_dataframe['COD_ID'] == f'{load_.daily}']
+            loads.append(load_)
 
-            if interactive is not None: #parametro_iteravel, objeto
-                for i in interactive['tip_dias']:
 
-                    for mes in meses:
-                        new_load = copy.deepcopy(load_)
-                        new_load.tip_dia = i
-                        new_load.kw = new_load.calculate_kw(df=crv_dataframe_aux, tip_dia=i, mes=mes) #TODO observar aqui o problema dos loadshapes
+        Load.prepare_loads(loads)
 
-                        if i=="DU":
-                            DU_meses[mes].append(new_load)
-                        elif i =="SA":
-                            SA_meses[mes].append(new_load)
-                        elif i =="DO":
-                            DO_meses[mes].append(new_load)
+        kw = None
+        tip_dias = []
+        if interactive is not None: #parametro_iteravel, objeto
+            tip_dias = interactive['tip_dias']
+            kw = Load.compute_kw_loads(loads, Load.coefficient_table(crv_dataframe, tip_dias))
 
+        file_name = Load._register_output_load_files(loads, kw, tip_dias, name= load_config["arquivo"], feeder=load_.feeder, pastadesaida=pastadesaida)
+        if settings.gerYearly:
+            _yearly_loads.append((load_config["arquivo"], loads))
 
-            progress_bar.set_description(f"Processing load {entity} {_ + 1}")
-        global df_energ_load
-        df_energ_load['CodDist'] = get_cod_year_bdgd()
-        file_name = Load._create_output_load_files(DU_meses, "DU", name= load_config["arquivo"], feeder=load_.feeder, pastadesaida=pastadesaida)
-        Load._create_output_load_files(SA_meses, "SA", name= load_config["arquivo"], feeder=load_.feeder, pastadesaida=pastadesaida)
-        Load._create_output_load_files(DO_meses, "DO", name= load_config["arquivo"], feeder=load_.feeder, pastadesaida=pastadesaida)
+        return loads, file_name
 
-        return DU_meses, file_name
-        #return load_, file_name
+    @staticmethod
+    def create_yearly_files(crv_dataframe: gpd.geodataframe.GeoDataFrame, feeder: str, pastadesaida: str = "") -> list:
+        """
+        Writes the yearly loadshapes (one per TIP_CC, one point per hour of the BDGD year) and the loads of the
+        feeder with `yearly=` assignments, for a single yearly solve instead of the 36 daily masters.
 
-    def create_df_loads(self,tip_dia,mes,crvcarga,prop,fc):
-        global df_energ_load
-        if df_energ_load.empty:
-            columns = ['CodDist','CodConsBT','TipCrvaCarga','CodAlim','CodTrafo','fcDU','fcSA','fcDO','PropEnerMensDU01','PropEnerMensDU02','PropEnerMensDU03',
-                    'PropEnerMensDU04','PropEnerMensDU05','PropEnerMensDU06','PropEnerMensDU07','PropEnerMensDU08','PropEnerMensDU09','PropEnerMensDU10','PropEnerMensDU11',
-                    'PropEnerMensDU12','PropEnerMensSA01','PropEnerMensSA02','PropEnerMensSA03','PropEnerMensSA04','PropEnerMensSA05','PropEnerMensSA06','PropEnerMensSA07'
-                    ,'PropEnerMensSA08','PropEnerMensSA09','PropEnerMensSA10','PropEnerMensSA11','PropEnerMensSA12','PropEnerMensDO01','PropEnerMensDO02','PropEnerMensDO03',
-                    'PropEnerMensDO04','PropEnerMensDO05','PropEnerMensDO06','PropEnerMensDO07','PropEnerMensDO08','PropEnerMensDO09','PropEnerMensDO10','PropEnerMensDO11',
-                    'PropEnerMensDO12']
-            
-            df_energ_load = pd.DataFrame(columns=columns)
-            df_energ_load['CodAlim'] = self.feeder 
-            df_energ_load.set_index('CodConsBT', inplace=True)
-        else:
-            ...
+        Args:
+            crv_dataframe (gpd.geodataframe.GeoDataFrame): CRVCRG of the BDGD.
+            feeder (str): Feeder code.
+            pastadesaida (str): Output folder.
+
+        Returns:
+            list: Names of the yearly loadshape file and of the yearly load files (CargasBT/CargasMT).
+        """
+        grupos = list(_yearly_loads)
+        _yearly_loads.clear()
+        loads = [load for _, group in grupos for load in group]
+
+        table = Load.coefficient_table(crv_dataframe, TIP_DIAS_PERDAS)
+        energia = np.array([[getattr(load, f'energia_{mes}') for mes in MESES] for load in loads], dtype=float).reshape(len(loads), len(MESES))
+        class_index = table.index(load.daily for load in loads)
+        valid = (class_index >= 0) & (energia.sum(axis=1) != 0)
+
+        # participação mensal da energia de cada classe no alimentador
+        class_energy = np.zeros((len(table.classes), len(MESES)))
+        np.add.at(class_energy, class_index[valid], energia[valid])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            class_share = class_energy / class_energy.sum(axis=1, keepdims=True)
+
+        tipos_dia, meses_dia = day_type_calendar(int(get_cod_year_bdgd()[0:4]))
+        shapes, peak = create_yearly_shapes(table, daily_multipliers(get_crvcrg_curves(crv_dataframe), table), class_share, tipos_dia, meses_dia)
+
+        loadshapes = []
+        for position in np.unique(class_index[valid]):
+            if np.isnan(peak[position]) or peak[position] == 0:
+                message(f'Loadshape anual não criado para a classe {table.classes[position]}')
+                continue
+            loadshape_ = LoadShape(_interval=1, _npts=shapes.shape[1], _tipocc=table.classes[position], _tipodia="ANUAL")
+            if binary_loadshapes():
+                loadshape_.write_binary_mult(shapes[position], feeder, pastadesaida)
+            else:
+                loadshape_.loadshape_str = ', '.join(map(str, np.round(shapes[position], 9)))
+            loadshapes.append(loadshape_)
+        file_names = [create_output_file(loadshapes, "CurvaCargaAnual", feeder=feeder, output_folder=pastadesaida)]
+
+        kw = np.where(valid, energia.sum(axis=1) * peak[np.where(valid, class_index, 0)], np.nan)
+        load_strings = {}
+        n = 0
+        for name, group in grupos:
+            strings = load_strings.setdefault(name[:8], [])
+            for load in group:
+                strings.append(load.yearly_string(load.string_template(), kw[n]))
+                n += 1
+        for name, strings in load_strings.items():
+            file_names.append(create_output_file(strings, f'{name}_Anual', feeder=feeder, output_folder=pastadesaida))
+        return file_names
 
-        df_energ_load.at[self.load, f'PropEnerMens{tip_dia}{mes}'] = prop
-        df_energ_load.at[self.load, f'fc{tip_dia}'] = fc
-        df_energ_load.at[self.load, 'TipCrvaCarga'] = crvcarga
-        df_energ_load.at[self.load, 'CodAlim'] = self.feeder
-        df_energ_load.at[self.load, 'CodTrafo'] = self.transformer
+    @staticmethod
+    def create_df_loads(loads: list, class_index: np.ndarray, coeficientes: CoefficientTable):
+        """
+        Collects the PropEnerMens/fc rows of the technical-loss table for a group of loads.
 
-    def export_df_loads():
+        The rows are kept as arrays and only assembled into a DataFrame once per feeder, by df_loads().
+
+        Args:
+            loads (list): Load objects with a loadshape and nonzero energy.
+            class_index (np.ndarray): (loads,) position of each load's TIP_CC in the coefficient table.
+            coeficientes (CoefficientTable): Coefficients of the BDGD loadshapes.
+        """
+        if len(loads) == 0:
+            return
+        fc, prop = proportion_arrays(class_index, coeficientes)
+        _df_energ_load_parts.append({
+            'CodConsBT': [load.load for load in loads],
+            'TipCrvaCarga': [coeficientes.classes[position] for position in class_index],
+            'CodAlim': [load.feeder for load in loads],
+            'CodTrafo': [load.transformer for load in loads],
+            'fc': fc,
+            'prop': prop,
+        })
+
+    @staticmethod
+    def df_loads() -> pd.DataFrame:
+        """
+        Assembles the technical-loss table (PropEnerMens and fc of each load) collected for the current feeder.
+
+        Returns:
+            pd.DataFrame: One row per load, with the columns of the GeoPerdas load proportion table.
+        """
         global df_energ_load
-        df_energ_load.to_csv(r"C:\Users\mozar\OneDrive\Desktop\creluz\tabelapropcargas.csv",sep=';',encoding='utf-8', index=False)
-        return(print('Tabela de perdas técnicas criada'))
+        if not _df_energ_load_parts:
+            df_energ_load = pd.DataFrame(columns=COLUNAS_TABELA_PERDAS)
+            return df_energ_load
+
+        data = {'CodDist': get_cod_year_bdgd()}
+        for column in ['CodConsBT', 'TipCrvaCarga', 'CodAlim', 'CodTrafo']:
+            data[column] = [value for part in _df_energ_load_parts for value in part[column]]
+        fc = np.concatenate([part['fc'] for part in _df_energ_load_parts])
+        prop = np.concatenate([part['prop'] for part in _df_energ_load_parts])
+        for t, tip_dia in enumerate(TIP_DIAS_PERDAS):
+            data[f'fc{tip_dia}'] = fc[:, t]
+        for t, tip_dia in enumerate(TIP_DIAS_PERDAS):
+            for m, mes in enumerate(MESES):
+                data[f'PropEnerMens{tip_dia}{mes}'] = prop[:, t, m]
+
+        df_energ_load = pd.DataFrame(data, columns=COLUNAS_TABELA_PERDAS)
+        return df_energ_load
+
+    @staticmethod
+    def export_df_loads(feeder: str, output_folder: Optional[str] = None, formato: str = "csv"):
+        """
+        Writes the technical-loss table of the feeder to its output folder and starts a new one.
+
+        Args:
+            feeder (str): Feeder code (COD_ID of CTMT).
+            output_folder (Optional[str]): Base output folder (the feeder folder is created inside it).
+            formato (str): "csv" (separated by ';') or "parquet".
+        """
+        df = Load.df_loads()
+        _df_energ_load_parts.clear()
+
+        if formato == "parquet":
+            file_name = f'TabelaPropCargas_{feeder}.parquet'
+            with open_output_file(file_name, feeder, output_folder, 'wb') as file:
+                df.to_parquet(file, index=False)
+        else:
+            file_name = f'TabelaPropCargas_{feeder}.csv'
+            with open_output_file(file_name, feeder, output_folder, newline="", encoding='utf-8') as file:
+                df.to_csv(file, sep=';', index=False)
+        message(f'Tabela de perdas técnicas criada: {output_file_location(file_name, feeder, output_folder)}')
     
         
\ No newline at end of file
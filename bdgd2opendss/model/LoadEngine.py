@@ -0,0 +1,231 @@
+# -*- encoding: utf-8 -*-
+"""
+Motor de cálculo vetorizado das potências (kW) das cargas.
+
+As cargas BT/MT/IP são escritas em 36 variantes (3 tipos de dia x 12 meses). Em vez de
+copiar cada carga 36 vezes e calcular o kW de cada cópia, o kW de todas as cargas é
+calculado de uma só vez como um array denso de formato (cargas x tipos de dia x meses).
+
+Os coeficientes de cada curva de carga (proporção mensal de energia e fator de carga)
+dependem apenas de (TIP_CC, tipo de dia, mês), por isso são calculados uma única vez por
+BDGD e consultados pelo código TIP_CC.
+"""
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from bdgd2opendss.core.Utils import get_cod_year_bdgd
+from bdgd2opendss.model.Count_days import TIPOS_DIA, day_type_counts
+
+MESES = [f"{mes:02d}" for mes in range(1, 13)]
+TIP_DIAS_PERDAS = ["DU", "SA", "DO"]
+
+_coefficient_tables = {} #(BDGD, id da CRVCRG, tipos de dia) -> (CRVCRG, tabela); a CRVCRG fica referenciada para que o id não seja reutilizado
+
+
+@dataclass
+class CoefficientTable:
+    """
+    Coefficients of each loadshape class (TIP_CC) per day type and month.
+
+    Attributes:
+        classes (List[str]): Loadshape classes (CRVCRG COD_ID).
+        tip_dias (List[str]): Day types (e.g. ["DU", "SA", "DO"]).
+        days (np.ndarray): (tip_dias x 12) day counts of the BDGD year.
+        prop (np.ndarray): (classes x tip_dias x 12) share of the monthly energy consumed in each day type (PropEnerMens).
+        fc (np.ndarray): (classes x tip_dias) load factor of each day type.
+        kw_divisor (np.ndarray): (classes x tip_dias x 12) days * 24 * fc, so that kW = ENE_mes * prop / kw_divisor.
+    """
+    classes: List[str]
+    tip_dias: List[str]
+    days: np.ndarray
+    prop: np.ndarray
+    fc: np.ndarray
+    kw_divisor: np.ndarray
+
+    def __post_init__(self):
+        self._positions = {cod_id: position for position, cod_id in enumerate(self.classes)}
+
+    def position(self, tip_cc) -> int:
+        """Returns the position of a TIP_CC code in the table, -1 when there is no loadshape for it."""
+        return self._positions.get(f'{tip_cc}', -1)
+
+    def index(self, tip_ccs: Iterable) -> np.ndarray:
+        """Returns the positions of several TIP_CC codes in the table, -1 when there is no loadshape for them."""
+        return np.array([self.position(tip_cc) for tip_cc in tip_ccs], dtype=int)
+
+
+def day_count_matrix(tip_dias: Sequence[str]) -> np.ndarray:
+    """
+    Returns the number of days of each day type in each month of the BDGD year.
+
+    Args:
+        tip_dias (Sequence[str]): Day types (e.g. ["DU", "SA", "DO"]).
+
+    Returns:
+        np.ndarray: A (len(tip_dias) x 12) array with the day counts from Count_days (day types other than DU/SA count as DO).
+    """
+    contagem = day_type_counts(int(get_cod_year_bdgd()[0:4]))
+    return contagem[[TIPOS_DIA.index(tip_dia) if tip_dia in ("DU", "SA") else 2 for tip_dia in tip_dias]]
+
+
+def create_coefficient_table(crv_dataframe: pd.DataFrame, tip_dias: Sequence[str]) -> CoefficientTable:
+    """
+    Computes the monthly energy share and the load factor of each loadshape class (TIP_CC).
+
+    Args:
+        crv_dataframe (pd.DataFrame): CRVCRG processed by Load.compute_pre_kw (indexed by TIP_DIA,
+            with the columns COD_ID, pot_atv and soma_pot).
+        tip_dias (Sequence[str]): Day types (e.g. ["DU", "SA", "DO"]).
+
+    Returns:
+        CoefficientTable: The coefficients of every class. Day types missing from a class are filled with NaN.
+    """
+    days = day_count_matrix(tip_dias)
+    classes = []
+    props = []
+    fcs = []
+    for cod_id, df in crv_dataframe.groupby('COD_ID', sort=False, observed=True):
+        soma_pot = df['soma_pot']
+        day_index = {tip_dia: position for position, tip_dia in reversed(list(enumerate(df.index)))}
+        # energia relativa de cada tipo de dia no mês, na ordem das linhas da CRVCRG
+        rows_days = day_count_matrix(df.index)
+        prop_pot_tipdia_mes = df['prop'].to_numpy(dtype=float)[:, np.newaxis] * rows_days
+        total = prop_pot_tipdia_mes.sum(axis=0)
+
+        prop = np.full((len(tip_dias), len(MESES)), np.nan)
+        fc = np.full(len(tip_dias), np.nan)
+        for t, tip_dia in enumerate(tip_dias):
+            if tip_dia not in day_index:
+                continue
+            position = day_index[tip_dia]
+            prop[t] = prop_pot_tipdia_mes[position] / total
+            pot_atv_media = soma_pot.iloc[position] / 24
+            pot_atv_max = max(df['pot_atv'].iloc[position])
+            fc[t] = pot_atv_media / pot_atv_max
+        classes.append(str(cod_id))
+        props.append(prop)
+        fcs.append(fc)
+
+    prop = np.array(props).reshape(len(classes), len(tip_dias), len(MESES))
+    fc = np.array(fcs).reshape(len(classes), len(tip_dias))
+    # mantém a ordem das operações do cálculo original (ENE * prop / (dias * 24 * fc)), pois o kW é truncado na 6ª casa
+    kw_divisor = days[np.newaxis, :, :] * 24 * fc[:, :, np.newaxis]
+    return CoefficientTable(classes, list(tip_dias), days, prop, fc, kw_divisor)
+
+
+def get_coefficient_table(crv_dataframe: pd.DataFrame, tip_dias: Sequence[str]) -> Optional[CoefficientTable]:
+    """Returns the coefficient table already computed for this BDGD/CRVCRG, or None."""
+    entrada = _coefficient_tables.get((get_cod_year_bdgd(), id(crv_dataframe), tuple(tip_dias)))
+    if entrada is None or entrada[0] is not crv_dataframe:
+        return None
+    return entrada[1]
+
+
+def store_coefficient_table(crv_dataframe: pd.DataFrame, table: CoefficientTable) -> CoefficientTable:
+    """Keeps the coefficient table of this BDGD/CRVCRG so that the next feeders reuse it."""
+    _coefficient_tables[(get_cod_year_bdgd(), id(crv_dataframe), tuple(table.tip_dias))] = (crv_dataframe, table)
+    return table
+
+
+def reset_coefficient_tables(): #esquece as tabelas já calculadas (fim de cada run, ver Core.reset_caches)
+    _coefficient_tables.clear()
+
+
+def compute_kw(energia: np.ndarray, class_index: np.ndarray, table: CoefficientTable) -> np.ndarray:
+    """
+    Computes the kW of every load for every day type and month.
+
+    kW = ENE_mes * PropEnerMens / (dias_tipo_mes * 24 * fc)
+
+    Args:
+        energia (np.ndarray): (loads x 12) monthly energies (ENE_01..ENE_12).
+        class_index (np.ndarray): (loads,) position of each load's TIP_CC in the table, -1 when missing.
+        table (CoefficientTable): Coefficients of the BDGD loadshapes.
+
+    Returns:
+        np.ndarray: (loads x tip_dias x 12) kW array. Loads without a loadshape get NaN.
+    """
+    if len(table.classes) == 0:
+        return np.full((len(energia), len(table.tip_dias), len(MESES)), np.nan)
+
+    valid = class_index >= 0
+    index = np.where(valid, class_index, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kw = energia[:, np.newaxis, :] * table.prop[index] / table.kw_divisor[index]
+    kw[~valid] = np.nan
+    return kw
+
+
+def proportion_arrays(class_index: np.ndarray, table: CoefficientTable):
+    """
+    Gathers the load factor and the monthly energy share of a group of loads for the technical-loss table.
+
+    Args:
+        class_index (np.ndarray): (loads,) position of each load's TIP_CC in the table (all valid).
+        table (CoefficientTable): Coefficients of the BDGD loadshapes.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (loads x 3) fc and (loads x 3 x 12) PropEnerMens, in the DU/SA/DO order.
+            Day types that are not in the table are filled with NaN.
+    """
+    fc = np.full((len(class_index), len(TIP_DIAS_PERDAS)), np.nan)
+    prop = np.full((len(class_index), len(TIP_DIAS_PERDAS), len(MESES)), np.nan)
+    for t, tip_dia in enumerate(TIP_DIAS_PERDAS):
+        if tip_dia in table.tip_dias:
+            position = table.tip_dias.index(tip_dia)
+            fc[:, t] = table.fc[class_index, position]
+            prop[:, t] = table.prop[class_index, position]
+    return fc, prop
+
+
+def daily_multipliers(curves, table: CoefficientTable) -> np.ndarray:
+    """
+    Aligns the max-normalized 24-point CRVCRG curves with the classes and day types of the coefficient table.
+
+    Args:
+        curves (CrvcrgCurves): Hourly curves of the CRVCRG (CurveEngine.get_crvcrg_curves).
+        table (CoefficientTable): Coefficients of the BDGD loadshapes.
+
+    Returns:
+        np.ndarray: (classes x tip_dias x 24) multipliers. Missing day types are filled with NaN.
+    """
+    mult = np.full((len(table.classes), len(table.tip_dias), 24), np.nan)
+    for row in reversed(range(len(curves.cod_ids))): #a primeira linha de cada classe/tipo de dia prevalece, como no cálculo do kW
+        position = table.position(curves.cod_ids[row])
+        if position >= 0 and curves.tip_dias[row] in table.tip_dias:
+            mult[position, table.tip_dias.index(curves.tip_dias[row])] = curves.max_normalized[row]
+    return mult
+
+
+def create_yearly_shapes(table: CoefficientTable, mult: np.ndarray, class_share: np.ndarray,
+                         tipos_dia: np.ndarray, meses_dia: np.ndarray):
+    """
+    Builds the hourly yearly loadshape of every class from its daily curves and the calendar of the BDGD year.
+
+    The demand of a load in hour h of a day of type t in month m is ENE_m * prop / (days * 24 * fc) * mult[t, h],
+    the same as in the daily files. The monthly energy ENE_m of each load is taken as its annual energy times the
+    monthly share of its class, so one curve per class keeps the annual energy of every load.
+
+    Args:
+        table (CoefficientTable): Coefficients of the BDGD loadshapes.
+        mult (np.ndarray): (classes x tip_dias x 24) daily curves (daily_multipliers).
+        class_share (np.ndarray): (classes x 12) monthly share of the annual energy of each class.
+        tipos_dia (np.ndarray): Day type of each day of the year (Count_days.day_type_calendar).
+        meses_dia (np.ndarray): Month (1 to 12) of each day of the year.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (classes x 24*days) curves normalized to a maximum of 1 and the (classes,)
+            peak factor, so that the kW of a load is its annual energy times the peak factor of its class.
+    """
+    t_index = np.array([table.tip_dias.index(tip_dia) for tip_dia in tipos_dia])
+    m_index = meses_dia - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = class_share[:, np.newaxis, :] * table.prop / table.kw_divisor
+        hourly = factor[:, t_index, m_index][:, :, np.newaxis] * mult[:, t_index, :]
+        hourly = hourly.reshape(len(table.classes), -1)
+        peak = hourly.max(axis=1)
+        shapes = hourly / peak[:, np.newaxis]
+    return shapes, peak
@@ -14,14 +14,24 @@ import copy
 import re
 from typing import Any
 import geopandas as gpd
-from tqdm import tqdm
+from bdgd2opendss.core.Telemetry import progress
 import numpy as np
 
-from bdgd2opendss.model.Converter import process_loadshape2
-from bdgd2opendss.core.Utils import create_output_file
+from bdgd2opendss.model.CurveEngine import get_crvcrg_curves
+from bdgd2opendss.core.Utils import create_output_file, open_output_file
+from bdgd2opendss.core.Settings import settings
 
 from dataclasses import dataclass
 
+FORMATOS_LOADSHAPE = {"text": None, "sngfile": (".sng", np.float32), "dblfile": (".dbl", np.float64)} #settings.loadshapeFormat
+
+
+def binary_loadshapes() -> bool:
+    """Returns True when the multipliers are written to sngfile/dblfile binaries (settings.loadshapeFormat)."""
+    if settings.loadshapeFormat not in FORMATOS_LOADSHAPE:
+        raise ValueError(f"loadshapeFormat inválido: {settings.loadshapeFormat}. Opções: {', '.join(FORMATOS_LOADSHAPE)}")
+    return FORMATOS_LOADSHAPE[settings.loadshapeFormat] is not None
+
 
 @dataclass
 class LoadShape:
@@ -32,6 +42,7 @@ class LoadShape:
     _tipodia: str = "",
     _grupotensao: str = "",
     _loadshape_str: str = ""
+    _mult_file: str = "" #arquivo binário (sngfile/dblfile) com os multiplicadores, quando settings.loadshapeFormat != "text"
 
 
     @property
@@ -84,28 +95,41 @@ class LoadShape:
 
 
     def full_string(self) -> str:
+        if self._mult_file:
+            propriedade = "sngfile" if self._mult_file.endswith(".sng") else "dblfile"
+            return f"New \"Loadshape.{self.tipocc}_{self.tipodia}\" {self.npts} " \
+                   f"{self.interval} {propriedade}=\"{self._mult_file}\""
         return f"New \"Loadshape.{self.tipocc}_{self.tipodia}\" {self.npts} " \
                f"{self.interval} mult=({self.loadshape_str})"
 
     def __repr__(self):
-        return f"New \"Loadshape.{self.tipocc}_{self.tipodia}\" {self.npts} " \
-               f"{self.interval} mult=({self.loadshape_str})"
+        return self.full_string()
 
+    def write_binary_mult(self, mult: np.ndarray, feeder: str, output_folder: str = ""):
+        """
+        Writes the multipliers of the loadshape to a binary file referenced by sngfile/dblfile.
 
-    @staticmethod
-    def compute_loadshape_curve(dataframe: gpd.geodataframe.GeoDataFrame):
-
-        dataframe['loadshape_str'] = None
-
-        for i in range(0,len(dataframe)):
-            mult_list, _ = process_loadshape2(dataframe.filter(regex='^POT').loc[i,:].to_list())        # manda uma lista com os 96 valores de uma carga apenas
+        The file goes to the Loadshapes folder inside the feeder output folder, as float32 (.sng) or
+        float64 (.dbl) according to settings.loadshapeFormat.
 
-            string = list(np.round(mult_list,9))
-            loadshape_str_without_brackets = ', '.join(map(str, string))
+        Args:
+            mult (np.ndarray): Multipliers of the loadshape.
+            feeder (str): Feeder code.
+            output_folder (str): Base output folder.
+        """
+        if not binary_loadshapes():
+            raise ValueError('write_binary_mult requires loadshapeFormat "sngfile" or "dblfile"')
+        extensao, dtype = FORMATOS_LOADSHAPE[settings.loadshapeFormat]
+        nome = f"{self.tipocc}_{self.tipodia}{extensao}"
+        with open_output_file(f"Loadshapes/{nome}", feeder, output_folder, "wb") as file:
+            file.write(memoryview(np.ascontiguousarray(mult, dtype=dtype))) #sem cópia quando mult já tem o dtype do arquivo
+        self._mult_file = f"Loadshapes/{nome}"
 
 
-            dataframe.at[i,'loadshape_str'] = loadshape_str_without_brackets
+    @staticmethod
+    def compute_loadshape_curve(dataframe: gpd.geodataframe.GeoDataFrame):
 
+        dataframe['loadshape_str'] = get_crvcrg_curves(dataframe).loadshape_strings()
 
         return dataframe
 
@@ -143,12 +167,13 @@ class LoadShape:
         if calculated is not None:
             new_dataframe = LoadShape.compute_loadshape_curve(dataframe)
 
-        progress_bar = tqdm(new_dataframe.iterrows(), total=len(new_dataframe), desc="Loadshape", unit="loadshapes", ncols=100)
-        for _, row in progress_bar:
+        curves = get_crvcrg_curves(dataframe)
+        for _, row in progress(new_dataframe.iterrows(), total=len(new_dataframe), desc="Loadshape", unit="loadshapes"):
             loadshape_ = LoadShape._create_loadshape_from_row(loadshape_config, row) ####
+            if binary_loadshapes():
+                loadshape_.write_binary_mult(curves.max_normalized[len(loadshapes)], feeder, pastadesaida)
             loadshapes.append(loadshape_)
 
-            progress_bar.set_description(f"Processing Loadshape {_ + 1}")
 
         file_name = create_output_file(loadshapes, loadshape_config["arquivo"], feeder=feeder, output_folder=pastadesaida)
 
@@ -16,7 +16,7 @@ from typing import Any
 import numpy
 
 import geopandas as gpd
-from tqdm import tqdm
+from bdgd2opendss.core.Telemetry import progress
 
 from bdgd2opendss.model.Converter import convert_ttranf_phases, convert_tfascon_bus, convert_tten, convert_tfascon_conn_load, convert_tfascon_phases, convert_tfascon_phases_load
 from bdgd2opendss.core.Utils import create_output_file, create_voltage_bases
@@ -292,11 +292,9 @@ class PVsystem:
         pvsystems = []
         pvsystem_config = json_data['elements']['PVsystem'][entity]
 
-        progress_bar = tqdm(dataframe.iterrows(), total=len(dataframe), desc="PVsystem", unit=" pvsystems", ncols=100)
-        for _, row in progress_bar:
+        for _, row in progress(dataframe.iterrows(), total=len(dataframe), desc=f"PVsystem {entity}", unit=" pvsystems"):
             pvsystem_ = PVsystem._create_pvsystem_from_row(pvsystem_config, row)
             pvsystems.append(pvsystem_)
-            progress_bar.set_description(f"Processing pvsystem {entity} {_ + 1}")
 
 
         file_name = create_output_file(pvsystems, pvsystem_config["arquivo"], feeder=pvsystem_.feeder, output_folder=pastadesaida)
@@ -16,7 +16,7 @@ from typing import Any
 
 import numpy as np
 import geopandas as gpd
-from tqdm import tqdm
+from bdgd2opendss.core.Telemetry import progress
 
 from bdgd2opendss.model.Converter import convert_ttranf_phases, convert_tfascon_bus, convert_tfascon_phases, convert_tten, convert_ttranf_windings, convert_tfascon_conn, convert_tpotaprt, convert_ptratio
 from bdgd2opendss.core.Utils import create_output_file, ordem_pacs, elem_isolados, seq_eletrica
@@ -470,11 +470,9 @@ class RegControl:
         regcontrols = []
         regcontrol_config = json_data['elements']['RegControl']['EQRE']
 
-        progress_bar = tqdm(dataframe.iterrows(), total=len(dataframe), desc="RegControl", unit=" regcontrols", ncols=100)
-        for _, row in progress_bar:
+        for _, row in progress(dataframe.iterrows(), total=len(dataframe), desc="RegControl", unit=" regcontrols"):
             regcontrol_ = RegControl._create_regcontrol_from_row(regcontrol_config, row)
             regcontrols.append(regcontrol_)
-            progress_bar.set_description(f"Processing regcontrol {_ + 1}")
 
         file_name = create_output_file(regcontrols, regcontrol_config["arquivo"], feeder=regcontrol_.feeder, output_folder=pastadesaida)
 
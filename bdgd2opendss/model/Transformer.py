@@ -16,10 +16,11 @@ from typing import Any, Optional
 import numpy
 from idlelib.pyparse import trans
 import geopandas as gpd
-from tqdm import tqdm
+from bdgd2opendss.core.Telemetry import progress
 
 from bdgd2opendss.model.Converter import convert_ttranf_phases, convert_tfascon_bus, convert_tten, convert_ttranf_windings, convert_tfascon_conn, convert_tpotaprt, convert_tfascon_phases,  convert_tfascon_bus_prim,  convert_tfascon_bus_sec,  convert_tfascon_bus_terc, convert_tfascon_phases_trafo
 from bdgd2opendss.model.Circuit import Circuit
+from bdgd2opendss.model.LineCode import MRT_LINECODE
 from bdgd2opendss.core.Utils import create_output_file, create_df_trafos_vazios, perdas_trafos_abnt, elem_isolados
 from bdgd2opendss.core.Settings import settings
 
@@ -356,6 +357,8 @@ class Transformer:
         return f'New "Reactor.TRF_{self.transformer}_R" phases=1 bus1="{self.bus2}.4" R=15 X=0 basefreq=60'
 
     def pattern_MRT(self):
+        if settings.dedupMRTLinecodes: #linecodes definidos uma vez no arquivo de linecodes (LineCode.mrt_linecodes)
+            return (f'{self._coment}New "Line.Resist_MTR_TRF_{self.transformer}" phases=1 bus1="{self.bus1}.{self.bus1_nodes}" bus2="MRT_{self.bus1}TRF_{self.transformer}.{self.bus1_nodes}" linecode="{MRT_LINECODE}_1" length=0.001 units=km \n')
 
         return (f'{self._coment}New "Linecode.LC_MRT_TRF_{self.transformer}_1" nphases=1 basefreq=60 r1=15000 x1=0 units=km normamps=0\n'
                 f'{self._coment}New "Linecode.LC_MRT_TRF_{self.transformer}_2" nphases=2 basefreq=60 r1=15000 x1=0 units=km normamps=0\n'
@@ -454,6 +457,10 @@ class Transformer:
     @staticmethod    
     def dict_kv():
         return(dicionario_kv)
+
+    @staticmethod
+    def dict_phase_kv():
+        return(dict_phase_kv)
     
     @staticmethod    
     def list_dsativ():
@@ -594,11 +601,9 @@ class Transformer:
         # global _kVbase_GLOBAL 
         # _kVbase_GLOBAL = kVbaseObj.MV_kVbase
 
-        progress_bar = tqdm(dataframe.iterrows(), total=len(dataframe), desc="Transformer", unit=" transformers", ncols=100)
-        for _, row in progress_bar:
+        for _, row in progress(dataframe.iterrows(), total=len(dataframe), desc="Transformer", unit=" transformers"):
             transformer_ = Transformer._create_transformer_from_row(transformer_config, row)
             transformers.append(transformer_)
-            progress_bar.set_description(f"Processing transformer {_ + 1}")
 
         file_name = create_output_file(transformers, transformer_config["arquivo"], feeder=transformer_.feeder, output_folder=pastadesaida)
         #kVbaseObj.LV_kVbase = dicionario_kv
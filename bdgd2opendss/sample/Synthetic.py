@@ -0,0 +1,436 @@
+# -*- encoding: utf-8 -*-
+"""
+Gerador de BDGD sintética para medir o desempenho da conversão em escala.
+
+A BDGD de exemplo é pequena demais para revelar problemas de escala. Este módulo gera um arquivo com as mesmas
+camadas e colunas de configuration.tables (bdgd2dss.json), com:
+
+- alimentadores radiais (CTMT), com rede MT em árvore (SSDMT), chaves fechadas e de manobra abertas (UNSEMT) e
+  um banco regulador (UNREMT/EQRE) no tronco;
+- transformadores (UNTRMT/EQTRMT) ligados à rede MT, cada um com sua rede BT em árvore (SSDBT), ramais (RAMLIG),
+  consumidores BT (UCBT), iluminação pública (PIP) e geração distribuída (UGBT);
+- consumidores e geradores MT (UCMT/UGMT) e curvas de carga típicas (CRVCRG) de DU, SA e DO;
+- ilhas isoladas na rede BT e segmentos com PACs invertidos (PAC_1 a jusante), como nas BDGDs reais.
+
+O arquivo é gravado pelo pyogrio (GeoPackage ou, com GDAL >= 3.6, File Geodatabase), com nome no padrão
+<nome>-D_<código>_<ano>-12-31_V11, de onde Utils.get_cod_year_bdgd extrai o código e o ano.
+
+Uso: python -m bdgd2opendss.sample.Synthetic <pasta> --feeders 10 --mv-segments 2000 --bt-segments 4000
+"""
+import argparse
+import json
+import os
+import pathlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyogrio
+import shapely
+
+CRS_BDGD = "EPSG:4674" #SIRGAS 2000, sistema de coordenadas das BDGDs
+ORIGEM = (-53.5, -29.5) #longitude e latitude do canto da área sintética
+METROS_POR_GRAU = 111_320.0
+DISTANCIA_ALIMENTADORES = 20_000.0 #distância entre as subestações dos alimentadores (m)
+CAMADAS_LINHAS = ("SSDMT", "SSDBT")
+CAMADAS_PONTOS = ("UNSEMT", "UNTRMT", "UNREMT")
+DRIVERS = {".gpkg": "GPKG", ".gdb": "OpenFileGDB"}
+MESES = [f"{mes:02d}" for mes in range(1, 13)]
+TIP_DIAS = ("DU", "SA", "DO")
+
+# condutores (SEGCON): código -> (R1 ohm/km, X1 ohm/km, CMAX A)
+CONDUTORES_MT = {"1": (0.3372, 0.3956, 419.0), "2": (0.6814, 0.4323, 275.0), "3": (1.0710, 0.4493, 206.0)}
+CONDUTORES_BT = {"4": (0.3206, 0.3219, 310.0), "5": (0.6417, 0.3357, 206.0), "6": (1.2130, 0.3512, 135.0)}
+CONDUTORES_RAMAL = {"7": (1.9100, 0.1200, 93.0), "8": (3.0800, 0.1300, 68.0)}
+FASES_BT = (["ABCN", "AN", "BN", "CN", "ABN", "BCN", "CAN"], [0.22, 0.20, 0.20, 0.19, 0.08, 0.06, 0.05])
+FASES_IP = (["CN", "BN", "AN"], [0.9, 0.05, 0.05])
+POTENCIAS_TRAFO = (["13", "16", "20", "24", "30"], [0.15, 0.32, 0.22, 0.18, 0.13]) #códigos de POT_NOM da BDGD
+CLASSES_BT = ("RES", "COM", "IND", "RUR")
+CLASSE_IP = "OUT_IP_1_Dia_util"
+
+
+@dataclass
+class SyntheticBDGD:
+    """
+    Size of the synthetic BDGD.
+
+    Attributes:
+        feeders (int): Number of feeders (CTMT).
+        mv_segments (int): MV edges per feeder (SSDMT segments, switches and the regulator).
+        bt_segments (int): BT segments per feeder (SSDBT), shared among the transformers.
+        consumers_per_transformer (int): BT consumers (UCBT and RAMLIG) per transformer.
+        crvcrg_classes (int): BT loadshape classes (RES/COM/IND/RUR); MT and public lighting classes are added.
+        transformers (Optional[int]): Transformers per feeder (default: one per 8 MV segments).
+        inverted_share (float): Share of segments with inverted PACs.
+        islands (int): Isolated BT islands per feeder.
+        seed (int): Seed of the random generator.
+    """
+    feeders: int = 2
+    mv_segments: int = 1000
+    bt_segments: int = 2000
+    consumers_per_transformer: int = 25
+    crvcrg_classes: int = 12
+    transformers: Optional[int] = None
+    inverted_share: float = 0.05
+    islands: int = 2
+    seed: int = 0
+
+    @property
+    def transformers_per_feeder(self) -> int:
+        return self.transformers if self.transformers is not None else max(1, self.mv_segments // 8)
+
+
+def _radial_tree(rng: np.random.Generator, nos: int, tronco: float = 0.7) -> np.ndarray:
+    """Returns the parent of each node of a radial tree (node 0 is the root, parent[0] = -1)."""
+    indices = np.arange(nos)
+    pais = np.where(rng.random(nos) < tronco, indices - 1, np.floor(rng.random(nos) * indices).astype(int))
+    pais[0] = -1
+    return pais
+
+
+def _coordinates(rng: np.random.Generator, pais: np.ndarray, origem, comprimentos: np.ndarray) -> np.ndarray:
+    """Places the nodes of a tree: each node is one segment length away from its parent (coordinates in metres)."""
+    coords = np.zeros((len(pais), 2))
+    coords[0] = origem
+    direcoes = np.zeros(len(pais))
+    direcoes[0] = rng.uniform(0, 2 * np.pi)
+    desvios = rng.normal(0, 0.5, len(pais))
+    for no in range(1, len(pais)): #o pai sempre vem antes do filho
+        pai = pais[no]
+        direcoes[no] = direcoes[pai] + desvios[no]
+        coords[no] = coords[pai] + comprimentos[no] * np.array([np.cos(direcoes[no]), np.sin(direcoes[no])])
+    return coords
+
+
+def _degrees(coords: np.ndarray) -> np.ndarray:
+    """Converts local coordinates in metres to longitude/latitude around ORIGEM."""
+    lat = ORIGEM[1] + coords[:, 1] / METROS_POR_GRAU
+    lon = ORIGEM[0] + coords[:, 0] / (METROS_POR_GRAU * np.cos(np.radians(lat)))
+    return np.column_stack([lon, lat])
+
+
+def _segments(pac_1: np.ndarray, pac_2: np.ndarray, xy_1: np.ndarray, xy_2: np.ndarray, rng: np.random.Generator,
+              inverted_share: float):
+    """Inverts a share of the segments (PAC_1 downstream, geometry drawn from PAC_1 to PAC_2)."""
+    invertidos = rng.random(len(pac_1)) < inverted_share
+    pac_1, pac_2 = np.where(invertidos, pac_2, pac_1), np.where(invertidos, pac_1, pac_2)
+    xy_1, xy_2 = np.where(invertidos[:, None], xy_2, xy_1), np.where(invertidos[:, None], xy_1, xy_2)
+    linhas = shapely.linestrings(np.stack([_degrees(xy_1), _degrees(xy_2)], axis=1))
+    geometrias = shapely.multilinestrings(linhas, indices=np.arange(len(linhas))) if len(linhas) else linhas
+    return pac_1, pac_2, geometrias
+
+
+def _energies(rng: np.random.Generator, n: int, media: float) -> Dict[str, np.ndarray]:
+    """Monthly energies (ENE_01..ENE_12, kWh) around a mean, with a seasonal variation."""
+    base = rng.lognormal(np.log(media), 0.6, n)
+    sazonal = 1 + 0.15 * np.cos(2 * np.pi * np.arange(12) / 12)
+    energia = np.round(base[:, None] * sazonal[None, :] * rng.uniform(0.85, 1.15, (n, 12)))
+    return {f"ENE_{mes}": energia[:, m] for m, mes in enumerate(MESES)}
+
+
+def _loadshape(rng: np.random.Generator, classe: str, tip_dia: str) -> np.ndarray:
+    """96 quarter-hour points of a typical loadshape of the class and day type."""
+    hora = np.arange(96) / 4
+    if classe == CLASSE_IP:
+        curva = np.where((hora < 6) | (hora >= 18), 1.0, 0.02)
+    elif classe.startswith("RES"):
+        curva = 0.35 + 0.25 * np.exp(-((hora - 7) / 1.5) ** 2) + 0.65 * np.exp(-((hora - 19.5) / 2) ** 2)
+    elif classe.startswith("COM"):
+        curva = 0.2 + 0.8 * np.exp(-((hora - 14) / 4) ** 2)
+    elif classe.startswith("IND"):
+        curva = 0.55 + 0.45 * ((hora >= 7) & (hora < 18))
+    else: #RUR e classes MT
+        curva = 0.4 + 0.3 * np.exp(-((hora - 6) / 1.5) ** 2) + 0.4 * np.exp(-((hora - 18.5) / 2) ** 2)
+    fator = {"DU": 1.0, "SA": 0.85, "DO": 0.7}[tip_dia] if classe != CLASSE_IP else 1.0
+    escala = rng.uniform(0.5, 500.0)
+    return np.round(escala * fator * curva * rng.uniform(0.95, 1.05, 96), 4)
+
+
+def create_crvcrg(rng: np.random.Generator, params: SyntheticBDGD):
+    """
+    Creates the typical loadshapes (one row per class and day type).
+
+    Returns:
+        Tuple[pd.DataFrame, List[str], List[str]]: CRVCRG, BT classes and MT classes.
+    """
+    classes_bt = [f"{CLASSES_BT[i % len(CLASSES_BT)]}_{i // len(CLASSES_BT) + 1}" for i in range(params.crvcrg_classes)]
+    classes_mt = [str(i + 1) for i in range(max(1, params.crvcrg_classes // 4))]
+    linhas = []
+    for classe, grupo in [(c, "BT") for c in classes_bt + [CLASSE_IP]] + [(c, "MT") for c in classes_mt]:
+        for tip_dia in TIP_DIAS:
+            pontos = _loadshape(rng, classe, tip_dia)
+            linhas.append({"COD_ID": classe, "TIP_DIA": tip_dia, "GRU_TEN": grupo,
+                           **{f"POT_{p:02d}": valor for p, valor in enumerate(pontos, start=1)}})
+    return pd.DataFrame(linhas), classes_bt, classes_mt
+
+
+def create_segcon() -> pd.DataFrame:
+    """Creates the conductors used by the MV, BT and service segments."""
+    condutores = {**CONDUTORES_MT, **CONDUTORES_BT, **CONDUTORES_RAMAL}
+    return pd.DataFrame([{"COD_ID": cod, "R1": r1, "X1": x1, "CMAX": cmax} for cod, (r1, x1, cmax) in condutores.items()])
+
+
+def create_feeder(rng: np.random.Generator, params: SyntheticBDGD, indice: int, classes_bt: List[str],
+                  classes_mt: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Creates the tables of one radial feeder.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        params (SyntheticBDGD): Size of the BDGD.
+        indice (int): Feeder number (used in the codes, which are unique in the BDGD).
+        classes_bt (List[str]): BT loadshape classes.
+        classes_mt (List[str]): MT loadshape classes.
+
+    Returns:
+        Dict[str, pd.DataFrame]: Rows of each table of the feeder (geometry in the "geometry" column).
+    """
+    ctmt = f"SIN_{indice:04d}"
+    lado = int(np.ceil(np.sqrt(params.feeders)))
+    origem = np.array([(indice - 1) % lado, (indice - 1) // lado]) * DISTANCIA_ALIMENTADORES
+    tabelas = {}
+
+    tabelas["CTMT"] = pd.DataFrame({"COD_ID": [ctmt], "TEN_NOM": ["49"], "TEN_OPE": [1.0], "PAC_INI": [f"{ctmt}_INI"]})
+
+    # rede MT: árvore com raiz no PAC_INI
+    nos_mt = params.mv_segments + 1
+    pais = _radial_tree(rng, nos_mt)
+    comp_mt = np.round(rng.uniform(20, 120, nos_mt), 2)
+    xy_mt = _coordinates(rng, pais, origem, comp_mt)
+    pacs_mt = np.array([f"{ctmt}_INI"] + [f"M{indice}_{no}" for no in range(1, nos_mt)], dtype=object)
+
+    filhos = np.arange(1, nos_mt)
+    tipo_aresta = np.zeros(nos_mt, dtype=int) #0: segmento, 1: chave, 2: regulador
+    tipo_aresta[filhos[rng.random(len(filhos)) < 0.02]] = 1
+    if nos_mt > 50:
+        tipo_aresta[nos_mt // 10] = 2 #banco regulador no tronco
+    segmentos = filhos[tipo_aresta[filhos] == 0]
+    pac_1, pac_2, geometrias = _segments(pacs_mt[pais[segmentos]], pacs_mt[segmentos], xy_mt[pais[segmentos]],
+                                         xy_mt[segmentos], rng, params.inverted_share)
+    tabelas["SSDMT"] = pd.DataFrame({"COD_ID": [f"SM{indice}_{no}" for no in segmentos], "FAS_CON": "ABC", "PAC_1": pac_1,
+                                     "PAC_2": pac_2, "TIP_CND": rng.choice(list(CONDUTORES_MT), len(segmentos)),
+                                     "COMP": comp_mt[segmentos], "CTMT": ctmt, "POS": "PD", "geometry": geometrias})
+
+    chaves = filhos[tipo_aresta[filhos] == 1]
+    abertas = rng.choice(filhos, size=(max(1, params.mv_segments // 200), 2)) #chaves de manobra (abertas)
+    pac_chaves_1 = np.concatenate([pacs_mt[pais[chaves]], pacs_mt[abertas[:, 0]]])
+    pac_chaves_2 = np.concatenate([pacs_mt[chaves], pacs_mt[abertas[:, 1]]])
+    tabelas["UNSEMT"] = pd.DataFrame({"COD_ID": [f"CH{indice}_{n}" for n in range(len(pac_chaves_1))], "FAS_CON": "ABC",
+                                      "PAC_1": pac_chaves_1, "PAC_2": pac_chaves_2,
+                                      "P_N_OPE": ["F"] * len(chaves) + ["A"] * len(abertas), "CTMT": ctmt,
+                                      "geometry": shapely.points(_degrees(np.concatenate([xy_mt[chaves], xy_mt[abertas[:, 0]]])))})
+
+    reguladores = filhos[tipo_aresta[filhos] == 2]
+    tabelas["UNREMT"] = pd.DataFrame({"COD_ID": [f"RG{indice}_{n}" for n in range(len(reguladores))], "FAS_CON": "ABC",
+                                      "PAC_1": pacs_mt[pais[reguladores]], "PAC_2": pacs_mt[reguladores],
+                                      "TIP_REGU": "DF", "CTMT": ctmt, "BANC": 1, "SIT_ATIV": "AT",
+                                      "geometry": shapely.points(_degrees(xy_mt[reguladores]))})
+    tabelas["EQRE"] = pd.DataFrame([{"LIG_FAS_P": fases, "LIG_FAS_S": fases, "POT_NOM": "42", "PER_FER": 1600.0,
+                                     "PER_TOT": 5200.0, "XHL": 4.0, "TEN_REG": 1.05, "UN_RE": f"RG{indice}_{n}", "REL_TP": "13"}
+                                    for n in range(len(reguladores)) for fases in ("AB", "BC", "CA")])
+
+    # transformadores ligados a nós MT (exceto o PAC_INI)
+    n_trafos = min(params.transformers_per_feeder, nos_mt - 1)
+    nos_trafo = rng.choice(filhos, n_trafos, replace=False)
+    trafos = np.array([f"T{indice}_{t}" for t in range(n_trafos)], dtype=object)
+    secundarios = np.array([f"ET{indice}_{t}" for t in range(n_trafos)], dtype=object)
+    potencias = rng.choice(POTENCIAS_TRAFO[0], n_trafos, p=POTENCIAS_TRAFO[1])
+    per_fer = np.round(rng.uniform(100, 400, n_trafos))
+    tabelas["UNTRMT"] = pd.DataFrame({"SIT_ATIV": "AT", "COD_ID": trafos, "PAC_1": pacs_mt[nos_trafo], "PAC_2": secundarios,
+                                      "PAC_3": "0", "TAP": 1.0, "PER_FER": per_fer, "PER_TOT": per_fer * 5, "CTMT": ctmt,
+                                      "TIP_TRAFO": "T", "MRT": 0, "FAS_CON_P": "ABC", "FAS_CON_S": "ABCN", "FAS_CON_T": "0",
+                                      "TEN_LIN_SE": 0.38, "BANC": 0, "POS": "PD",
+                                      "geometry": shapely.points(_degrees(xy_mt[nos_trafo]))})
+    tabelas["EQTRMT"] = pd.DataFrame({"COD_ID": [f"EQ{indice}_{t}" for t in range(n_trafos)], "POT_NOM": potencias,
+                                      "TEN_PRI": "49", "TEN_SEC": "15", "TEN_TER": "0", "LIG_FAS_P": "ABC",
+                                      "LIG_FAS_S": "ABCN", "LIG_FAS_T": "0", "UNI_TR_MT": trafos})
+
+    # redes BT: uma árvore por transformador, com raiz no secundário
+    segmentos_bt = np.bincount(rng.integers(0, n_trafos, params.bt_segments), minlength=n_trafos)
+    bt = {coluna: [] for coluna in ("COD_ID", "PAC_1", "PAC_2", "xy_1", "xy_2", "COMP", "UNI_TR_MT")}
+    nos_bt = [] #(transformador, PAC, xy) de cada nó BT
+    for t in range(n_trafos):
+        pais_bt = _radial_tree(rng, segmentos_bt[t] + 1, tronco=0.5)
+        comp_bt = np.round(rng.uniform(15, 45, len(pais_bt)), 2)
+        xy_bt = _coordinates(rng, pais_bt, xy_mt[nos_trafo[t]], comp_bt)
+        pacs_bt = np.array([secundarios[t]] + [f"B{indice}_{t}_{no}" for no in range(1, len(pais_bt))], dtype=object)
+        filhos_bt = np.arange(1, len(pais_bt))
+        bt["COD_ID"] += [f"SB{indice}_{t}_{no}" for no in filhos_bt]
+        bt["PAC_1"].append(pacs_bt[pais_bt[filhos_bt]])
+        bt["PAC_2"].append(pacs_bt[filhos_bt])
+        bt["xy_1"].append(xy_bt[pais_bt[filhos_bt]])
+        bt["xy_2"].append(xy_bt[filhos_bt])
+        bt["COMP"].append(comp_bt[filhos_bt])
+        bt["UNI_TR_MT"] += [trafos[t]] * len(filhos_bt)
+        nos_bt += [(t, pac, xy) for pac, xy in zip(pacs_bt, xy_bt)]
+
+    # ilhas isoladas: cadeias de 3 segmentos BT sem ligação com a rede do alimentador
+    ilhas = []
+    for i in range(params.islands):
+        t = rng.integers(n_trafos)
+        pacs_ilha = [f"IL{indice}_{i}_{n}" for n in range(4)]
+        xy_ilha = xy_mt[nos_trafo[t]] + 200 + np.cumsum(rng.uniform(15, 45, (4, 2)), axis=0)
+        bt["COD_ID"] += [f"SI{indice}_{i}_{n}" for n in range(3)]
+        bt["PAC_1"].append(np.array(pacs_ilha[:-1], dtype=object))
+        bt["PAC_2"].append(np.array(pacs_ilha[1:], dtype=object))
+        bt["xy_1"].append(xy_ilha[:-1])
+        bt["xy_2"].append(xy_ilha[1:])
+        bt["COMP"].append(np.round(np.linalg.norm(np.diff(xy_ilha, axis=0), axis=1), 2))
+        bt["UNI_TR_MT"] += [trafos[t]] * 3
+        ilhas.append((t, pacs_ilha[-1]))
+
+    pac_1, pac_2, geometrias = _segments(np.concatenate(bt["PAC_1"]), np.concatenate(bt["PAC_2"]),
+                                         np.concatenate(bt["xy_1"]), np.concatenate(bt["xy_2"]), rng, params.inverted_share)
+    n_bt = len(pac_1)
+    tabelas["SSDBT"] = pd.DataFrame({"COD_ID": bt["COD_ID"], "FAS_CON": rng.choice(["ABCN", "CN"], n_bt, p=[0.97, 0.03]),
+                                     "PAC_1": pac_1, "PAC_2": pac_2, "TIP_CND": rng.choice(list(CONDUTORES_BT), n_bt),
+                                     "COMP": np.concatenate(bt["COMP"]), "UNI_TR_MT": bt["UNI_TR_MT"], "CTMT": ctmt,
+                                     "POS": "PD", "geometry": geometrias})
+
+    # consumidores BT: ramal de ligação até um nó BT do seu transformador (um consumidor por ilha)
+    nos_por_trafo = [[] for _ in range(n_trafos)]
+    for t, pac, _ in nos_bt:
+        nos_por_trafo[t].append(pac)
+    cons_trafo = [t for t in range(n_trafos) for _ in range(params.consumers_per_transformer)] + [t for t, _ in ilhas]
+    cons_pac_bt = [nos_por_trafo[t][rng.integers(len(nos_por_trafo[t]))] for t in cons_trafo[:len(cons_trafo) - len(ilhas)]]
+    cons_pac_bt += [pac for _, pac in ilhas]
+    n_cons = len(cons_trafo)
+    codigos = np.array([f"UC{indice}_{c}" for c in range(n_cons)], dtype=object)
+    ramais = np.array([f"RL{indice}_{c}" for c in range(n_cons)], dtype=object)
+    fases = rng.choice(FASES_BT[0], n_cons, p=FASES_BT[1])
+    trafos_cons = trafos[np.array(cons_trafo, dtype=int)] if n_cons else np.array([], dtype=object)
+    tabelas["RAMLIG"] = pd.DataFrame({"COD_ID": ramais, "FAS_CON": fases, "PAC_1": codigos, "PAC_2": cons_pac_bt,
+                                      "TIP_CND": rng.choice(list(CONDUTORES_RAMAL), n_cons),
+                                      "COMP": np.round(rng.uniform(5, 30, n_cons), 2), "UNI_TR_MT": trafos_cons,
+                                      "CTMT": ctmt, "POS": "PD"})
+    tabelas["UCBT_tab"] = pd.DataFrame({"COD_ID": codigos, "PAC": codigos, "FAS_CON": fases, "TEN_FORN": "15",
+                                        "TIP_CC": rng.choice(classes_bt, n_cons), "UNI_TR_MT": trafos_cons,
+                                        **_energies(rng, n_cons, 180.0), "CTMT": ctmt, "RAMAL": ramais,
+                                        "DAT_CON": "01/01/2020"})
+
+    # iluminação pública: um ponto para cada dois consumidores, em nós BT
+    n_ip = n_cons // 2
+    ip_nos = rng.integers(0, len(nos_bt), n_ip)
+    tabelas["PIP"] = pd.DataFrame({"PAC": [nos_bt[n][1] for n in ip_nos], "FAS_CON": rng.choice(FASES_IP[0], n_ip, p=FASES_IP[1]),
+                                   "TEN_FORN": "15", "TIP_CC": CLASSE_IP,
+                                   "UNI_TR_MT": trafos[np.array([nos_bt[n][0] for n in ip_nos], dtype=int)] if n_ip else [],
+                                   **_energies(rng, n_ip, 60.0), "CTMT": ctmt,
+                                   "COD_ID": [f"IP{indice}_{n}" for n in range(n_ip)]})
+
+    # consumidores MT
+    n_ucmt = max(1, params.mv_segments // 100)
+    ucmt_nos = rng.choice(filhos, n_ucmt)
+    tabelas["UCMT_tab"] = pd.DataFrame({"PN_CON": [f"PM{indice}_{n}" for n in range(n_ucmt)],
+                                        "COD_ID": [f"UCMT{indice}_{n}" for n in range(n_ucmt)], "PAC": pacs_mt[ucmt_nos],
+                                        "FAS_CON": "ABCN", "TEN_FORN": "49", "TIP_CC": rng.choice(classes_mt, n_ucmt),
+                                        **_energies(rng, n_ucmt, 20_000.0), "CTMT": ctmt})
+
+    # geração distribuída: 3% dos consumidores BT e um gerador MT
+    gd = rng.random(n_cons) < 0.03
+    tabelas["UGBT_tab"] = pd.DataFrame({"CTMT": ctmt, "CEG_GD": [f"GD.SIN.{indice:04d}.{c:06d}" for c in np.flatnonzero(gd)],
+                                        "PAC": codigos[gd], "UNI_TR_MT": trafos_cons[gd],
+                                        "POT_INST": np.round(rng.uniform(3, 15, int(gd.sum())), 1), "FAS_CON": fases[gd],
+                                        "TEN_CON": "15", "SIT_ATIV": "AT"})
+    tabelas["UGMT_tab"] = pd.DataFrame({"CTMT": ctmt, "CEG_GD": [f"UFV.SIN.{indice:04d}"], "PAC": [pacs_mt[rng.choice(filhos)]],
+                                        "POT_INST": [300.0], "FAS_CON": "ABC", "TEN_CON": "49", "SIT_ATIV": "AT"})
+    tabelas["UNSEBT"] = pd.DataFrame(columns=["COD_ID", "FAS_CON", "PAC_1", "PAC_2", "UNI_TR_MT", "CTMT"])
+    return tabelas
+
+
+def create_tables(params: SyntheticBDGD) -> Dict[str, pd.DataFrame]:
+    """
+    Creates every table of the synthetic BDGD.
+
+    Args:
+        params (SyntheticBDGD): Size of the BDGD.
+
+    Returns:
+        Dict[str, pd.DataFrame]: Tables by layer name; SSDMT/SSDBT/UNSEMT/UNTRMT/UNREMT are GeoDataFrames.
+    """
+    rng = np.random.default_rng(params.seed)
+    crvcrg, classes_bt, classes_mt = create_crvcrg(rng, params)
+    partes: Dict[str, List[pd.DataFrame]] = {}
+    for indice in range(1, params.feeders + 1):
+        for nome, tabela in create_feeder(rng, params, indice, classes_bt, classes_mt).items():
+            partes.setdefault(nome, []).append(tabela)
+    tabelas = {nome: pd.concat(dfs, ignore_index=True) for nome, dfs in partes.items()}
+    tabelas["CRVCRG"] = crvcrg
+    tabelas["SEGCON"] = create_segcon()
+    for nome in CAMADAS_LINHAS + CAMADAS_PONTOS:
+        tabelas[nome] = gpd.GeoDataFrame(tabelas[nome], geometry="geometry", crs=CRS_BDGD)
+    return tabelas
+
+
+def write_tables(tabelas: Dict[str, pd.DataFrame], path: str, json_file: str = "bdgd2dss.json"):
+    """
+    Writes the tables with the layers and columns of configuration.tables of the JSON file.
+
+    Args:
+        tabelas (Dict[str, pd.DataFrame]): Tables created by create_tables.
+        path (str): .gpkg or .gdb file (the .gdb driver needs GDAL >= 3.6).
+        json_file (str): Converter JSON file (bdgd2dss.json or bdgd2dss_private.json).
+    """
+    with open(json_file, "r", encoding="utf-8") as file:
+        configuracao = json.load(file)["configuration"]["tables"]
+    driver = DRIVERS[pathlib.Path(path).suffix.lower()]
+    for camada, tabela in configuracao.items():
+        df = tabelas[camada if camada in tabelas else f"{camada}_tab"] #BDGD privada: UCBT, UCMT, UGBT e UGMT
+        faltando = [coluna for coluna in tabela["columns"] if coluna not in df.columns]
+        if faltando:
+            raise ValueError(f"Colunas não geradas para a camada {camada}: {', '.join(faltando)}")
+        colunas = list(tabela["columns"]) + (["geometry"] if isinstance(df, gpd.GeoDataFrame) else [])
+        pyogrio.write_dataframe(df[colunas], path, layer=camada, driver=driver)
+
+
+def create_synthetic_bdgd(output_folder: str, params: Optional[SyntheticBDGD] = None, nome: str = "Sintetica",
+                          codigo: int = 999, ano: int = 2022, formato: str = "gpkg",
+                          json_file: str = "bdgd2dss.json") -> str:
+    """
+    Generates a synthetic BDGD.
+
+    Args:
+        output_folder (str): Folder of the file.
+        params (Optional[SyntheticBDGD]): Size of the BDGD (default: SyntheticBDGD()).
+        nome (str): Name of the distributor in the file name.
+        codigo (int): BDGD code in the file name.
+        ano (int): BDGD year (used in the day counts of the loads).
+        formato (str): gpkg or gdb.
+        json_file (str): Converter JSON file with configuration.tables.
+
+    Returns:
+        str: Path of the BDGD, e.g. <output_folder>/Sintetica-D_999_2022-12-31_V11.gpkg.
+    """
+    params = params or SyntheticBDGD()
+    os.makedirs(output_folder, exist_ok=True)
+    path = os.path.join(output_folder, f"{nome}-D_{codigo}_{ano}-12-31_V11.{formato}")
+    if os.path.exists(path):
+        raise FileExistsError(f"O arquivo {path} já existe")
+    write_tables(create_tables(params), path, json_file)
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> str:
+    parser = argparse.ArgumentParser(description="Gera uma BDGD sintética para testes de desempenho")
+    parser.add_argument("output_folder", help="pasta do arquivo gerado")
+    parser.add_argument("--feeders", type=int, default=2, help="número de alimentadores")
+    parser.add_argument("--mv-segments", type=int, default=1000, help="segmentos MT por alimentador")
+    parser.add_argument("--bt-segments", type=int, default=2000, help="segmentos BT por alimentador")
+    parser.add_argument("--consumers-per-transformer", type=int, default=25, help="consumidores BT por transformador")
+    parser.add_argument("--crvcrg-classes", type=int, default=12, help="classes de curvas de carga BT")
+    parser.add_argument("--transformers", type=int, default=None, help="transformadores por alimentador")
+    parser.add_argument("--islands", type=int, default=2, help="ilhas isoladas por alimentador")
+    parser.add_argument("--seed", type=int, default=0, help="semente do gerador aleatório")
+    parser.add_argument("--format", choices=["gpkg", "gdb"], default="gpkg", help="formato do arquivo")
+    parser.add_argument("--json", default="bdgd2dss.json", help="arquivo JSON do conversor")
+    args = parser.parse_args(argv)
+    params = SyntheticBDGD(args.feeders, args.mv_segments, args.bt_segments, args.consumers_per_transformer,
+                           args.crvcrg_classes, args.transformers, islands=args.islands, seed=args.seed)
+    path = create_synthetic_bdgd(args.output_folder, params, formato=args.format, json_file=args.json)
+    print(f"BDGD sintética criada: {path}")
+    return path
+
+
+if __name__ == "__main__":
+    main()
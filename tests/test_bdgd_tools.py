@@ -16,3 +16,498 @@ def response():
 def test_content(response):
     """Sample pytest test function with the pytest fixture as an argument."""
 
+
+
+def test_crvcrg_curves_match_process_loadshape():
+    """The vectorized CRVCRG reduction gives the same values as Converter.process_loadshape/process_loadshape2."""
+    import numpy as np
+    import pandas as pd
+    from bdgd2opendss.model.Converter import process_loadshape, process_loadshape2
+    from bdgd2opendss.model.CurveEngine import create_crvcrg_curves
+
+    rng = np.random.default_rng(0)
+    pot = rng.random((3, 96)) * 10
+    pot[2] = 5.0
+    crvcrg = pd.DataFrame(pot, columns=[f'POT_{i:02d}' for i in range(1, 97)])
+    crvcrg['COD_ID'] = ['RES', 'RES', 'COM']
+    crvcrg['TIP_DIA'] = ['DU', 'SA', 'DU']
+
+    curves = create_crvcrg_curves(crvcrg)
+    for i in range(3):
+        normalized, medias = process_loadshape(list(pot[i]))
+        mult, _ = process_loadshape2(list(pot[i]))
+        assert curves.medias[i].tolist() == medias
+        assert curves.minmax_normalized[i].tolist() == normalized
+        assert curves.max_normalized[i].tolist() == mult
+
+
+def test_output_sinks_memory_and_archive(tmp_path):
+    """The memory sink keeps the files as bytes and the archive sink writes one zip per feeder."""
+    import zipfile
+    from bdgd2opendss.core.OutputSink import ArchiveSink, MemorySink
+
+    sink = MemorySink()
+    with sink.open("F1", None, "Linhas.dss") as file:
+        file.write("New Line.1\n")
+    with sink.open("F1", None, "Linhas.dss", "a") as file:
+        file.write("New Line.2\n")
+    with sink.open("F1", None, "Loadshapes/x.sng", "wb") as file:
+        file.write(b"\x00\x01")
+    assert sink.result() == {"F1/Linhas.dss": b"New Line.1\nNew Line.2\n", "F1/Loadshapes/x.sng": b"\x00\x01"}
+
+    archive = ArchiveSink("zip")
+    with archive.open("F1", str(tmp_path), "Linhas.dss") as file:
+        file.write("New Line.1\n")
+    archive.close_feeder()
+    assert archive.result() == [str(tmp_path / "F1.zip")]
+    with zipfile.ZipFile(tmp_path / "F1.zip") as zf:
+        assert zf.read("F1/Linhas.dss") == b"New Line.1\n"
+
+
+def test_orphan_coords_points_and_propagation():
+    """PACs without segment take their own point or the coordinates of a connected PAC."""
+    import pandas as pd
+    from bdgd2opendss.model.BusCoords import orphan_coords
+
+    buscoords = pd.DataFrame({'PAC': ['BT1', 'BT2'], 'long': [1.0, 2.0], 'lat': [10.0, 20.0]})
+    pontos = pd.DataFrame({'PAC': ['ET2'], 'long': [5.0], 'lat': [50.0]})
+    ramlig = pd.DataFrame({'PAC_1': ['UC1', 'UC2'], 'PAC_2': ['BT1', 'UC1']})
+    untrmt = pd.DataFrame({'PAC_1': ['BT2'], 'PAC_2': ['ET2'], 'PAC_3': [None]})
+    ucbt = pd.DataFrame({'PAC': ['UC1', 'UC3']})
+
+    orfaos = orphan_coords(buscoords, pontos, [ramlig, untrmt, ucbt]).set_index('PAC')
+    assert orfaos.loc['ET2'].tolist() == [5.0, 50.0]
+    assert orfaos.loc['UC1'].tolist() == [1.0, 10.0]
+    assert orfaos.loc['UC2'].tolist() == [1.0, 10.0]
+    assert 'UC3' not in orfaos.index
+
+
+def test_synthetic_bdgd_layers_and_topology(tmp_path):
+    """The synthetic BDGD has the layers/columns of configuration.tables and radial feeders with isolated islands."""
+    import json
+    import pathlib
+    import pyogrio
+    from bdgd2opendss.sample.Synthetic import SyntheticBDGD, create_synthetic_bdgd
+
+    json_file = pathlib.Path(__file__).resolve().parents[1] / "bdgd2dss.json"
+    params = SyntheticBDGD(feeders=2, mv_segments=60, bt_segments=80, consumers_per_transformer=3, islands=1)
+    path = create_synthetic_bdgd(str(tmp_path), params, json_file=str(json_file))
+    assert pathlib.Path(path).name == "Sintetica-D_999_2022-12-31_V11.gpkg"
+
+    tables = json.loads(json_file.read_text(encoding="utf-8"))["configuration"]["tables"]
+    for layer, table in tables.items():
+        assert set(table["columns"]) <= set(pyogrio.read_info(path, layer=layer)["fields"])
+
+    ssdbt = pyogrio.read_dataframe(path, layer="SSDBT", read_geometry=False)
+    assert len(ssdbt) == params.feeders * (params.bt_segments + 3)
+    ucbt = pyogrio.read_dataframe(path, layer="UCBT_tab", read_geometry=False)
+    assert len(ucbt) == params.feeders * (params.transformers_per_feeder * params.consumers_per_transformer + params.islands)
+
+
+def _synthetic_run(tmp_path, monkeypatch, feeders=1):
+    """Creates a synthetic BDGD (SIN_0001, SIN_0002...) and sets up Core.run with the memory sink (returns the BDGD path)."""
+    import pathlib
+    from bdgd2opendss.core.Settings import settings
+    from bdgd2opendss.sample.Synthetic import SyntheticBDGD, create_synthetic_bdgd
+
+    root = pathlib.Path(__file__).resolve().parents[1]
+    params = SyntheticBDGD(feeders=feeders, mv_segments=60, bt_segments=80, consumers_per_transformer=3, islands=1)
+    path = create_synthetic_bdgd(str(tmp_path), params, json_file=str(root / "bdgd2dss.json"))
+    monkeypatch.chdir(root)
+    monkeypatch.setattr(settings, "outputSink", "memory")
+    monkeypatch.setattr(settings, "progressMode", "quiet")
+    return path
+
+
+def test_memory_sink_keeps_shared_library_between_runs(tmp_path, monkeypatch):
+    """Every run with the memory sink returns the Comum/ files that the masters redirect to."""
+    from bdgd2opendss.core import Core
+    from bdgd2opendss.core.Settings import settings
+
+    path = _synthetic_run(tmp_path, monkeypatch)
+    monkeypatch.setattr(settings, "sharedLibrary", True)
+
+    for _ in range(2):
+        arquivos = Core.run(path, output_folder=str(tmp_path))
+        comum = {nome.split("/")[1].split("_")[0] for nome in arquivos if nome.startswith("Comum/")}
+        assert comum == {"CodCondutor", "CurvaCarga", "CurvasPV"}
+
+
+def _crvcrg(cod_ids=('RES', 'RES', 'RES', 'COM'), tip_dias=('DU', 'SA', 'DO', 'DU'), seed=0):
+    """Small CRVCRG with random 96-point curves (default: RES with DU/SA/DO, COM with DU only)."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    crvcrg = pd.DataFrame(rng.random((len(cod_ids), 96)) * 10 + 1, columns=[f'POT_{i:02d}' for i in range(1, 97)])
+    crvcrg['COD_ID'] = list(cod_ids)
+    crvcrg['TIP_DIA'] = list(tip_dias)
+    return crvcrg
+
+
+@pytest.fixture
+def caches_limpos():
+    """Clears the per-BDGD caches (keyed by id of the CRVCRG) before and after the test."""
+    from bdgd2opendss.core.Core import reset_caches
+
+    reset_caches()
+    yield
+    reset_caches()
+
+
+def test_load_kw_matches_baseline_formula(monkeypatch, caches_limpos):
+    """The kW array equals ENE_m * PropEnerMens / (days * 24 * fc) per load, for the 36 day type/month variants."""
+    from types import SimpleNamespace
+    import numpy as np
+    from bdgd2opendss.core import Utils
+    from bdgd2opendss.model import Count_days, Load as load_module
+    from bdgd2opendss.model.Converter import process_loadshape
+    from bdgd2opendss.model.Load import Load
+    from bdgd2opendss.model.LoadEngine import MESES, compute_kw
+
+    monkeypatch.setattr(Utils, "cod_year_bdgd", "202212999")
+    Count_days.count_day_type(2022)
+    dias = {"DU": Count_days.du, "SA": Count_days.sa, "DO": Count_days.do}
+    mensagens = []
+    monkeypatch.setattr(load_module, "message", lambda texto, **kwargs: mensagens.append(texto))
+
+    crvcrg = _crvcrg()
+    medias = {(row.COD_ID, row.TIP_DIA): process_loadshape(list(row[:96]))[1] for _, row in crvcrg.iterrows()}
+    soma = {key: sum(pot) for key, pot in medias.items()}
+
+    def kw_baseline(daily, energia, tip_dia, mes):
+        curvas = [key for key in soma if key[0] == daily]
+        if (daily, tip_dia) not in soma:
+            return np.nan
+        total = sum(soma[key] * dias[key[1]][mes] for key in curvas)
+        prop = soma[(daily, tip_dia)] * dias[tip_dia][mes] / total
+        fc = soma[(daily, tip_dia)] / 24 / max(medias[(daily, tip_dia)])
+        return energia[mes] * prop / (dias[tip_dia][mes] * 24 * fc)
+
+    rng = np.random.default_rng(1)
+    loads = []
+    for daily in ['RES', 'COM', 'RES', 'IND']: #IND não tem curva na CRVCRG
+        energia = dict(zip(MESES, rng.random(12) * 500))
+        loads.append(SimpleNamespace(daily=daily, **{f'energia_{mes}': energia[mes] for mes in MESES}))
+    for mes in MESES: #carga com energia zerada
+        setattr(loads[2], f'energia_{mes}', 0.0)
+
+    tip_dias = ["DU", "SA", "DO"]
+    table = Load.coefficient_table(crvcrg, tip_dias)
+    kw = Load.compute_kw_loads(loads, table)
+    esperado = np.array([[[kw_baseline(load.daily, {mes: getattr(load, f'energia_{mes}') for mes in MESES}, tip_dia, mes)
+                           for mes in MESES] for tip_dia in tip_dias] for load in loads])
+
+    assert kw.shape == (4, 3, 12)
+    np.testing.assert_allclose(kw, esperado, rtol=1e-12)
+    assert np.isnan(kw[1, 1:]).all() and np.isnan(kw[3]).all()
+    assert (kw[2] == 0).all()
+    energia = np.array([[getattr(load, f'energia_{mes}') for mes in MESES] for load in loads])
+    np.testing.assert_array_equal(compute_kw(energia, table.index(load.daily for load in loads), table), kw)
+    assert mensagens == ["There's no corresponding loadshape for 2 loads (TIP_CC: COM, IND)"]
+
+
+def _count_day_type_baseline(ano):
+    """DU/SA/DO counts of each month as computed by the original pandas count_day_type."""
+    import pandas as pd
+    from bdgd2opendss.model.Count_days import count_busday, count_days, get_holidays_br
+
+    holidays_df = get_holidays_br(ano)
+    feriados_uteis = holidays_df[['is_busday', 'mes']].groupby('mes').sum()['is_busday']
+    contagem = []
+    for mes in range(1, 13):
+        inicio = f'{ano}-{mes:02d}'
+        fim = f'{ano}-{mes + 1:02d}' if mes < 12 else f'{ano + 1}-01'
+        feriados = feriados_uteis.get(mes, 0)
+        contagem.append((count_busday(inicio, fim) - feriados, count_days('sab', mes, ano), count_days('dom', mes, ano) + feriados))
+    return pd.DataFrame(contagem, columns=['du', 'sa', 'do']).to_numpy(dtype=float).T
+
+
+@pytest.mark.parametrize("ano", [2022, 2024]) #2022: feriados no sábado (01/01) e no domingo (25/12); 2024: bissexto
+def test_day_type_counts_match_baseline(ano):
+    """The vectorized day counts equal the pandas count_day_type and cover every day of the year."""
+    import calendar
+    import numpy as np
+    from bdgd2opendss.model.Count_days import day_type_calendar, day_type_counts
+
+    contagem = day_type_counts(ano)
+    np.testing.assert_array_equal(contagem, _count_day_type_baseline(ano))
+    assert contagem.sum() == (366 if calendar.isleap(ano) else 365)
+    tipos, meses = day_type_calendar(ano)
+    for t, tip_dia in enumerate(["DU", "SA", "DO"]):
+        np.testing.assert_array_equal(np.bincount(meses[tipos == tip_dia], minlength=13)[1:], contagem[t])
+
+
+@pytest.mark.parametrize("ano, horas", [(2022, 8760), (2024, 8784)])
+def test_yearly_shapes_keep_monthly_energy(monkeypatch, caches_limpos, ano, horas):
+    """The yearly curves have one point per hour and give back the monthly energy ENE_m of the loads."""
+    import numpy as np
+    from bdgd2opendss.core import Utils
+    from bdgd2opendss.model.Count_days import day_type_calendar
+    from bdgd2opendss.model.CurveEngine import get_crvcrg_curves
+    from bdgd2opendss.model.Load import Load
+    from bdgd2opendss.model.LoadEngine import TIP_DIAS_PERDAS, create_yearly_shapes, daily_multipliers
+
+    monkeypatch.setattr(Utils, "cod_year_bdgd", f"{ano}12999")
+    crvcrg = _crvcrg(['RES'] * 3 + ['COM'] * 3, ['DU', 'SA', 'DO'] * 2, seed=2)
+
+    table = Load.coefficient_table(crvcrg, TIP_DIAS_PERDAS)
+    energia = np.random.default_rng(4).random((len(table.classes), 12)) * 1000 #um consumidor por classe
+    class_share = energia / energia.sum(axis=1, keepdims=True)
+    tipos_dia, meses_dia = day_type_calendar(ano)
+    shapes, peak = create_yearly_shapes(table, daily_multipliers(get_crvcrg_curves(crvcrg), table), class_share, tipos_dia, meses_dia)
+
+    assert shapes.shape == (len(table.classes), horas)
+    np.testing.assert_allclose(shapes.max(axis=1), 1)
+    kw = energia.sum(axis=1) * peak #kW da carga no arquivo anual
+    meses_hora = np.repeat(meses_dia, 24)
+    energia_mensal = np.stack([np.bincount(meses_hora, weights=kw[c] * shapes[c], minlength=13)[1:] for c in range(len(table.classes))])
+    np.testing.assert_allclose(energia_mensal, energia, rtol=1e-9)
+
+
+@pytest.mark.parametrize("modelo, zipv", [(1, [0.5, 0, 0.5, 1, 0, 0, 0]), (2, [0, 0, 1, 0, 0, 1, 0]), (3, [0, 0, 1, 1, 0, 0, 0])])
+def test_zipv_load_model(modelo, zipv):
+    """The ZIPV vector of model=8 averages the models of the _M1/_M2 halves of intAdequarModeloCarga."""
+    from bdgd2opendss.core.Utils import adequar_modelo_carga, zipv_modelo_carga
+
+    vetor = [float(c) for c in zipv_modelo_carga(adequar_modelo_carga(modelo)).strip("[]").split()]
+    assert len(vetor) == 7
+    assert sum(vetor[:3]) == 1 and sum(vetor[3:6]) == 1
+    assert vetor == zipv
+
+
+def test_model8_writes_one_load_per_consumer(tmp_path, monkeypatch):
+    """With loadModel="model8" each consumer is a single ZIPV load instead of the _M1/_M2 pair."""
+    import re
+    from bdgd2opendss.core import Core
+    from bdgd2opendss.core.Settings import settings
+
+    path = _synthetic_run(tmp_path, monkeypatch)
+    cargas = {}
+    for modelo in ["ANEEL", "model8"]:
+        monkeypatch.setattr(settings, "loadModel", modelo)
+        arquivos = Core.run(path, output_folder=str(tmp_path))
+        cargas[modelo] = "".join(conteudo.decode() for nome, conteudo in arquivos.items()
+                                 if re.search(r"/Cargas[BM]T_DU01_", nome))
+
+    assert cargas["model8"].count('New "Load.') * 2 == cargas["ANEEL"].count('New "Load.') > 0
+    assert "_M1" not in cargas["model8"] and "_M2" not in cargas["model8"]
+    assert cargas["model8"].count("model=8 ZIPV=[") == cargas["model8"].count('New "Load.')
+
+
+def test_profiler_stopped_when_a_stage_fails(tmp_path, monkeypatch):
+    """A failing stage still stops the profiler and closes the feeder in the output sink."""
+    import cProfile
+    from bdgd2opendss.core import Core, Utils
+    from bdgd2opendss.model.Case import Case
+
+    path = _synthetic_run(tmp_path, monkeypatch)
+    fechados = []
+    monkeypatch.setattr(Utils.OutputSink, "close_feeder", lambda self: fechados.append(self))
+
+    def falha(self):
+        raise RuntimeError("etapa com erro")
+    monkeypatch.setattr(Case, "Popula_CRVCRG", falha)
+    with pytest.raises(RuntimeError):
+        Core.run(path, output_folder=str(tmp_path), profile=True)
+
+    assert len(fechados) == 1
+    profiler = cProfile.Profile()
+    profiler.enable() #falha se o perfil do alimentador ainda estiver ativo
+    profiler.disable()
+
+
+@pytest.mark.parametrize("formato, extensao, dtype", [("sngfile", ".sng", "float32"), ("dblfile", ".dbl", "float64")])
+def test_binary_loadshape_files(monkeypatch, formato, extensao, dtype):
+    """sngfile/dblfile write the raw float32/float64 multipliers; an unknown loadshapeFormat is rejected."""
+    import numpy as np
+    from bdgd2opendss.core import Utils
+    from bdgd2opendss.core.OutputSink import MemorySink
+    from bdgd2opendss.core.Settings import settings
+    from bdgd2opendss.model.LoadShape import LoadShape
+
+    mult = np.linspace(0, 1, 24)
+    sink = MemorySink()
+    monkeypatch.setattr(Utils, "sink_saida", sink)
+    monkeypatch.setattr(settings, "loadshapeFormat", formato)
+    loadshape = LoadShape(_tipocc="RES", _tipodia="DU")
+    loadshape.write_binary_mult(mult, "F1")
+    assert loadshape._mult_file == f"Loadshapes/RES_DU{extensao}"
+    np.testing.assert_array_equal(np.frombuffer(sink.result()[f"F1/Loadshapes/RES_DU{extensao}"], dtype=dtype), mult.astype(dtype))
+
+    monkeypatch.setattr(settings, "loadshapeFormat", formato[:3])
+    with pytest.raises(ValueError):
+        loadshape.write_binary_mult(mult, "F1")
+
+
+@pytest.mark.parametrize("origem", ["EPSG:4674", "EPSG:31982"]) #SIRGAS 2000 geográfico e SIRGAS 2000 / UTM zone 22S
+def test_utm_target_crs_keeps_bdgd_datum(origem):
+    """coordCRS="UTM" picks the UTM zone of the data in the datum of the BDGD, also for projected BDGDs."""
+    import numpy as np
+    import pyproj
+    from bdgd2opendss.model.BusCoords import target_crs
+
+    origem = pyproj.CRS(origem)
+    coords = np.array([[-51.5, -29.5], [-51.4, -29.6]])
+    if not origem.is_geographic:
+        coords = np.column_stack(pyproj.Transformer.from_crs("EPSG:4674", origem, always_xy=True).transform(coords[:, 0], coords[:, 1]))
+    assert target_crs("UTM", origem, coords).to_epsg() == 31982
+
+
+def test_run_clears_bdgd_caches(tmp_path, monkeypatch):
+    """run does not keep the coordinates, curves and coefficients of the BDGD after it returns."""
+    from bdgd2opendss.core import Core
+    from bdgd2opendss.core.Settings import settings
+    from bdgd2opendss.model import BusCoords, CurveEngine, Load, LoadEngine
+
+    path = _synthetic_run(tmp_path, monkeypatch)
+    monkeypatch.setattr(settings, "gerTabelaPerdas", True)
+    Core.get_feeders_in_area(path, "POLYGON ((-54 -30, -53 -30, -53 -29, -54 -29, -54 -30))")
+    assert Core._feeder_indexes
+    Core.run(path, output_folder=str(tmp_path))
+    assert not (Core._feeder_indexes or BusCoords._coords_bdgd or CurveEngine._curves or LoadEngine._coefficient_tables)
+    assert not (Load._pending_load_files or Load._yearly_loads or Load._df_energ_load_parts)
+
+
+def test_telemetry_log_opened_once_per_run(tmp_path, monkeypatch):
+    """The JSON-lines log keeps one handle from reset to write_batch_metrics, with one event per line."""
+    import json
+    from bdgd2opendss.core import Telemetry
+    from bdgd2opendss.core.Settings import settings
+
+    log = tmp_path / "telemetria.jsonl"
+    monkeypatch.setattr(settings, "telemetryLog", str(log))
+    monkeypatch.setattr(settings, "progressMode", "quiet")
+    Telemetry.reset("F1")
+    arquivo = Telemetry.arquivo_log
+    for linha in Telemetry.progress(range(3), total=3, desc="Linhas"):
+        Telemetry.message(f"linha {linha}")
+    assert Telemetry.arquivo_log is arquivo and not arquivo.closed
+    Telemetry.write_batch_metrics()
+
+    assert arquivo.closed and Telemetry.arquivo_log is None
+    eventos = [json.loads(linha) for linha in log.read_text(encoding="utf-8").splitlines()]
+    assert [evento["event"] for evento in eventos] == ["message"] * 3 + ["stage"]
+    assert eventos[-1]["rows"] == 3 and eventos[0]["feeder"] == "F1"
+
+
+def test_failed_feeder_does_not_leak_into_next_run(tmp_path, monkeypatch):
+    """Loads queued by a feeder whose conversion failed after UCBT are not written by the next run."""
+    from bdgd2opendss.core import Core
+    from bdgd2opendss.model.Case import Case
+
+    path = _synthetic_run(tmp_path, monkeypatch, feeders=2)
+    with monkeypatch.context() as contexto:
+        def falha(self):
+            raise RuntimeError("etapa com erro")
+        contexto.setattr(Case, "Populates_UCMT", falha)
+        with pytest.raises(RuntimeError):
+            Core.run(path, output_folder=str(tmp_path), all_feeders=False, lst_feeders=["SIN_0001"])
+
+    arquivos = Core.run(path, output_folder=str(tmp_path), all_feeders=False, lst_feeders=["SIN_0002"])
+    assert any(nome.startswith("SIN_0002/CargasBT_") for nome in arquivos)
+    assert all(nome.startswith("SIN_0002/") for nome in arquivos)
+
+
+def test_failed_stage_resets_load_state(tmp_path, monkeypatch):
+    """PopulaCase discards the queued, yearly and loss-table loads of a feeder whose conversion failed."""
+    from bdgd2opendss.core import Core
+    from bdgd2opendss.core.Settings import settings
+    from bdgd2opendss.model import Load as load_module
+    from bdgd2opendss.model.Case import Case
+
+    path = _synthetic_run(tmp_path, monkeypatch)
+    monkeypatch.setattr(settings, "gerYearly", True)
+    monkeypatch.setattr(settings, "gerTabelaPerdas", True)
+    monkeypatch.setattr(Core, "reset_caches", lambda: None) #só a limpeza do PopulaCase
+
+    estados = []
+    def falha(self):
+        estados.append((len(load_module._pending_load_files), len(load_module._yearly_loads), len(load_module._df_energ_load_parts)))
+        raise RuntimeError("etapa com erro")
+    monkeypatch.setattr(Case, "Populates_UCMT", falha)
+    with pytest.raises(RuntimeError):
+        Core.run(path, output_folder=str(tmp_path))
+
+    assert all(estados[0]) #UCBT/PIP já tinham registrado suas cargas
+    assert not (load_module._pending_load_files or load_module._yearly_loads or load_module._df_energ_load_parts)
+
+
+def test_coefficient_table_cache_not_reused_for_a_new_crvcrg(monkeypatch, caches_limpos):
+    """A new CRVCRG that gets the id of a collected one does not reuse its coefficients."""
+    import numpy as np
+    from bdgd2opendss.core import Utils
+    from bdgd2opendss.model import LoadEngine
+    from bdgd2opendss.model.Load import Load
+
+    monkeypatch.setattr(Utils, "cod_year_bdgd", "202212999")
+    monkeypatch.setattr(LoadEngine, "id", lambda obj: 1, raising=False) #todas as CRVCRG com o mesmo id
+    for seed in range(2):
+        crvcrg = _crvcrg(seed=seed)
+        table = Load.coefficient_table(crvcrg, ["DU", "SA", "DO"])
+        esperado = LoadEngine.create_coefficient_table(Load.compute_pre_kw(crvcrg), ["DU", "SA", "DO"])
+        np.testing.assert_array_equal(table.prop, esperado.prop)
+
+
+def test_crvcrg_curves_cache_not_reused_for_a_new_crvcrg(monkeypatch, caches_limpos):
+    """A new CRVCRG that gets the id of a collected one does not reuse its hourly curves."""
+    import numpy as np
+    from bdgd2opendss.core import Utils
+    from bdgd2opendss.model import CurveEngine
+
+    monkeypatch.setattr(Utils, "cod_year_bdgd", "202212999")
+    monkeypatch.setattr(CurveEngine, "id", lambda obj: 1, raising=False) #todas as CRVCRG com o mesmo id
+    for seed in range(2):
+        crvcrg = _crvcrg(seed=seed)
+        np.testing.assert_array_equal(CurveEngine.get_crvcrg_curves(crvcrg).medias, CurveEngine.create_crvcrg_curves(crvcrg).medias)
+
+
+def _extract_shx_baseline(geo_df):
+    """Row-wise extract_shx of the original BusCoords (one np.append per segment part)."""
+    import numpy as np
+    import pandas as pd
+    import shapely.geometry
+
+    lats, lons, names, pac1, pac2 = [], [], [], [], []
+    for feature, COD_ID, PAC_1, PAC_2 in zip(geo_df.geometry, geo_df.COD_ID, geo_df.PAC_1, geo_df.PAC_2):
+        if isinstance(feature, shapely.geometry.linestring.LineString):
+            linestrings = [feature]
+        elif isinstance(feature, shapely.geometry.multilinestring.MultiLineString):
+            linestrings = feature.geoms
+        else:
+            continue
+        for linestring in linestrings:
+            x, y = linestring.xy
+            lats = np.append(np.append(lats, y), None)
+            lons = np.append(np.append(lons, x), None)
+            names = np.append(np.append(names, [COD_ID] * len(y)), None)
+            pac1 = np.append(np.append(pac1, [PAC_1] * len(y)), None)
+            pac2 = np.append(np.append(pac2, [PAC_2] * len(y)), None)
+    return pd.DataFrame(list(zip(names, pac1, pac2, lats, lons))).rename(
+        columns={0: 'COD_ID', 1: 'pac1', 2: 'pac2', 3: 'lat', 4: 'long'}).dropna().reset_index(drop=True)
+
+
+def test_extract_shx_matches_row_wise_baseline():
+    """The vectorized vertex extraction keeps the vertices, their order and repetitions of the row-wise version."""
+    import geopandas as gpd
+    import pandas as pd
+    from shapely.geometry import LineString, MultiLineString, Point
+    from bdgd2opendss.model.BusCoords import _vertices, extract_shx
+
+    geo_df = gpd.GeoDataFrame({
+        'COD_ID': ['S1', 'S2', 'S3', 'S4', 'S5', 'S6'],
+        'PAC_1': ['P1', 'P3', 'P5', 'P7', 'P9', 'P11'],
+        'PAC_2': ['P2', 'P4', 'P6', 'P8', None, 'P12'],
+        'geometry': [LineString([(0, 0), (1, 1), (1, 1), (2, 0)]), #vértice repetido
+                     MultiLineString([[(2, 0), (3, 1)], [(3, 1), (4, 0), (5, 5)]]), #partes com vértice em comum
+                     LineString(), #geometria vazia
+                     Point(7, 7), #não é segmento
+                     LineString([(8, 8), (9, 9)]), #PAC_2 ausente
+                     LineString([(10, 0), (11, 1)])]})
+
+    esperado = _extract_shx_baseline(geo_df)
+    esperado[['lat', 'long']] = esperado[['lat', 'long']].astype(float)
+    pd.testing.assert_frame_equal(extract_shx(geo_df), esperado, check_dtype=False)
+    linhas, coords = _vertices(geo_df)
+    assert linhas.tolist() == [0, 0, 0, 0, 1, 1, 1, 1, 1, 4, 4, 5, 5]
+    assert coords.tolist()[4:9] == [[2, 0], [3, 1], [3, 1], [4, 0], [5, 5]]